@@ -1,6 +1,5 @@
 import asyncio
 import time
-import os
 from collections import OrderedDict
 from typing import Dict, Any, List, Set, Union, Optional
 from .schemas import Workflow, Node, NodeType, ExecutionResult
@@ -8,6 +7,9 @@ from services.gemini_service import gemini_service
 from services.storage_service import storage_service
 from services.vertex_service import vertex_service
 from services.veo_service import veo_service
+from services.audio_transcoder import audio_transcoder
+from services.tts_chunking import tts_chunker
+from services.synthesis_cache import synthesis_cache
 from config import model_config
 import logging
 import base64
@@ -19,6 +21,7 @@ from models import Workflow as WorkflowModel
 import hashlib
 import copy
 from .executors.editor_executor import EditorExecutor
+from .executors.base import progress_reporter
 
 class ExecutionCache:
     _instance = None
@@ -121,7 +124,7 @@ class WorkflowEngine:
                     return val
         return str(val) if val is not None else ""
 
-    def _extract_media_bytes(self, val: Any) -> Optional[bytes]:
+    async def _extract_media_bytes(self, val: Any) -> Optional[bytes]:
         """
         Robustly extracts raw bytes from various input formats:
         - bytes directly
@@ -156,17 +159,17 @@ class WorkflowEngine:
                     logger.warning(f"Failed to extract direct data from dict: {e}")
 
             if "url" in val and not "data" in val:
-                file_bytes = self._resolve_url_to_bytes(val["url"])
+                file_bytes = await self._resolve_url_to_bytes(val["url"])
                 if file_bytes:
                     return file_bytes
 
             for key in ["images", "videos", "audio"]:
                 if key in val and isinstance(val[key], list) and val[key]:
-                    return self._extract_media_bytes(val[key][0])
+                    return await self._extract_media_bytes(val[key][0])
 
         return None
 
-    def _extract_media_info(self, val: Any) -> Dict[str, Any]:
+    async def _extract_media_info(self, val: Any) -> Dict[str, Any]:
         """Extracts media bytes and mime_type from various input formats."""
         if val is None:
             return {"data": None, "mime_type": None}
@@ -181,7 +184,7 @@ class WorkflowEngine:
             if "uri" in val:
                 return {"data": val["uri"], "mime_type": val.get("mime_type")}
             if "url" in val:
-                file_bytes = self._resolve_url_to_bytes(val["url"])
+                file_bytes = await self._resolve_url_to_bytes(val["url"])
                 if file_bytes:
                     return {"data": file_bytes, "mime_type": val.get("mime_type")}
 
@@ -189,12 +192,12 @@ class WorkflowEngine:
             for key in ["images", "videos", "audio"]:
                 if key in val and val[key]:
                     if isinstance(val[key], list):
-                        return self._extract_media_info(val[key][0])
+                        return await self._extract_media_info(val[key][0])
                     elif isinstance(val[key], dict):
-                        return self._extract_media_info(val[key])
+                        return await self._extract_media_info(val[key])
                     
         # Fallback to _extract_media_bytes for other formats (bytes, data URL)
-        bytes_data = self._extract_media_bytes(val)
+        bytes_data = await self._extract_media_bytes(val)
         mime_type = None
         if isinstance(val, str) and val.strip().startswith("data:"):
             match = re.match(r'data:([^;]+);base64,(.+)', val)
@@ -252,7 +255,34 @@ class WorkflowEngine:
 
                     inputs = self._resolve_inputs(node, workflow.edges, context)
 
-                    output = await self._execute_node(node, inputs, user_id, db, context=context, use_cache=use_cache)
+                    # Run the node as its own task so its progress reports can be streamed while it works
+                    progress_queue: asyncio.Queue = asyncio.Queue()
+                    token = progress_reporter.set(progress_queue.put_nowait)
+                    try:
+                        node_task = asyncio.create_task(
+                            self._execute_node(node, inputs, user_id, db, context=context, use_cache=use_cache, workflow=workflow)
+                        )
+                    finally:
+                        progress_reporter.reset(token)
+                    try:
+                        while not node_task.done():
+                            getter = asyncio.ensure_future(progress_queue.get())
+                            await asyncio.wait({node_task, getter}, return_when=asyncio.FIRST_COMPLETED)
+                            if not getter.done():
+                                getter.cancel()
+                                continue
+                            progress = getter.result()
+                            yield f"data: {json.dumps({'type': 'node_progress', 'node_id': node.id, **progress})}\n\n"
+                    except asyncio.CancelledError:
+                        # Propagate the cancellation into the node so it can stop its subprocesses
+                        node_task.cancel()
+                        await asyncio.gather(node_task, return_exceptions=True)
+                        raise
+                    finally:
+                        # e.g. the client disconnected and the stream was closed mid-node
+                        if not node_task.done():
+                            node_task.cancel()
+                    output = node_task.result()
 
                     output = self._strip_base64_from_output(output)
 
@@ -325,7 +355,7 @@ class WorkflowEngine:
                 inputs = self._resolve_inputs(node, workflow.edges, context)
                 
                 # Execute Node Logic
-                output = await self._execute_node(node, inputs, user_id, db, depth, context=context, use_cache=use_cache)
+                output = await self._execute_node(node, inputs, user_id, db, depth, context=context, use_cache=use_cache, workflow=workflow)
                 
                 # Store Output
                 context[node.id] = output
@@ -412,16 +442,45 @@ class WorkflowEngine:
                     queue.append(edge.target)
         return downstream
 
-    def _resolve_url_to_bytes(self, url: str) -> Optional[bytes]:
+    def _feeds_editor(self, node_id: str, workflow: Optional[Workflow]) -> bool:
+        """True when an Editor node consumes this node's output directly."""
+        if workflow is None:
+            return False
+        editor_ids = {n.id for n in workflow.nodes if n.type == NodeType.EDITOR}
+        return any(e.source == node_id and e.target in editor_ids for e in workflow.edges)
+
+    async def _resolve_url_to_path(self, url: str) -> Optional[str]:
         if not url or not url.startswith("/api/media/"):
             return None
         relative_path = url[len("/api/media/"):]
-        file_path = os.path.realpath(os.path.join(storage_service.assets_dir, relative_path))
-        if not file_path.startswith(os.path.realpath(storage_service.assets_dir)):
+        # Restores the file from GCS if it was evicted from the local cache; that download must not block the loop
+        return await asyncio.to_thread(storage_service.ensure_local, relative_path)
+
+    async def _resolve_url_to_bytes(self, url: str) -> Optional[bytes]:
+        file_path = await self._resolve_url_to_path(url)
+        if file_path:
+            return await asyncio.to_thread(self._read_file, file_path)
+        return None
+
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _video_storage_path(self, video_val: Any) -> Optional[str]:
+        """Finds the stored asset backing a video input (url or storage_path), if any."""
+        if not isinstance(video_val, dict):
             return None
-        if os.path.isfile(file_path):
-            with open(file_path, "rb") as f:
-                return f.read()
+        candidates = [video_val] + [v for v in video_val.get("videos", []) if isinstance(v, dict)]
+        for item in candidates:
+            if "data" in item:
+                continue
+            url = item.get("url")
+            if url and url.startswith("/api/media/"):
+                return url[len("/api/media/"):]
+            sp = item.get("storage_path")
+            if sp and not sp.startswith("gs://"):
+                return sp
         return None
 
     def _strip_base64_from_output(self, output: Any) -> Any:
@@ -448,7 +507,7 @@ class WorkflowEngine:
 
         return output
 
-    def _resolve_video_to_gcs(self, video_val: Any) -> Optional[str]:
+    async def _resolve_video_to_gcs(self, video_val: Any) -> Optional[str]:
         gcs_uri = None
 
         if isinstance(video_val, str) and video_val.startswith("gs://"):
@@ -466,10 +525,24 @@ class WorkflowEngine:
                         if uri and uri.startswith("gs://"):
                             return uri
 
-        video_bytes = self._extract_media_bytes(video_val)
+        storage_path = self._video_storage_path(video_val)
+        if storage_path:
+            # Saved assets are already backed up under user_assets/; hand that object over instead of re-uploading
+            gcs_uri = await asyncio.to_thread(storage_service.persisted_gcs_uri, storage_path)
+            if gcs_uri:
+                return gcs_uri
+
+            # Stream local files from disk instead of loading the whole video into memory
+            local_path = await asyncio.to_thread(storage_service.ensure_local, storage_path)
+            if local_path:
+                gcs_uri = await asyncio.to_thread(storage_service.upload_file_to_gcs, local_path, model_config.VEO_BUCKET, "video/mp4")
+                logger.info(f"Uploaded local video file to GCS: {gcs_uri}")
+                return gcs_uri
+
+        video_bytes = await self._extract_media_bytes(video_val)
         if video_bytes:
             bucket = model_config.VEO_BUCKET
-            gcs_uri = storage_service.upload_to_gcs(video_bytes, bucket, "video/mp4")
+            gcs_uri = await asyncio.to_thread(storage_service.upload_to_gcs, video_bytes, bucket, "video/mp4")
             logger.info(f"Uploaded local video to GCS: {gcs_uri}")
             return gcs_uri
 
@@ -514,7 +587,7 @@ class WorkflowEngine:
         
         return inputs
 
-    async def _execute_node(self, node: Node, inputs: Dict[str, Any], user_id: str, db: Session = None, depth: int = 0, context: Dict[str, Any] = None, use_cache: bool = False) -> Any:
+    async def _execute_node(self, node: Node, inputs: Dict[str, Any], user_id: str, db: Session = None, depth: int = 0, context: Dict[str, Any] = None, use_cache: bool = False, workflow: Optional[Workflow] = None) -> Any:
         # 0. Check Cache
         cache_key = None
         if use_cache:
@@ -525,7 +598,7 @@ class WorkflowEngine:
                     logger.info(f"[CACHE HIT] Node {node.id}")
                     return cached_result
         
-        result = await self._execute_node_logic(node, inputs, user_id, db, depth, context)
+        result = await self._execute_node_logic(node, inputs, user_id, db, depth, context, workflow)
         
         # Cache Result
         if use_cache and cache_key and result is not None:
@@ -534,7 +607,7 @@ class WorkflowEngine:
              
         return result
 
-    async def _execute_node_logic(self, node: Node, inputs: Dict[str, Any], user_id: str, db: Session = None, depth: int = 0, context: Dict[str, Any] = None) -> Any:
+    async def _execute_node_logic(self, node: Node, inputs: Dict[str, Any], user_id: str, db: Session = None, depth: int = 0, context: Dict[str, Any] = None, workflow: Optional[Workflow] = None) -> Any:
 
         # 1. INPUT Node
         if node.type == NodeType.INPUT:
@@ -562,7 +635,7 @@ class WorkflowEngine:
                         contents.append(val["text"])
                     else:
                         # Fallback: Check if this dict contains media (User might have connected Audio->Text input)
-                        media_info = self._extract_media_info(val)
+                        media_info = await self._extract_media_info(val)
                         if media_info["data"] and media_info["mime_type"]:
                              logger.info(f"[GEMINI] Found media in 'text' input: {media_info['mime_type']}")
                              if isinstance(media_info["data"], str) and media_info["data"].startswith("gs://"):
@@ -593,7 +666,7 @@ class WorkflowEngine:
                             except Exception:
                                 pass
                         if not img_bytes and "url" in img:
-                            img_bytes = self._resolve_url_to_bytes(img["url"])
+                            img_bytes = await self._resolve_url_to_bytes(img["url"])
                         if img_bytes:
                             contents.append(types.Part(inline_data=types.Blob(
                                 data=img_bytes,
@@ -607,7 +680,7 @@ class WorkflowEngine:
                         except Exception:
                             pass
                     if not img_bytes and val.get("url"):
-                        img_bytes = self._resolve_url_to_bytes(val["url"])
+                        img_bytes = await self._resolve_url_to_bytes(val["url"])
                     if img_bytes:
                         contents.append(types.Part(inline_data=types.Blob(
                             data=img_bytes,
@@ -624,7 +697,7 @@ class WorkflowEngine:
             for val in other_inputs:
                 logger.info(f"[GEMINI] Processing 'other' input: {str(val)[:100]}...")
                 # 1. Try to extract media (audio/video/image)
-                media_info = self._extract_media_info(val)
+                media_info = await self._extract_media_info(val)
                 logger.info(f"[GEMINI] Extracted media info: mime={media_info.get('mime_type')}, data_type={type(media_info.get('data'))}")
                 
                 if media_info["data"] and media_info["mime_type"]:
@@ -727,7 +800,7 @@ class WorkflowEngine:
             # Find the first image to upscale
             image_to_upscale = None
             for val in image_inputs:
-                extracted = self._extract_media_bytes(val)
+                extracted = await self._extract_media_bytes(val)
                 if extracted:
                     image_to_upscale = extracted
                     break
@@ -784,8 +857,8 @@ class WorkflowEngine:
             elif language == "zh":
                 language_code = "cmn-CN"
 
-            if system_instruction:
-                prompt = f"[System: {system_instruction}]\n\n{prompt}"
+            # Prepended to every chunk when long text is synthesized in pieces
+            text_prefix = f"[System: {system_instruction}]\n\n" if system_instruction else ""
 
             payload = {
                 "input": {"text": prompt},
@@ -799,29 +872,43 @@ class WorkflowEngine:
             if not payload["voice"]["model_name"]:
                 del payload["voice"]["model_name"]
 
-            logger.info(f"[TTS] Generating speech with voice={voice_name}, model={model_id}, lang={language_code}")
+            # Store a compressed clip, unless an Editor downstream mixes it (it re-encodes, so keep the lossless WAV)
+            keep_lossless = self._feeds_editor(node.id, workflow)
+            synthesis_key = synthesis_cache.tts_key(
+                text=prompt, voice=voice_name, model=model_id, language=language_code,
+                system_instruction=system_instruction, output=audio_transcoder.output_format(keep_lossless)
+            )
 
-            # Call VertexService
-            b64_audio = await vertex_service.synthesize_raw(payload)
+            async def synthesize():
+                logger.info(f"[TTS] Generating speech with voice={voice_name}, model={model_id}, lang={language_code}")
+
+                # Long text is split at sentence boundaries and synthesized concurrently
+                b64_audio = await tts_chunker.synthesize(payload, text_prefix=text_prefix)
+                audio_content, mime_type = await audio_transcoder.transcode(
+                    base64.b64decode(b64_audio), keep_lossless=keep_lossless
+                )
+
+                # Save to storage
+                asset = await asyncio.to_thread(
+                    storage_service.save_asset,
+                    user_id=user_id,
+                    content=audio_content,
+                    asset_type="audio",
+                    mime_type=mime_type,
+                    prompt=prompt[:100],
+                    model_id=model_id,
+                    meta_data={"voice_name": voice_name},
+                    cache_key=synthesis_key
+                )
+                return asset, audio_content
+
+            # Unchanged narration reuses the asset synthesized last time
+            asset, audio_content = await synthesis_cache.get_or_create(user_id, synthesis_key, synthesize)
 
-            audio_content = base64.b64decode(b64_audio)
-            
-            # Save to storage
-            asset = await asyncio.to_thread(
-                storage_service.save_asset,
-                user_id=user_id,
-                content=audio_content,
-                asset_type="audio",
-                mime_type="audio/wav",
-                prompt=prompt[:100],
-                model_id=model_id,
-                meta_data={"voice_name": voice_name}
-            )
-            
             return {
                 "audio": {
-                    "data": b64_audio,
-                    "mime_type": "audio/wav",
+                    "data": base64.b64encode(audio_content).decode("utf-8"),
+                    "mime_type": asset.mime_type,
                     "storage_path": asset.storage_path
                 }
             }
@@ -836,40 +923,60 @@ class WorkflowEngine:
 
             config = node.data.config or {}
 
+            image_data = None
             if node.type == NodeType.LYRIA_PRO:
                 model_id = config.get("model_id") or "lyria-3-pro-preview"
-                image_data = None
                 image_inputs = inputs.get("image", [])
                 if image_inputs:
-                    image_data = self._extract_media_bytes(image_inputs[0])
-                result = await vertex_service.generate_music(prompt=prompt, model_id=model_id, image_data=image_data)
+                    image_data = await self._extract_media_bytes(image_inputs[0])
             else:
                 model_id = config.get("model_id") or "lyria-3-clip-preview"
-                result = await vertex_service.generate_music(prompt=prompt, model_id=model_id)
 
-            b64_audio = result.get("audioContent")
-            lyrics = result.get("lyrics")
-            mime_type = "audio/mpeg" if model_id.startswith("lyria-3") else "audio/mp3"
-            audio_content = base64.b64decode(b64_audio)
+            # A fixed seed on a model that honours it gives a reproducible result, so it is reused;
+            # otherwise every run is a new take
+            seed = config.get("seed")
+            seed = int(seed) if seed not in (None, "") and vertex_service.music_model_uses_seed(model_id) else None
+            synthesis_key = None
+            if seed is not None:
+                synthesis_key = synthesis_cache.music_key(prompt=prompt, model=model_id, seed=seed, image_data=image_data)
+
+            async def generate():
+                result = await vertex_service.generate_music(prompt=prompt, seed=seed, model_id=model_id, image_data=image_data)
+                lyrics = result.get("lyrics")
+                mime_type = "audio/mpeg" if model_id.startswith("lyria-3") else "audio/mp3"
+                audio_content = base64.b64decode(result.get("audioContent"))
+                meta_data = {}
+                if lyrics:
+                    meta_data["lyrics"] = lyrics
+                if seed is not None:
+                    meta_data["seed"] = seed
+
+                asset = await asyncio.to_thread(
+                    storage_service.save_asset,
+                    user_id=user_id,
+                    content=audio_content,
+                    asset_type="audio",
+                    mime_type=mime_type,
+                    prompt=prompt[:100],
+                    model_id=model_id,
+                    meta_data=meta_data or None,
+                    cache_key=synthesis_key
+                )
+                return asset, audio_content
 
-            asset = await asyncio.to_thread(
-                storage_service.save_asset,
-                user_id=user_id,
-                content=audio_content,
-                asset_type="audio",
-                mime_type=mime_type,
-                prompt=prompt[:100],
-                model_id=model_id,
-                meta_data={"lyrics": lyrics} if lyrics else None
-            )
+            if synthesis_key:
+                asset, audio_content = await synthesis_cache.get_or_create(user_id, synthesis_key, generate)
+            else:
+                asset, audio_content = await generate()
 
             output = {
                 "audio": {
-                    "data": b64_audio,
-                    "mime_type": mime_type,
+                    "data": base64.b64encode(audio_content).decode("utf-8"),
+                    "mime_type": asset.mime_type,
                     "storage_path": asset.storage_path
                 }
             }
+            lyrics = (asset.meta_data or {}).get("lyrics")
             if lyrics:
                 output["lyrics"] = lyrics
             return output
@@ -885,8 +992,8 @@ class WorkflowEngine:
                 first_frames = inputs.get("first_frame", [])
                 last_frames = inputs.get("last_frame", [])
                 
-                first_frame_info = self._extract_media_info(first_frames[0]) if first_frames else {"data": None, "mime_type": None}
-                last_frame_info = self._extract_media_info(last_frames[0]) if last_frames else {"data": None, "mime_type": None}
+                first_frame_info = await self._extract_media_info(first_frames[0]) if first_frames else {"data": None, "mime_type": None}
+                last_frame_info = await self._extract_media_info(last_frames[0]) if last_frames else {"data": None, "mime_type": None}
 
                 response = await veo_service.generate_video_v31(
                     model_id=node.data.model or model_config.DEFAULT_VEO_MODEL,
@@ -898,13 +1005,13 @@ class WorkflowEngine:
             
             elif node.type == NodeType.VEO_EXTEND:
                 video_inputs = inputs.get("video", [])
-                video_gcs = self._resolve_video_to_gcs(video_inputs[0]) if video_inputs else None
-                video_input = video_gcs if video_gcs else (self._extract_media_info(video_inputs[0])["data"] if video_inputs else None)
+                video_gcs = await self._resolve_video_to_gcs(video_inputs[0]) if video_inputs else None
+                video_input = video_gcs if video_gcs else ((await self._extract_media_info(video_inputs[0]))["data"] if video_inputs else None)
                 video_mime = "video/mp4"
 
                 next_video_inputs = inputs.get("next_video", [])
-                next_video_gcs = self._resolve_video_to_gcs(next_video_inputs[0]) if next_video_inputs else None
-                next_video_input = next_video_gcs if next_video_gcs else (self._extract_media_info(next_video_inputs[0])["data"] if next_video_inputs else None)
+                next_video_gcs = await self._resolve_video_to_gcs(next_video_inputs[0]) if next_video_inputs else None
+                next_video_input = next_video_gcs if next_video_gcs else ((await self._extract_media_info(next_video_inputs[0]))["data"] if next_video_inputs else None)
 
                 model_id = node.data.model or model_config.DEFAULT_VEO_MODEL
                 if "lite" in model_id.lower():
@@ -925,7 +1032,7 @@ class WorkflowEngine:
                 image_inputs = inputs.get("image", [])
                 reference_assets = []
                 for val in image_inputs[:3]:
-                    info = self._extract_media_info(val)
+                    info = await self._extract_media_info(val)
                     if info["data"]:
                         reference_assets.append(info["data"])
 
@@ -998,7 +1105,7 @@ class WorkflowEngine:
 
             config = node.data.config or {}
 
-            gcs_uri = self._resolve_video_to_gcs(video_inputs[0])
+            gcs_uri = await self._resolve_video_to_gcs(video_inputs[0])
 
             if not gcs_uri:
                 return {"error": "Could not resolve video input. Provide a video file or connect a Veo output."}
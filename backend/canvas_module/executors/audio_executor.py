@@ -1,4 +1,5 @@
 from .base import BaseNodeExecutor
+from services.audio_transcoder import audio_transcoder
 import asyncio
 import base64
 from typing import Any, Dict
@@ -52,13 +53,13 @@ class AudioExecutor(BaseNodeExecutor):
 
         b64_audio = await self.services['vertex'].synthesize_raw(payload)
         
-        audio_content = base64.b64decode(b64_audio)
+        audio_content, mime_type = await audio_transcoder.transcode(base64.b64decode(b64_audio))
         asset = await asyncio.to_thread(
             self.services['storage'].save_asset,
             user_id=user_id,
             content=audio_content,
             asset_type="audio",
-            mime_type="audio/wav", 
+            mime_type=mime_type, 
             prompt=prompt[:100],
             model_id=model_id,
             meta_data={"voice_name": voice_name}
@@ -66,8 +67,8 @@ class AudioExecutor(BaseNodeExecutor):
 
         return {
             "audio": {
-                "data": b64_audio,
-                "mime_type": "audio/mp3",
+                "data": base64.b64encode(audio_content).decode("utf-8"),
+                "mime_type": mime_type,
                 "storage_path": asset.storage_path
             }
         }
@@ -1,10 +1,33 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
 from services.log_service import log_service
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Set by the workflow engine around each node it executes; receives progress dicts
+# that are streamed to the client as `node_progress` events.
+progress_reporter: ContextVar[Optional[Callable[[Dict[str, Any]], None]]] = ContextVar("progress_reporter", default=None)
+
+
+def report_progress(percent: Optional[float] = None, eta_seconds: Optional[float] = None, stage: Optional[str] = None):
+    """Report progress of the node currently executing (no-op outside a streamed execution)."""
+    reporter = progress_reporter.get()
+    if reporter is None:
+        return
+    event: Dict[str, Any] = {}
+    if percent is not None:
+        event["percent"] = round(max(0.0, min(100.0, percent)), 1)
+    if eta_seconds is not None:
+        event["eta_seconds"] = round(max(0.0, eta_seconds), 1)
+    if stage:
+        event["stage"] = stage
+    try:
+        reporter(event)
+    except Exception as e:
+        logger.debug(f"Progress reporter failed: {e}")
+
 class BaseNodeExecutor(ABC):
     """Abstract base class for all node executors."""
     
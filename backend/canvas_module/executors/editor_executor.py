@@ -1,11 +1,15 @@
-from .base import BaseNodeExecutor
+from .base import BaseNodeExecutor, report_progress
+from .ffmpeg_pool import ffmpeg_pool
+from .media_probe import media_probe
+from .segment_cache import segment_cache
+from .render_cache import render_cache
 import asyncio
 import os
-import subprocess
 import json
 import base64
+import hashlib
 import tempfile
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 import uuid
 
@@ -15,6 +19,280 @@ class EditorExecutor(BaseNodeExecutor):
     Performs video concatenation and audio mixing using FFmpeg.
     """
 
+    # Codecs that can be concatenated into the .mp4 output without re-encoding
+    STREAM_COPY_CODECS = {"h264", "hevc"}
+
+    # Clips of a mixed timeline are normalized to the selected tier's video parameters
+    # (which are part of the segment cache key). Draft is the default for iterating on a
+    # timeline, final is chosen for export.
+    RENDER_TIERS = {
+        # Always downscaled, even when the clips could be stream-copied: a full-resolution
+        # copy is not a preview, and the small segments are cached across edits anyway
+        "draft": {
+            "video": {"width": 640, "height": 360, "fps": 15, "pix_fmt": "yuv420p", "vcodec": "libx264", "preset": "ultrafast"},
+            "audio_bitrate": "96k",
+            "stream_copy": False,
+        },
+        # fps None keeps the clips' own frame rate, as the original render did
+        "final": {
+            "video": {"width": 1280, "height": 720, "fps": None, "pix_fmt": "yuv420p", "vcodec": "libx264", "preset": "veryfast"},
+            "audio_bitrate": "192k",
+            "stream_copy": True,
+        },
+    }
+    DEFAULT_RENDER_QUALITY = "draft"
+    # Segments are joined by stream copy, so clips with different frame rates must be resampled to one
+    FALLBACK_FPS = 30
+
+    def _can_stream_copy(self, probes: List[Dict[str, Any]]) -> bool:
+        """True when every clip shares codec, resolution, frame rate and pixel format."""
+        if not probes or not all(p["has_video"] for p in probes):
+            return False
+        signatures = {
+            (p["video"]["codec"], p["video"]["width"], p["video"]["height"], p["video"]["fps"], p["video"]["pix_fmt"])
+            for p in probes
+        }
+        return len(signatures) == 1 and next(iter(signatures))[0] in self.STREAM_COPY_CODECS
+
+    @staticmethod
+    def _trim_points(item: Dict[str, Any]) -> Tuple[float, Optional[float]]:
+        """(in, out) seconds of a sequence item in source time; out is None for "to the end"."""
+        def seconds(value):
+            try:
+                return max(0.0, float(value))
+            except (TypeError, ValueError):
+                return None
+
+        start = seconds(item.get("trimStart")) or 0.0
+        end = seconds(item.get("trimEnd"))
+        if end is not None and end <= start:
+            end = None
+        return start, end
+
+    @staticmethod
+    def _seek_args(media: Dict[str, Any]) -> List[str]:
+        """
+        Input options for a trimmed clip. Placed before its -i, -ss seeks the demuxer to the
+        nearest keyframe and -t stops reading at the out point, so frames outside the trim
+        are never decoded.
+        """
+        args = []
+        if media["trim_start"]:
+            args.extend(["-ss", f"{media['trim_start']:.3f}"])
+        if media["trim_end"] is not None:
+            args.extend(["-t", f"{media['trim_end'] - media['trim_start']:.3f}"])
+        return args
+
+    @staticmethod
+    def _trimmed_duration(media: Dict[str, Any], duration: float) -> float:
+        """Seconds of `media` that remain after its trim, given the full source duration."""
+        end = duration if media["trim_end"] is None else min(media["trim_end"], duration or media["trim_end"])
+        return max(0.0, end - media["trim_start"])
+
+    async def _run_ffmpeg(self, cmd: List[str], duration: float = None, stage: str = None, cleanup: List[str] = ()):
+        """Run ffmpeg through the shared worker pool, streaming its progress as node_progress events."""
+        def on_progress(percent, eta_seconds):
+            report_progress(percent=percent, eta_seconds=eta_seconds, stage=stage)
+
+        report_progress(stage=f"queued: {stage}" if stage else "queued")
+        await ffmpeg_pool.run(cmd, duration=duration, on_progress=on_progress, cleanup=cleanup)
+
+    @staticmethod
+    async def _gather_all(coros) -> List[Any]:
+        """
+        Like asyncio.gather, but if one job fails or we are cancelled, the remaining jobs
+        are cancelled and awaited, so no ffmpeg child or partial file outlives the render.
+        """
+        tasks = [asyncio.ensure_future(c) for c in coros]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _normalized_segment(self, media: Dict[str, Any], params: Dict[str, Any], duration: float = None) -> str:
+        """Video-only copy of a (trimmed) clip scaled, padded and resampled to `params`, from the segment cache."""
+        src_path = media["path"]
+        seek_args = self._seek_args(media)
+        if seek_args:
+            # Trimmed segments are cached separately from the full clip
+            params = {**params, "trim": [media["trim_start"], media["trim_end"]]}
+        w, h = params["width"], params["height"]
+        vf = (
+            f"scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,"
+            f"setsar=1,fps={params['fps']},format={params['pix_fmt']}"
+        )
+
+        async def render(part_path: str):
+            await self._run_ffmpeg([
+                "ffmpeg", "-y", *seek_args, "-i", src_path, "-an", "-vf", vf,
+                "-c:v", params["vcodec"], "-preset", params["preset"],
+                "-f", "mp4", part_path,
+            ], duration=duration, stage=f"normalize {os.path.basename(src_path)}")
+
+        digest = await media_probe.file_digest(src_path)
+        return await segment_cache.get_or_create(digest, params, render)
+
+    @staticmethod
+    def _write_concat_list(paths: List[str]) -> str:
+        """Write an ffmpeg concat demuxer list file and return its path."""
+        with tempfile.NamedTemporaryFile("w", delete=False, suffix=".txt") as f:
+            for path in paths:
+                escaped = path.replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+            return f.name
+
+    @staticmethod
+    def _track_key(parts: Dict[str, Any]) -> str:
+        """Cache key of a track job: every input it reads (by content digest) and every setting it uses."""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def _clip_parts(items: List[Dict[str, Any]]) -> List[list]:
+        return [[m["digest"], m["trim_start"], m["trim_end"], m["volume"]] for m in items]
+
+    def _video_params(self, tier: Dict[str, Any], probes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """The tier's normalization parameters, with a source-rate tier resolved to the clips' common fps."""
+        params = tier["video"]
+        if params["fps"] is not None:
+            return params
+        rates = {p["video"]["fps"] for p in probes if p["has_video"] and p["video"]["fps"]}
+        return {**params, "fps": next(iter(rates)) if len(rates) == 1 else self.FALLBACK_FPS}
+
+    async def _video_track(self, video_paths: List[Dict[str, Any]], probes: List[Dict[str, Any]],
+                           vid_info: List[Tuple[bool, float]], tier: Dict[str, Any], duration: float) -> str:
+        """
+        Video-only track of the whole timeline, from the intermediates cache.
+
+        It is always a stream copy through the concat demuxer. Identical untrimmed clips
+        (e.g. all Veo outputs) are joined as-is; otherwise each clip is normalized once into
+        a cached segment, so an edit only re-encodes the clips that changed.
+        """
+        # Trimmed clips are re-encoded: a stream copy could only cut on keyframes
+        trimmed = any(self._seek_args(v) for v in video_paths)
+        copy_sources = tier["stream_copy"] and not trimmed and self._can_stream_copy(probes[:len(video_paths)])
+        params = self._video_params(tier, probes[:len(video_paths)])
+        key = self._track_key({
+            "clips": [[v["digest"], v["trim_start"], v["trim_end"]] for v in video_paths],
+            "video": None if copy_sources else params,
+        })
+
+        async def render(part_path: str):
+            if copy_sources:
+                self.logger.info(f"Editor: {len(video_paths)} compatible clips, stream-copying video")
+                track_sources = [v["path"] for v in video_paths]
+            else:
+                track_sources = await self._gather_all((
+                    self._normalized_segment(v, params, dur)
+                    for v, (_, dur) in zip(video_paths, vid_info)
+                ))
+            concat_list_path = self._write_concat_list(track_sources)
+            try:
+                await self._run_ffmpeg([
+                    "ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_list_path,
+                    "-map", "0:v:0", "-c", "copy", "-f", "mp4", part_path,
+                ], duration=duration or None, stage="video track")
+            finally:
+                try:
+                    os.remove(concat_list_path)
+                except OSError:
+                    pass
+
+        return await segment_cache.get_or_create(key, {"track": "video"}, render)
+
+    async def _audio_track(self, video_paths: List[Dict[str, Any]], vid_info: List[Tuple[bool, float]],
+                           speech_paths: List[Dict[str, Any]], speech_info: List[Tuple[bool, float]],
+                           bg_paths: List[Dict[str, Any]], tier: Dict[str, Any], video_duration: float) -> str:
+        """
+        Mixed audio track (clip audio, speech, background) encoded once to AAC, from the
+        intermediates cache. With a video track the mix is cut at the video's length.
+        """
+        key = self._track_key({
+            "videos": self._clip_parts(video_paths),
+            "speech": self._clip_parts(speech_paths),
+            "background": self._clip_parts(bg_paths),
+            "audio_bitrate": tier["audio_bitrate"],
+        })
+
+        async def render(part_path: str):
+            input_args = []
+            filter_complex = []
+            for v in video_paths:
+                input_args.extend(self._seek_args(v) + ["-i", v["path"]])
+
+            # Clip audio: use the source if it exists, otherwise generate silence
+            for i, (v, (has_a, dur)) in enumerate(zip(video_paths, vid_info)):
+                if has_a:
+                    filter_complex.append(f"[{i}:a]aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo,volume={v['volume']}[va{i}]")
+                else:
+                    # Generate finite silence matching video duration
+                    filter_complex.append(f"anullsrc=channel_layout=stereo:sample_rate=44100:d={dur},volume={v['volume']}[va{i}]")
+
+            if video_paths:
+                if len(video_paths) > 1:
+                    va_pads = "".join([f"[va{i}]" for i in range(len(video_paths))])
+                    filter_complex.append(f"{va_pads}concat=n={len(video_paths)}:v=0:a=1[aconcat]")
+                else:
+                    filter_complex.append(f"[va0]acopy[aconcat]")
+
+            # Speech inputs
+            curr_idx = len(video_paths)
+            for s in speech_paths:
+                input_args.extend(self._seek_args(s) + ["-i", s["path"]])
+
+            for i, (s, (has_a, dur)) in enumerate(zip(speech_paths, speech_info)):
+                idx = curr_idx + i
+                if has_a:
+                    filter_complex.append(f"[{idx}:a]aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo,volume={s['volume']}[sa{i}]")
+                else:
+                    # This shouldn't really happen for speech/music nodes but let's be safe
+                    filter_complex.append(f"anullsrc=channel_layout=stereo:sample_rate=44100:d={dur},volume={s['volume']}[sa{i}]")
+
+            if speech_paths:
+                if len(speech_paths) > 1:
+                    sa_inputs = "".join([f"[sa{i}]" for i in range(len(speech_paths))])
+                    filter_complex.append(f"{sa_inputs}concat=n={len(speech_paths)}:v=0:a=1[sconcat]")
+                else:
+                    filter_complex.append(f"[sa0]acopy[sconcat]")
+
+            # Background inputs
+            curr_idx = len(video_paths) + len(speech_paths)
+            for i, b in enumerate(bg_paths):
+                input_args.extend(self._seek_args(b) + ["-i", b["path"]])
+                # We assume background tracks have audio, but still resample
+                filter_complex.append(f"[{curr_idx + i}:a]aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo,volume={b['volume']}[ba{i}]")
+
+            # FINAL MIX
+            mix_inputs = []
+            if video_paths: mix_inputs.append("[aconcat]")
+            if speech_paths: mix_inputs.append("[sconcat]")
+            if bg_paths:
+                # Concat BG tracks if multiple
+                if len(bg_paths) > 1:
+                    ba_inputs = "".join([f"[ba{i}]" for i in range(len(bg_paths))])
+                    filter_complex.append(f"{ba_inputs}concat=n={len(bg_paths)}:v=0:a=1[baconcat]")
+                    mix_inputs.append("[baconcat]")
+                else:
+                    mix_inputs.append("[ba0]")
+
+            if len(mix_inputs) > 1:
+                filter_complex.append(f"{''.join(mix_inputs)}amix=inputs={len(mix_inputs)}:duration=longest[afinal]")
+            else:
+                filter_complex.append(f"{mix_inputs[0]}acopy[afinal]")
+
+            cmd = ["ffmpeg", "-y", *input_args, "-filter_complex", ";".join(filter_complex), "-map", "[afinal]"]
+            if video_paths:
+                # The final mux ends with the video; don't encode background music past it
+                cmd.extend(["-t", f"{video_duration:.3f}"])
+            cmd.extend(["-c:a", "aac", "-b:a", tier["audio_bitrate"], "-f", "mp4", part_path])
+
+            expected_duration = video_duration if video_paths else sum(d for _, d in speech_info)
+            await self._run_ffmpeg(cmd, duration=expected_duration or None, stage="audio mix")
+
+        return await segment_cache.get_or_create(key, {"track": "audio"}, render)
+
     async def execute(self, node: Any, inputs: Dict[str, Any], user_id: str, context: Dict[str, Any] = None) -> Any:
         config = node.data.config or {}
         sequence = config.get("sequence", {"videos": [], "speech": [], "background": []})
@@ -22,10 +300,11 @@ class EditorExecutor(BaseNodeExecutor):
         # 1. Resolve absolute paths for all inputs
         # We need a map of nodeId -> absolute_path
         media_map = {}
+        # Files written here for inline (base64) inputs; always removed when the render ends
+        temp_files: List[str] = []
         
-        # Helper to resolve an input value to a file path
-        # Helper to resolve an input value to a file path
-        def resolve_to_path(val):
+        # Helper to resolve an input value to a file path (GCS downloads run off the event loop)
+        async def resolve_to_path(val):
             if not val: return None
             
             storage_path = None
@@ -56,7 +335,8 @@ class EditorExecutor(BaseNodeExecutor):
             # 3. Handle gs:// URIs (download if needed)
             if storage_path and storage_path.startswith("gs://"):
                 try:
-                    local_rel_path = self.services['storage'].download_gcs_blob(
+                    local_rel_path = await asyncio.to_thread(
+                        self.services['storage'].download_gcs_blob,
                         gcs_uri=storage_path,
                         user_id=user_id
                     )
@@ -70,19 +350,19 @@ class EditorExecutor(BaseNodeExecutor):
 
             # 4. Resolve relative storage_path to absolute
             if storage_path and not storage_path.startswith("gs://"):
-                base_dir = self.services['storage'].assets_dir
-                abs_path = os.path.join(base_dir, storage_path)
-                if os.path.exists(abs_path):
+                # Re-fetches from the GCS backup if the local copy was evicted
+                abs_path = await asyncio.to_thread(self.services['storage'].ensure_local, storage_path)
+                if abs_path:
                     return abs_path
             
             # 5. Fallback: if it's raw data, write to a temp file
-            data_info = self.services['engine']._extract_media_info(val)
+            data_info = await self.services['engine']._extract_media_info(val)
             data = data_info.get("data")
             if data:
                 # If it happens to be a gs:// URI extracted as data
                 if isinstance(data, str) and data.startswith("gs://"):
                     # Recurse or handle here
-                    return resolve_to_path({"storage_path": data})
+                    return await resolve_to_path({"storage_path": data})
                 
                 # Ensure we have bytes before writing to binary file
                 if isinstance(data, str):
@@ -102,6 +382,7 @@ class EditorExecutor(BaseNodeExecutor):
                 if "wav" in data_info.get("mime_type", ""): suffix = ".wav"
                 
                 with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+                    temp_files.append(tmp.name)
                     tmp.write(data)
                     return tmp.name
                     
@@ -111,190 +392,134 @@ class EditorExecutor(BaseNodeExecutor):
         if context is None:
             return {"error": "Execution context missing"}
 
-        def get_path_for_node(node_id):
+        render_quality = config.get("render_quality", self.DEFAULT_RENDER_QUALITY)
+        if render_quality not in self.RENDER_TIERS:
+            return {"error": f"Unknown render_quality '{render_quality}' (expected one of {', '.join(self.RENDER_TIERS)})"}
+
+        try:
+            return await self._render(sequence, resolve_to_path, context, user_id, render_quality)
+        finally:
+            for path in temp_files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    async def _render(self, sequence: Dict[str, Any], resolve_to_path, context: Dict[str, Any], user_id: str,
+                      render_quality: str) -> Any:
+        async def get_path_for_node(node_id):
             result = context.get(node_id)
             if not result: return None
-            return resolve_to_path(result)
+            return await resolve_to_path(result)
 
         video_paths = []
         for v in sequence.get("videos", []):
-            path = get_path_for_node(v["nodeId"])
+            path = await get_path_for_node(v["nodeId"])
             if path:
-                video_paths.append({"path": path, "volume": v.get("volume", 100) / 100.0})
+                start, end = self._trim_points(v)
+                video_paths.append({"path": path, "volume": v.get("volume", 100) / 100.0, "trim_start": start, "trim_end": end})
 
         speech_paths = []
         for s in sequence.get("speech", []):
-            path = get_path_for_node(s["nodeId"])
+            path = await get_path_for_node(s["nodeId"])
             if path:
-                speech_paths.append({"path": path, "volume": s.get("volume", 100) / 100.0})
+                start, end = self._trim_points(s)
+                speech_paths.append({"path": path, "volume": s.get("volume", 100) / 100.0, "trim_start": start, "trim_end": end})
 
         bg_paths = []
         for b in sequence.get("background", []):
-            path = get_path_for_node(b["nodeId"])
+            path = await get_path_for_node(b["nodeId"])
             if path:
-                bg_paths.append({"path": path, "volume": b.get("volume", 20) / 100.0})
+                start, end = self._trim_points(b)
+                bg_paths.append({"path": path, "volume": b.get("volume", 20) / 100.0, "trim_start": start, "trim_end": end})
 
         if not video_paths and not speech_paths and not bg_paths:
             return {"error": "No media inputs found"}
 
-        # 2. FFmpeg Processing
-        output_filename = f"edit_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:4]}.mp4"
-        output_path = os.path.join(self.services['storage'].assets_dir, user_id, "video", output_filename)
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
+        storage = self.services['storage']
         try:
-            # Helper to get audio status and duration
-            async def get_media_info(path):
-                try:
-                    cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration:stream=codec_type", "-of", "json", path]
-                    proc = await asyncio.create_subprocess_exec(*cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                    stdout, _ = await proc.communicate()
-                    info = json.loads(stdout.decode())
-                    has_a = any(s.get("codec_type") == "audio" for s in info.get("streams", []))
-                    duration = float(info.get("format", {}).get("duration", 0))
-                    return has_a, duration
-                except Exception as e:
-                    self.logger.warning(f"ffprobe failed for {path}: {e}")
-                    return False, 0.0
+            # Fingerprint every input; unchanged files come from the shared digest cache
+            media = video_paths + speech_paths + bg_paths
+            digests = await asyncio.gather(*(media_probe.file_digest(m["path"]) for m in media))
+            for m, digest in zip(media, digests):
+                m["digest"] = digest
 
-            cmd = ["ffmpeg", "-y"]
-            input_args = []
-            filter_complex = []
-            
-            # Identify which segments have audio and their durations
-            vid_info = []
-            for v in video_paths:
-                input_args.extend(["-i", v["path"]])
-                info = await get_media_info(v["path"])
-                vid_info.append(info)
-
-            # Audio-only inputs (speech, bg)
-            # (We already resolved paths, just need to add to input_args later)
-            
-            # Video processing
-            for i, (v, (has_a, dur)) in enumerate(zip(video_paths, vid_info)):
-                # Video stream: Scale and Pad
-                filter_complex.append(f"[{i}:v]scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2,setsar=1,format=yuv420p[v{i}]")
-                
-                # Audio stream: Use source if exists, otherwise generate silence
-                if has_a:
-                    filter_complex.append(f"[{i}:a]aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo,volume={v['volume']}[va{i}]")
-                else:
-                    # Generate finite silence matching video duration
-                    filter_complex.append(f"anullsrc=channel_layout=stereo:sample_rate=44100:d={dur},volume={v['volume']}[va{i}]")
-            
-            # Concatenate Normalized Videos
-            if video_paths:
-                if len(video_paths) > 1:
-                    v_a_pads = "".join([f"[v{i}][va{i}]" for i in range(len(video_paths))])
-                    filter_complex.append(f"{v_a_pads}concat=n={len(video_paths)}:v=1:a=1[vconcat][aconcat]")
-                else:
-                    # Single video optimization - but still need to map the processed streams
-                    # Wait, if n=1 concat still works, but let's be explicit
-                    filter_complex.append(f"[v0]copy[vconcat];[va0]acopy[aconcat]")
-            
-            # Speech inputs
-            curr_idx = len(video_paths)
-            speech_info = []
-            for i, s in enumerate(speech_paths):
-                input_args.extend(["-i", s["path"]])
-                info = await get_media_info(s["path"])
-                speech_info.append(info)
-            
-            for i, (s, (has_a, dur)) in enumerate(zip(speech_paths, speech_info)):
-                idx = curr_idx + i
-                if has_a:
-                    filter_complex.append(f"[{idx}:a]aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo,volume={s['volume']}[sa{i}]")
-                else:
-                    # This shouldn't really happen for speech/music nodes but let's be safe
-                    filter_complex.append(f"anullsrc=channel_layout=stereo:sample_rate=44100:d={dur},volume={s['volume']}[sa{i}]")
-            
-            if speech_paths:
-                if len(speech_paths) > 1:
-                    sa_inputs = "".join([f"[sa{i}]" for i in range(len(speech_paths))])
-                    filter_complex.append(f"{sa_inputs}concat=n={len(speech_paths)}:v=0:a=1[sconcat]")
-                else:
-                    filter_complex.append(f"[sa0]acopy[sconcat]")
-            
-            # Background inputs
-            curr_idx = len(video_paths) + len(speech_paths)
-            for i, b in enumerate(bg_paths):
-                input_args.extend(["-i", b["path"]])
-                # We assume background tracks have audio, but still resample
-                filter_complex.append(f"[{curr_idx + i}:a]aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo,volume={b['volume']}[ba{i}]")
-            
-            # FINAL MIX
-            mix_inputs = []
-            if video_paths: mix_inputs.append("[aconcat]")
-            if speech_paths: mix_inputs.append("[sconcat]")
-            if bg_paths: 
-                # Concat BG tracks if multiple
-                if len(bg_paths) > 1:
-                    ba_inputs = "".join([f"[ba{i}]" for i in range(len(bg_paths))])
-                    filter_complex.append(f"{ba_inputs}concat=n={len(bg_paths)}:v=0:a=1[baconcat]")
-                    mix_inputs.append("[baconcat]")
-                else:
-                    mix_inputs.append("[ba0]")
-            
-            if len(mix_inputs) > 1:
-                filter_complex.append(f"{''.join(mix_inputs)}amix=inputs={len(mix_inputs)}:duration=longest[afinal]")
-            elif len(mix_inputs) == 1:
-                filter_complex.append(f"{mix_inputs[0]}acopy[afinal]")
-            
-            cmd.extend(input_args)
-            if filter_complex:
-                # Note: if using anullsrc, we might need -shortest on the video part or specific duration
-                # but anullsrc with :d=DURATION is better. 
-                # For simplicity, we use the amix duration=longest and hope for the best.
-                cmd.extend(["-filter_complex", ";".join(filter_complex)])
-            
-            if video_paths:
-                cmd.extend(["-map", "[vconcat]"])
-                if mix_inputs:
-                    cmd.extend(["-map", "[afinal]"])
-                else:
-                    cmd.extend(["-map", "[aconcat]"])
-            else:
-                cmd.extend(["-map", "[afinal]"])
-
-            cmd.extend(["-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac", "-shortest", output_path])
-            
-            # Run FFmpeg
-            self.logger.info(f"Running FFmpeg: {' '.join(cmd)}")
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                self.logger.error(f"FFmpeg failed: {stderr.decode()}")
-                return {"error": f"FFmpeg failed: {stderr.decode()[:1000]}"}
-
-            # Return Asset Info
-            storage_path = os.path.join(user_id, "video", output_filename)
-            asset = await asyncio.to_thread(
-                self.services['storage'].save_asset,
-                user_id=user_id,
-                content=open(output_path, "rb").read(),
-                asset_type="video",
-                mime_type="video/mp4",
-                prompt="Edited Video Sequence",
-                model_id="ffmpeg-editor"
-            )
+            # Re-running an unchanged timeline (same content, order, volumes, trims and tier)
+            # returns the earlier render instead of starting ffmpeg again
+            render_key = self._track_key({
+                "user_id": user_id,
+                "render_quality": render_quality,
+                "videos": self._clip_parts(video_paths),
+                "speech": self._clip_parts(speech_paths),
+                "background": self._clip_parts(bg_paths),
+            })
+            entry = await render_cache.get_or_create(render_key, storage, lambda: self._render_timeline(
+                video_paths, speech_paths, bg_paths, storage, user_id, render_quality
+            ))
+            storage_path = entry["storage_path"]
 
             return {
                 "videos": [{
                     "url": f"/api/media/{storage_path}",
                     "storage_path": storage_path,
                     "mime_type": "video/mp4"
-                }]
+                }],
+                "render_quality": render_quality
             }
 
         except Exception as e:
             self.logger.error(f"Editor execution failed: {e}")
             return {"error": str(e)}
-        finally:
-            # Cleanup temp files if any (TODO)
-            pass
+
+    async def _render_timeline(self, video_paths: List[Dict[str, Any]], speech_paths: List[Dict[str, Any]],
+                               bg_paths: List[Dict[str, Any]], storage, user_id: str, render_quality: str) -> Dict[str, Any]:
+        """Render a resolved, fingerprinted timeline into a new video asset and return its cache entry."""
+        tier = self.RENDER_TIERS[render_quality]
+
+        # Render straight into the assets directory; the file is then registered where it is
+        safe_user_id = storage._sanitize_path_component(user_id)
+        output_filename = f"edit_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:4]}.mp4"
+        storage_path = os.path.join(safe_user_id, "video", output_filename)
+        output_path = os.path.join(storage.assets_dir, storage_path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        # Probe every input up front, concurrently; unchanged files come from the shared cache
+        probes = await media_probe.probe_many([m["path"] for m in video_paths + speech_paths])
+        # Durations are what remains of each clip after its trim
+        vid_info = [(p["has_audio"], self._trimmed_duration(v, p["duration"])) for v, p in zip(video_paths, probes)]
+        speech_info = [
+            (p["has_audio"], self._trimmed_duration(s, p["duration"]))
+            for s, p in zip(speech_paths, probes[len(video_paths):])
+        ]
+        video_duration = sum(d for _, d in vid_info)
+
+        # The video track and the audio mix are independent ffmpeg jobs, run concurrently and
+        # cached separately, so an audio-only edit (volume, background swap) reuses the video track.
+        jobs = [self._audio_track(video_paths, vid_info, speech_paths, speech_info, bg_paths, tier, video_duration)]
+        if video_paths:
+            jobs.append(self._video_track(video_paths, probes, vid_info, tier, video_duration))
+        audio_track, *video_track = await self._gather_all(jobs)
+
+        # Final mux is a stream copy of both tracks
+        cmd = ["ffmpeg", "-y"]
+        if video_track:
+            cmd.extend(["-i", video_track[0], "-i", audio_track, "-map", "0:v:0", "-map", "1:a:0"])
+        else:
+            cmd.extend(["-i", audio_track, "-map", "0:a:0"])
+        cmd.extend(["-c", "copy", "-shortest", output_path])
+
+        await self._run_ffmpeg(cmd, stage=f"mux ({render_quality})", cleanup=[output_path])
+
+        # Register the rendered file in place (no read-back, no second copy)
+        await asyncio.to_thread(
+            storage.register_asset,
+            user_id=user_id,
+            storage_path=storage_path,
+            asset_type="video",
+            mime_type="video/mp4",
+            prompt="Edited Video Sequence",
+            model_id="ffmpeg-editor",
+            meta_data={"render_quality": render_quality}
+        )
+
+        return {"storage_path": storage_path, "render_quality": render_quality}
@@ -0,0 +1,159 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[float, Optional[float]], None]
+
+
+class FFmpegError(RuntimeError):
+    pass
+
+
+class FFmpegPool:
+    """
+    Bounded pool for ffmpeg processes.
+
+    At most `max_workers` encodes run at once (sized to the instance's vCPUs);
+    the rest wait their turn instead of fighting over the CPU. Each run reports
+    progress parsed from `-progress pipe:1` as (percent, eta_seconds). If the
+    awaiting task is cancelled, the ffmpeg child is terminated (killed if it
+    does not exit promptly) and the given partial outputs are removed.
+    """
+
+    TERMINATE_GRACE_SECONDS = 3.0
+    STDERR_TAIL_BYTES = 16 * 1024
+    # Minimum seconds between progress callbacks for one process
+    PROGRESS_INTERVAL = 0.5
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._semaphore = asyncio.Semaphore(self.max_workers)
+        self.stats = {"running": 0, "queued": 0, "completed": 0, "failed": 0, "cancelled": 0}
+
+    @staticmethod
+    def _with_progress_args(cmd: List[str]) -> List[str]:
+        # Global options go right after the executable
+        return [cmd[0], "-hide_banner", "-nostats", "-progress", "pipe:1"] + cmd[1:]
+
+    async def _read_progress(self, stream: asyncio.StreamReader, duration: Optional[float],
+                             on_progress: Optional[ProgressCallback], started: float):
+        last_emit = 0.0
+        while True:
+            line = await stream.readline()
+            if not line:
+                return
+            key, _, value = line.decode(errors="replace").strip().partition("=")
+            if not on_progress or not duration:
+                continue
+            # out_time_us and (despite its name) out_time_ms are both microseconds
+            if key in ("out_time_us", "out_time_ms"):
+                try:
+                    position = int(value) / 1_000_000
+                except ValueError:
+                    continue
+                now = time.monotonic()
+                if now - last_emit < self.PROGRESS_INTERVAL:
+                    continue
+                last_emit = now
+                fraction = max(0.0, min(1.0, position / duration))
+                elapsed = now - started
+                eta = elapsed * (1 - fraction) / fraction if fraction > 0.01 else None
+                on_progress(fraction * 100, eta)
+            elif key == "progress" and value == "end":
+                on_progress(100.0, 0.0)
+
+    @staticmethod
+    async def _read_tail(stream: asyncio.StreamReader, limit: int) -> bytes:
+        tail = b""
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                return tail
+            tail = (tail + chunk)[-limit:]
+
+    async def _stop(self, proc: asyncio.subprocess.Process):
+        if proc.returncode is not None:
+            return
+        try:
+            proc.terminate()
+            await asyncio.wait_for(proc.wait(), timeout=self.TERMINATE_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    def _remove(paths: Iterable[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def run(self, cmd: List[str], duration: Optional[float] = None,
+                  on_progress: Optional[ProgressCallback] = None, cleanup: Iterable[str] = ()):
+        """
+        Run an ffmpeg command once a worker slot is free. `duration` (seconds of
+        output) enables percentage progress. Raises FFmpegError on a non-zero exit;
+        `cleanup` paths are removed on failure or cancellation.
+        """
+        cleanup = list(cleanup)
+        self.stats["queued"] += 1
+        try:
+            await self._semaphore.acquire()
+        except asyncio.CancelledError:
+            self.stats["queued"] -= 1
+            self.stats["cancelled"] += 1
+            raise
+        self.stats["queued"] -= 1
+        self.stats["running"] += 1
+        proc = None
+        try:
+            full_cmd = self._with_progress_args(cmd)
+            logger.info(f"Running FFmpeg: {' '.join(full_cmd)}")
+            started = time.monotonic()
+            proc = await asyncio.create_subprocess_exec(
+                *full_cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr_tail, returncode = await asyncio.gather(
+                self._read_progress(proc.stdout, duration, on_progress, started),
+                self._read_tail(proc.stderr, self.STDERR_TAIL_BYTES),
+                proc.wait(),
+            )
+            if returncode != 0:
+                self.stats["failed"] += 1
+                message = stderr_tail.decode(errors="replace")
+                logger.error(f"FFmpeg failed ({returncode}): {message}")
+                self._remove(cleanup)
+                raise FFmpegError(f"FFmpeg failed: {message[-1000:]}")
+            self.stats["completed"] += 1
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            if proc is not None:
+                # Finish stopping the child even if we are cancelled again meanwhile
+                stopping = asyncio.ensure_future(self._stop(proc))
+                while not stopping.done():
+                    try:
+                        await asyncio.shield(stopping)
+                    except asyncio.CancelledError:
+                        pass
+                logger.info(f"FFmpeg process {proc.pid} stopped after cancellation")
+            self._remove(cleanup)
+            raise
+        finally:
+            self.stats["running"] -= 1
+            self._semaphore.release()
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "max_workers": self.max_workers}
+
+
+ffmpeg_pool = FFmpegPool(max_workers=int(os.getenv("EDITOR_FFMPEG_WORKERS", str(os.cpu_count() or 2))))
@@ -0,0 +1,180 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (realpath, size, mtime_ns): rewriting a file in place changes the key
+FileKey = Tuple[str, int, int]
+
+
+def _file_key(path: str) -> FileKey:
+    st = os.stat(path)
+    return os.path.realpath(path), st.st_size, st.st_mtime_ns
+
+
+def _parse_rate(rate: Optional[str]) -> float:
+    """ffprobe frame rates come as fractions like '30000/1001'."""
+    if not rate:
+        return 0.0
+    num, _, den = rate.partition("/")
+    try:
+        return float(num) / float(den or 1) if float(den or 1) else 0.0
+    except ValueError:
+        return 0.0
+
+
+class MediaProbe:
+    """
+    Process-wide ffprobe and content-digest cache for Editor inputs.
+
+    Results are keyed by (path, size, mtime_ns), so unchanged inputs (generated
+    assets are never rewritten) are probed once per process no matter how many
+    times a timeline is re-rendered. Concurrent probes of the same file share
+    one ffprobe run, and the number of ffprobe processes is bounded.
+    """
+
+    PROBE_ENTRIES = (
+        "format=duration:"
+        "stream=codec_type,codec_name,width,height,r_frame_rate,pix_fmt,sample_rate,channels"
+    )
+    DIGEST_CHUNK = 1024 * 1024
+
+    def __init__(self, max_entries: int = 4096, max_concurrency: int = 8):
+        self.max_entries = max_entries
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._probes: "OrderedDict[FileKey, dict]" = OrderedDict()
+        self._digests: "OrderedDict[FileKey, str]" = OrderedDict()
+        self._inflight: Dict[FileKey, asyncio.Future] = {}
+        self.stats = {"probe_hits": 0, "probe_misses": 0, "digest_hits": 0, "digest_misses": 0, "errors": 0}
+
+    def _cache_get(self, cache: OrderedDict, key: FileKey):
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _cache_put(self, cache: OrderedDict, key: FileKey, value):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.max_entries:
+                cache.popitem(last=False)
+
+    @staticmethod
+    def _summarize(raw: dict) -> dict:
+        streams = raw.get("streams", [])
+        video = next((s for s in streams if s.get("codec_type") == "video"), None)
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+        info = {
+            "duration": float(raw.get("format", {}).get("duration") or 0.0),
+            "has_video": video is not None,
+            "has_audio": audio is not None,
+            "video": None,
+            "audio": None,
+        }
+        if video:
+            info["video"] = {
+                "codec": video.get("codec_name"),
+                "width": int(video.get("width") or 0),
+                "height": int(video.get("height") or 0),
+                "fps": round(_parse_rate(video.get("r_frame_rate")), 3),
+                "pix_fmt": video.get("pix_fmt"),
+            }
+        if audio:
+            info["audio"] = {
+                "codec": audio.get("codec_name"),
+                "sample_rate": int(audio.get("sample_rate") or 0),
+                "channels": int(audio.get("channels") or 0),
+            }
+        return info
+
+    async def _run_ffprobe(self, path: str) -> dict:
+        cmd = ["ffprobe", "-v", "error", "-show_entries", self.PROBE_ENTRIES, "-of", "json", path]
+        async with self._semaphore:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(stderr.decode(errors="replace").strip() or f"ffprobe exited with {proc.returncode}")
+        return self._summarize(json.loads(stdout.decode()))
+
+    async def probe(self, path: str) -> dict:
+        """
+        Stream summary for a media file:
+        {duration, has_video, has_audio, video: {codec, width, height, fps, pix_fmt}, audio: {codec, sample_rate, channels}}.
+        Failures are logged and return an empty summary (not cached).
+        """
+        try:
+            key = _file_key(path)
+        except OSError as e:
+            logger.warning(f"ffprobe skipped, cannot stat {path}: {e}")
+            return self._summarize({})
+
+        cached = self._cache_get(self._probes, key)
+        if cached is not None:
+            self.stats["probe_hits"] += 1
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        self.stats["probe_misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        info = self._summarize({})
+        try:
+            info = await self._run_ffprobe(path)
+            self._cache_put(self._probes, key, info)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"ffprobe failed for {path}: {e}")
+        finally:
+            self._inflight.pop(key, None)
+            # Joiners always get an answer, even if this task was cancelled
+            if not future.done():
+                future.set_result(info)
+        return info
+
+    async def probe_many(self, paths: List[str]) -> List[dict]:
+        """Probe all paths concurrently, preserving order."""
+        return list(await asyncio.gather(*(self.probe(p) for p in paths)))
+
+    def _hash_file(self, path: str) -> str:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.DIGEST_CHUNK), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    async def file_digest(self, path: str) -> str:
+        """SHA-256 of the file contents, cached by (path, size, mtime_ns)."""
+        key = _file_key(path)
+        cached = self._cache_get(self._digests, key)
+        if cached is not None:
+            self.stats["digest_hits"] += 1
+            return cached
+        self.stats["digest_misses"] += 1
+        digest = await asyncio.to_thread(self._hash_file, path)
+        self._cache_put(self._digests, key, digest)
+        return digest
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "probes": len(self._probes), "digests": len(self._digests)}
+
+
+media_probe = MediaProbe(
+    max_entries=int(os.getenv("MEDIA_PROBE_CACHE_ENTRIES", "4096")),
+    # ffprobe only reads container headers, so it tolerates more parallelism than encodes
+    max_concurrency=int(os.getenv("MEDIA_PROBE_CONCURRENCY", str(max(4, 2 * (os.cpu_count() or 1))))),
+)
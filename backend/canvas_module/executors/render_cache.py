@@ -0,0 +1,94 @@
+import os
+import json
+import uuid
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from core.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """
+    Index of finished Editor renders, one small JSON file per timeline.
+
+    The key covers everything that determines the output (user, render tier,
+    clip order, volumes, trims and the content digest of every input file),
+    never node ids or the transient URLs the inputs arrive with. Re-running an
+    unchanged timeline therefore returns the asset rendered last time without
+    starting ffmpeg, and concurrent runs of one timeline share a single render.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._flights = SingleFlight()
+        self.stats = {"hits": 0, "misses": 0, "joined": 0, "stale": 0, "errors": 0}
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def _load(self, key: str, storage) -> Optional[dict]:
+        path = self._entry_path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # The render is reusable while its file exists locally or in GCS; an evicted copy is only
+        # fetched again when it is actually served
+        if storage.is_available(entry.get("storage_path", "")):
+            return entry
+        self.stats["stale"] += 1
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    def _store(self, key: str, entry: dict):
+        path = self._entry_path(key)
+        part_path = f"{path}.{uuid.uuid4().hex[:8]}.part"
+        with open(part_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(part_path, path)
+
+    async def get_or_create(self, key: str, storage, render: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Return the cached render entry for `key`, calling `render()` on a miss. `render`
+        must return a JSON-serializable dict with the output's `storage_path`, or raise.
+        """
+        entry = await asyncio.to_thread(self._load, key, storage)
+        if entry is not None:
+            self.stats["hits"] += 1
+            return entry
+
+        async def create() -> Dict[str, Any]:
+            try:
+                entry = await render()
+            except BaseException:
+                self.stats["errors"] += 1
+                raise
+            try:
+                await asyncio.to_thread(self._store, key, entry)
+            except OSError as e:
+                logger.warning(f"Could not record Editor render {entry.get('storage_path')} in cache: {e}")
+            return entry
+
+        # Concurrent runs of one timeline share a render; one of them being cancelled does not fail the others
+        self.stats["joined" if key in self._flights else "misses"] += 1
+        return await self._flights.run(key, create)
+
+    def get_stats(self) -> dict:
+        try:
+            entries = sum(1 for name in os.listdir(self.root) if name.endswith(".json"))
+        except OSError:
+            entries = 0
+        return {**self.stats, "entries": entries}
+
+
+_backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+render_cache = RenderCache(root=os.path.join(_backend_dir, "data", "cache", "editor_renders"))
@@ -0,0 +1,80 @@
+import os
+import json
+import uuid
+import hashlib
+import logging
+from typing import Awaitable, Callable
+
+from core.single_flight import SingleFlight
+from services.asset_cache import AssetCache
+
+logger = logging.getLogger(__name__)
+
+
+class SegmentCache:
+    """
+    Disk cache of normalized Editor clip intermediates.
+
+    Each entry is one clip already scaled, padded and resampled to the render
+    parameters, keyed by the source file's content digest plus those
+    parameters. A timeline render then only concatenates cached segments, so
+    editing one clip re-encodes just that clip. Concurrent requests for the
+    same segment share one encode (a requester that is cancelled does not
+    fail the others), and the directory is size-bounded (LRU).
+    The Editor's assembled video and audio tracks are cached here the same
+    way, keyed by a digest of everything they were built from.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.store = AssetCache(root=root, max_bytes=max_bytes)
+        self._flights = SingleFlight()
+        self.stats = {"hits": 0, "misses": 0, "joined": 0, "errors": 0}
+
+    @staticmethod
+    def params_key(params: dict) -> str:
+        return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+    def path_for(self, digest: str, params: dict) -> str:
+        return os.path.join(self.root, f"{digest[:32]}_{self.params_key(params)}.mp4")
+
+    async def get_or_create(self, digest: str, params: dict, render: Callable[[str], Awaitable[None]]) -> str:
+        """
+        Return the cached segment path, calling `render(part_path)` to produce it on a miss.
+        `render` must write an mp4 to part_path (no extension is implied) or raise.
+        """
+        path = self.path_for(digest, params)
+        if os.path.exists(path):
+            self.stats["hits"] += 1
+            self.store.record_hit(path)
+            return path
+
+        async def create() -> str:
+            part_path = f"{path}.{uuid.uuid4().hex[:8]}.part"
+            try:
+                await render(part_path)
+                os.replace(part_path, path)
+                self.store.add(path)
+                return path
+            except BaseException:
+                self.stats["errors"] += 1
+                try:
+                    os.remove(part_path)
+                except OSError:
+                    pass
+                raise
+
+        self.stats["joined" if path in self._flights else "misses"] += 1
+        return await self._flights.run(path, create)
+
+    def get_stats(self) -> dict:
+        return {**self.stats, **{f"disk_{k}": v for k, v in self.store.get_stats().items() if k in ("files", "bytes", "max_bytes", "evictions")}}
+
+
+_backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+segment_cache = SegmentCache(
+    root=os.path.join(_backend_dir, "data", "cache", "editor_segments"),
+    max_bytes=int(os.getenv("EDITOR_SEGMENT_CACHE_MAX_BYTES", str(4 * 1024 ** 3))),
+)
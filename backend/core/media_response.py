@@ -0,0 +1,202 @@
+import os
+import re
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Iterator, Optional, Tuple, Union
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+CHUNK_SIZE = 256 * 1024
+
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+# Filenames minted by StorageService.save_asset and the Editor are unique and never rewritten
+_CONTENT_ADDRESSED_NAME = re.compile(r'^(edit_)?\d{8}_\d{6}_[0-9a-f]{4,8}\.[A-Za-z0-9]+$')
+
+_UNSATISFIABLE = "unsatisfiable"
+
+
+def is_content_addressed(filename: str) -> bool:
+    return bool(_CONTENT_ADDRESSED_NAME.match(filename))
+
+
+class ContentDigests:
+    """
+    MD5 digests of local media files, used as their ETag.
+
+    The validator depends only on the bytes, so an asset keeps the same ETag on
+    every instance, after a rehydration and after an eviction and re-fetch
+    (mtimes differ in all of those). Digests are remembered per path, size and
+    mtime, and GCS downloads seed them with the object's md5Hash, so a file is
+    hashed at most once per instance and usually never.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._digests: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
+
+    def _remember(self, path: str, stat_result: os.stat_result, digest: str):
+        with self._lock:
+            self._digests[path] = (stat_result.st_size, stat_result.st_mtime_ns, digest)
+            self._digests.move_to_end(path)
+            while len(self._digests) > self.max_entries:
+                self._digests.popitem(last=False)
+
+    def seed(self, path: str, gcs_md5_hash: Optional[str]):
+        """Record the digest of a file just written from a GCS object (base64 `md5_hash`)."""
+        if not gcs_md5_hash:
+            return
+        try:
+            self._remember(os.path.realpath(path), os.stat(path), base64.b64decode(gcs_md5_hash).hex())
+        except (OSError, ValueError):
+            pass
+
+    def get(self, path: str, stat_result: Optional[os.stat_result] = None) -> str:
+        """Hex MD5 of the file at `path`, hashing it only if it changed since last time."""
+        path = os.path.realpath(path)
+        stat_result = stat_result or os.stat(path)
+        with self._lock:
+            entry = self._digests.get(path)
+            if entry and entry[:2] == (stat_result.st_size, stat_result.st_mtime_ns):
+                self._digests.move_to_end(path)
+                return entry[2]
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                md5.update(chunk)
+        digest = md5.hexdigest()
+        self._remember(path, stat_result, digest)
+        return digest
+
+
+content_digests = ContentDigests()
+
+
+def strong_etag(digest: str) -> str:
+    return f'"{digest}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison, as required for If-None-Match."""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _parse_http_date(value: str) -> Optional[int]:
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _if_range_allows(header: str, etag: str, mtime: int) -> bool:
+    header = header.strip()
+    if header.startswith('"') or header.startswith("W/"):
+        # If-Range requires a strong match; weak validators never match
+        return header == etag
+    ts = _parse_http_date(header)
+    return ts is not None and ts == mtime
+
+
+def _parse_range(header: str, size: int) -> Union[None, str, Tuple[int, int]]:
+    """
+    Returns (start, end) inclusive for a single satisfiable byte range,
+    _UNSATISFIABLE for a range outside the file, or None to serve the full body
+    (unsupported unit, malformed spec or multiple ranges).
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    match = re.fullmatch(r"\s*(\d*)-(\d*)\s*", spec)
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+
+    first, last = match.group(1), match.group(2)
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            return _UNSATISFIABLE
+        return max(0, size - suffix), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        return _UNSATISFIABLE
+    return start, min(end, size - 1)
+
+
+def _iter_file_range(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def build_media_response(request: Request, file_path: str, media_type: Optional[str], immutable: bool = False) -> Response:
+    """
+    Serve a local media file with validators, caching headers, conditional
+    requests (304) and single byte-range requests (206). The ETag is a content
+    digest and may hash the file, so call this off the event loop.
+    """
+    stat_result = os.stat(file_path)
+    size = stat_result.st_size
+    mtime = int(stat_result.st_mtime)
+    etag = strong_etag(content_digests.get(file_path, stat_result))
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        ims = _parse_http_date(if_modified_since) if if_modified_since else None
+        if ims is not None and mtime <= ims:
+            return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or _if_range_allows(if_range, etag, mtime)):
+        byte_range = _parse_range(range_header, size)
+        if byte_range == _UNSATISFIABLE:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            length = end - start + 1
+            return StreamingResponse(
+                _iter_file_range(file_path, start, length),
+                status_code=206,
+                media_type=media_type,
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{size}",
+                    "Content-Length": str(length),
+                },
+            )
+
+    return FileResponse(file_path, media_type=media_type, headers=headers, stat_result=stat_result)
@@ -0,0 +1,61 @@
+import json
+import base64
+from typing import List, Optional, Tuple
+from sqlalchemy import String, and_, or_, type_coerce
+from sqlalchemy.orm import Query
+
+from models import Asset
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# SQLite stores DateTime columns as text, and rows written by the server default
+# ("YYYY-MM-DD HH:MM:SS") and by Python ("... .ffffff") differ in precision.
+# Comparing the stored text directly keeps the cursor exact for both and still
+# lets SQLite use the (…, created_at, id) indexes.
+_created_at_raw = type_coerce(Asset.created_at, String)
+
+
+def encode_cursor(created_at_raw: str, asset_id: int) -> str:
+    payload = json.dumps({"t": created_at_raw, "i": asset_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return str(payload["t"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def paginate_assets(query: Query, limit: int, cursor: Optional[str] = None) -> Tuple[List[Asset], Optional[str]]:
+    """
+    Keyset pagination over assets, newest first with `id` as the tie-breaker.
+
+    Returns one page and the cursor for the next page (None on the last page).
+    Because the order is total, pages stay consistent while new assets are
+    saved or recovered from GCS in between requests.
+    """
+    if cursor:
+        created_at_raw, asset_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            _created_at_raw < created_at_raw,
+            and_(_created_at_raw == created_at_raw, Asset.id < asset_id),
+        ))
+
+    rows = (
+        query.add_columns(_created_at_raw)
+        .order_by(Asset.created_at.desc(), Asset.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    page = [asset for asset, _ in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last_asset, last_created_at = rows[limit - 1]
+        next_cursor = encode_cursor(last_created_at, last_asset.id)
+    return page, next_cursor
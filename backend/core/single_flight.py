@@ -0,0 +1,44 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Shares one run of an async job between concurrent callers with the same key.
+
+    The job runs in its own task that no caller owns, and every caller awaits it
+    through a shield. A caller that is cancelled only stops waiting; the others
+    still get the result (or the job's own exception). The job is cancelled only
+    once every caller waiting on it has gone.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, Dict[str, Any]] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def _forget(self, key: str, entry: Dict[str, Any]):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    async def run(self, key: str, job: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the in-flight job for `key`, starting `job()` if there is none."""
+        entry = self._inflight.get(key)
+        if entry is None:
+            entry = {"task": asyncio.ensure_future(job()), "waiters": 0}
+            self._inflight[key] = entry
+            entry["task"].add_done_callback(lambda _, key=key, entry=entry: self._forget(key, entry))
+
+        task = entry["task"]
+        entry["waiters"] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            entry["waiters"] -= 1
+            if entry["waiters"] == 0 and not task.done():
+                # Every caller was cancelled; nobody needs the result any more
+                task.cancel()
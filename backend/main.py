@@ -1,13 +1,15 @@
 import logging
 from services.log_service import UnifiedLoggingHandler
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from routers import speech, generative, history, logs, teams
 import os
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse, Response
+import asyncio
 import re
 import mimetypes
+from core.media_response import build_media_response, is_content_addressed, strong_etag
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +29,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(speech.router, prefix="/api/synthesize", tags=["speech"])
@@ -38,10 +41,63 @@ app.include_router(teams.router, prefix="/api/teams", tags=["teams"])
 from canvas_module import router as canvas_router
 app.include_router(canvas_router.router, prefix="/api/workflow", tags=["workflow"])
 
+from services.gcs_client import gcs_client
+from services.gcs_uploader import gcs_uploader
+from services.gcs_fetcher import gcs_fetcher
+from services.asset_cache import asset_cache
+from services.vertex_service import vertex_service
+from services.asset_rehydrator import asset_rehydrator
+from services.asset_search import asset_search
+from services.audio_transcoder import audio_transcoder
+from services.tts_chunking import tts_chunker
+from services.synthesis_cache import synthesis_cache
+from services.waveform_peaks import waveform_peaks
+from services.storage_service import storage_service
+from canvas_module.executors.media_probe import media_probe
+from canvas_module.executors.segment_cache import segment_cache
+from canvas_module.executors.render_cache import render_cache
+from canvas_module.executors.ffmpeg_pool import ffmpeg_pool
+
+@app.on_event("startup")
+def start_background_services():
+    # Replays any GCS uploads left in the journal by a previous instance
+    gcs_uploader.start()
+    # Index the local asset cache after the journal is replayed so pending uploads are pinned
+    asset_cache.scan()
+    # Rebuild the Asset table from GCS manifests without blocking startup
+    asset_rehydrator.start()
+    # Index assets that predate the prompt search table
+    asset_search.start_backfill()
+
+@app.on_event("shutdown")
+def stop_background_services():
+    # Cloud Run allows ~10s after SIGTERM; anything unfinished stays journaled
+    gcs_uploader.drain(timeout=float(os.getenv("GCS_UPLOAD_DRAIN_TIMEOUT", "8")))
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/api/metrics")
+def get_metrics():
+    return {
+        "gcs": gcs_client.get_metrics(),
+        "uploader": gcs_uploader.get_stats(),
+        "fetcher": gcs_fetcher.get_stats(),
+        "asset_cache": asset_cache.get_stats(),
+        "signed_urls": vertex_service.signed_url_cache.get_stats(),
+        "rehydration": asset_rehydrator.get_status(),
+        "search": asset_search.get_stats(),
+        "media_probe": media_probe.get_stats(),
+        "editor_segments": segment_cache.get_stats(),
+        "editor_renders": render_cache.get_stats(),
+        "ffmpeg": ffmpeg_pool.get_stats(),
+        "tts_transcoder": audio_transcoder.get_stats(),
+        "tts_chunks": tts_chunker.get_stats(),
+        "synthesis_cache": synthesis_cache.get_stats(),
+        "waveform_peaks": waveform_peaks.get_stats(),
+    }
+
 from config import model_config
 @app.get("/api/config")
 def get_config():
@@ -72,7 +128,7 @@ if os.path.exists(frontend_dist):
     app.mount("/assets", StaticFiles(directory=os.path.join(frontend_dist, "assets")), name="assets")
 
 @app.get("/api/media/{user_id}/{asset_type}/{filename}")
-async def serve_media(user_id: str, asset_type: str, filename: str):
+async def serve_media(request: Request, user_id: str, asset_type: str, filename: str):
     safe_user = re.sub(r'[^a-zA-Z0-9_\-.]', '_', user_id)
     safe_type = re.sub(r'[^a-zA-Z0-9_\-.]', '_', asset_type)
     safe_file = re.sub(r'[^a-zA-Z0-9_\-.]', '_', filename)
@@ -84,27 +140,65 @@ async def serve_media(user_id: str, asset_type: str, filename: str):
     if not file_path.startswith(assets_dir_real + os.sep):
         return JSONResponse(status_code=404, content={"detail": "Not Found"})
 
-    if not os.path.isfile(file_path):
-        # Try to fetch from GCS (Cloud Run instances have ephemeral disk)
+    mime_type, _ = mimetypes.guess_type(file_path)
+
+    if os.path.isfile(file_path):
+        asset_cache.record_hit(file_path)
+    else:
+        asset_cache.record_miss()
+        # Try to fetch from GCS (Cloud Run instances have ephemeral disk).
+        # The download runs off the event loop and is shared by concurrent viewers;
+        # this response streams from the partial file while it is being written.
         try:
-            from google.cloud import storage as gcs_storage
             from config import model_config as _mc
             bucket_name = os.getenv("ASSETS_BUCKET", _mc.VEO_BUCKET)
             blob_path = f"user_assets/{safe_user}/{safe_type}/{safe_file}"
-            client = gcs_storage.Client()
-            bucket = client.bucket(bucket_name)
-            blob = bucket.blob(blob_path)
-            if blob.exists():
-                os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                blob.download_to_filename(file_path)
-            else:
+            fetch = gcs_fetcher.fetch(bucket_name, blob_path, file_path, on_complete=asset_cache.add_from_gcs)
+            await asyncio.to_thread(fetch.ready.wait)
+            if not fetch.found or fetch.error is not None:
+                return JSONResponse(status_code=404, content={"detail": "Not Found"})
+            if not fetch.done.is_set():
+                # Open before sending headers, so a download that has already failed is a 404 here
+                reader = await asyncio.to_thread(gcs_fetcher.open_reader, fetch)
+                if reader is None:
+                    return JSONResponse(status_code=404, content={"detail": "Not Found"})
+                headers = {"Content-Length": str(fetch.size), "Cache-Control": "private, no-cache"}
+                if fetch.md5:
+                    # Same validator the finished file gets (see core/media_response.py)
+                    headers["ETag"] = strong_etag(fetch.md5)
+                return StreamingResponse(
+                    gcs_fetcher.stream(fetch, reader),
+                    media_type=mime_type,
+                    headers=headers,
+                )
+            if not fetch.succeeded:
                 return JSONResponse(status_code=404, content={"detail": "Not Found"})
         except Exception as e:
             logger.warning(f"GCS media fallback failed: {e}")
             return JSONResponse(status_code=404, content={"detail": "Not Found"})
 
-    mime_type, _ = mimetypes.guess_type(file_path)
-    return FileResponse(file_path, media_type=mime_type)
+    # The content ETag may need to hash the file
+    return await asyncio.to_thread(build_media_response, request, file_path, mime_type,
+                                   immutable=is_content_addressed(safe_file))
+
+@app.get("/api/peaks/{user_id}/{asset_type}/{filename}")
+async def serve_peaks(user_id: str, asset_type: str, filename: str):
+    """Waveform peaks sidecar for an audio asset (see services/waveform_peaks.py for the format)."""
+    safe_user = re.sub(r'[^a-zA-Z0-9_\-.]', '_', user_id)
+    safe_type = re.sub(r'[^a-zA-Z0-9_\-.]', '_', asset_type)
+    safe_file = re.sub(r'[^a-zA-Z0-9_\-.]', '_', filename)
+    if safe_type != "audio" or safe_user in (".", "..") or safe_file in (".", ".."):
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+
+    storage_path = os.path.join(safe_user, safe_type, safe_file)
+
+    # Older assets have no sidecar yet; it is built once from the audio (re-fetched from GCS if needed)
+    peaks = await asyncio.to_thread(waveform_peaks.get, storage_path, lambda: storage_service.ensure_local(storage_path))
+    if peaks is None:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    # Assets are never rewritten, so neither are their peaks
+    return Response(content=peaks, media_type="application/octet-stream",
+                    headers={"Cache-Control": "private, max-age=31536000, immutable"})
 
 @app.get("/{full_path:path}")
 async def serve_frontend(full_path: str):
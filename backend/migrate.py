@@ -16,6 +16,7 @@ def migrate():
         ("workflows", "team_id", "TEXT"),
         ("workflows", "creator_name", "TEXT"),
         ("workflows", "creator_email", "TEXT"),
+        ("assets", "cache_key", "TEXT"),
     ]
 
     for table, column, col_type in columns_to_add:
@@ -25,6 +26,16 @@ def migrate():
         except sqlite3.OperationalError:
             pass
 
+    indexes_to_add = [
+        ("ix_assets_user_type_created", "assets", "user_id, asset_type, created_at, id"),
+        ("ix_assets_user_created", "assets", "user_id, created_at, id"),
+        ("ix_assets_user_cache_key", "assets", "user_id, cache_key"),
+    ]
+
+    for name, table, columns in indexes_to_add:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        print(f"Ensured index {name}")
+
     conn.commit()
     conn.close()
     print("Migration complete")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey, Index
 from sqlalchemy.sql import func
 from database import Base
 
@@ -15,6 +15,14 @@ class Asset(Base):
     model_id = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     meta_data = Column(JSON, default={}) # Extra params (seed, aspect ratio, etc)
+    cache_key = Column(String, nullable=True) # Digest of the synthesis parameters (TTS / seeded music), see services/synthesis_cache.py
+
+    # Cover the history queries (newest first, optionally per type) so keyset pages are index range scans
+    __table_args__ = (
+        Index("ix_assets_user_type_created", "user_id", "asset_type", "created_at", "id"),
+        Index("ix_assets_user_created", "user_id", "created_at", "id"),
+        Index("ix_assets_user_cache_key", "user_id", "cache_key"),
+    )
 
 class Workflow(Base):
     __tablename__ = "workflows"
@@ -4,6 +4,7 @@ from services.gemini_service import gemini_service
 from services.veo_service import veo_service
 from services.storage_service import storage_service
 from services.vertex_service import vertex_service
+from services.synthesis_cache import synthesis_cache
 from google import genai
 from google.genai import types
 from services.log_service import log_service
@@ -329,18 +330,29 @@ async def upscale_image(
 async def generate_music(
     prompt: str = Form(...),
     negative_prompt: str = Form(""),
-    seed: int = Form(12345),
+    seed: Optional[int] = Form(None),
+    model_id: Optional[str] = Form(None),
     user_id: str = Form("default_user")
 ):
-    try:
-        prediction = await vertex_service.generate_music(prompt, negative_prompt, seed)
+    model_id = model_id or model_config.DEFAULT_MUSIC_MODEL
+    if model_id not in model_config.MUSIC_MODELS:
+        raise HTTPException(status_code=400, detail=f"Unknown music model '{model_id}'")
+    # Only a seed the model honours makes the result reproducible; otherwise every request is a new take
+    synthesis_key = None
+    if seed is not None and vertex_service.music_model_uses_seed(model_id):
+        synthesis_key = synthesis_cache.music_key(
+            prompt=prompt, model=model_id, seed=seed, negative_prompt=negative_prompt
+        )
+
+    async def generate():
+        prediction = await vertex_service.generate_music(prompt, negative_prompt, seed, model_id=model_id)
         audio_content = prediction.get("audioContent") or prediction.get("bytesBase64Encoded")
-        
+
         if not audio_content:
             raise Exception(f"No audio content found in prediction: {prediction.keys()}")
-            
+
         mime_type = prediction.get("mimeType", "audio/wav")
-        
+
         # Save the generated music as an asset
         asset = await asyncio.to_thread(
             storage_service.save_asset,
@@ -349,15 +361,24 @@ async def generate_music(
             asset_type="audio",
             mime_type=mime_type,
             prompt=prompt,
-            model_id=model_config.DEFAULT_MUSIC_MODEL,
-            meta_data={"negative_prompt": negative_prompt, "seed": seed}
+            model_id=model_id,
+            meta_data={"negative_prompt": negative_prompt, "seed": seed},
+            cache_key=synthesis_key
         )
-        
+        return asset, base64.b64decode(audio_content)
+
+    try:
+        if synthesis_key:
+            # The same prompt and seed returns the track generated last time
+            asset, audio_content = await synthesis_cache.get_or_create(user_id, synthesis_key, generate)
+        else:
+            asset, audio_content = await generate()
+
         return {
             "status": "success",
             "audio": {
-                "mime_type": mime_type,
-                "data": audio_content,
+                "mime_type": asset.mime_type,
+                "data": base64.b64encode(audio_content).decode("utf-8"),
                 "storage_path": asset.storage_path
             }
         }
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Query, Depends
+from fastapi import APIRouter, Query, Depends, HTTPException, Response
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
@@ -6,6 +6,9 @@ from sqlalchemy.orm import Session
 from database import get_db
 from models import Asset
 from auth import get_current_user, get_current_user_optional, CurrentUser
+from core.pagination import paginate_assets, InvalidCursor
+from services.asset_rehydrator import asset_rehydrator
+from services.asset_search import asset_search
 
 router = APIRouter()
 
@@ -26,15 +29,18 @@ class AssetResponse(BaseModel):
         from_attributes = True
 
 
-def _enrich_assets(assets):
-    """Add signed URLs for GCS-stored assets."""
+async def _enrich_assets(assets):
+    """Add signed URLs for GCS-stored assets, signed as one concurrent batch off the event loop."""
     from services.vertex_service import vertex_service
 
+    signed = await vertex_service.aget_signed_urls(
+        [a.storage_path for a in assets if a.storage_path.startswith("gs://")]
+    )
     results = []
     for asset in assets:
         asset_dict = {c.name: getattr(asset, c.name) for c in asset.__table__.columns}
         if asset.storage_path.startswith("gs://"):
-            asset_dict["signed_url"] = vertex_service.get_signed_url(asset.storage_path)
+            asset_dict["signed_url"] = signed.get(asset.storage_path)
         results.append(asset_dict)
     return results
 
@@ -42,9 +48,11 @@ def _enrich_assets(assets):
 @router.get("", response_model=List[AssetResponse])
 @router.get("/", response_model=List[AssetResponse])
 async def get_history(
+    response: Response,
     asset_type: Optional[str] = Query(None, description="Filter by asset type: image, video, audio"),
     limit: int = Query(50, ge=1, le=200, description="Number of results to return"),
-    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    offset: int = Query(0, ge=0, description="Number of results to skip (ignored when a cursor is given)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
     current_user: CurrentUser = Depends(get_current_user_optional),
     db: Session = Depends(get_db),
 ):
@@ -54,36 +62,40 @@ async def get_history(
     query = db.query(Asset).filter(Asset.user_id.in_(user_ids))
     if asset_type:
         query = query.filter(Asset.asset_type == asset_type)
-    db_assets = query.order_by(Asset.created_at.desc()).offset(offset).limit(min(limit, 200)).all()
-    enriched = _enrich_assets(db_assets)
-
-    # Merge with GCS-backed assets (for Cloud Run durability across instance restarts)
+    if offset and not cursor:
+        query = query.offset(offset)
     try:
-        from services.storage_service import storage_service
-        existing_paths = {a.get("storage_path") for a in enriched}
+        db_assets, next_cursor = paginate_assets(query, min(limit, 200), cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    # Assets recovered from GCS are loaded into SQLite by the startup rehydrator;
+    # until it finishes we answer from whatever has been loaded so far.
+    if not asset_rehydrator.is_complete:
         for uid in user_ids:
-            for gcs_asset in storage_service.list_assets_from_gcs(uid):
-                if gcs_asset.get("storage_path") in existing_paths:
-                    continue
-                if asset_type and gcs_asset.get("asset_type") != asset_type:
-                    continue
-                # Map to AssetResponse-shaped dict
-                enriched.append({
-                    "id": gcs_asset.get("id", 0),
-                    "user_id": gcs_asset.get("user_id", uid),
-                    "asset_type": gcs_asset.get("asset_type", ""),
-                    "storage_path": gcs_asset.get("storage_path", ""),
-                    "filename": gcs_asset.get("filename", ""),
-                    "mime_type": gcs_asset.get("mime_type"),
-                    "prompt": gcs_asset.get("prompt"),
-                    "model_id": gcs_asset.get("model_id"),
-                    "created_at": gcs_asset.get("created_at"),
-                    "meta_data": gcs_asset.get("meta_data") or {},
-                    "signed_url": None,
-                })
-                existing_paths.add(gcs_asset.get("storage_path"))
-    except Exception:
-        pass
+            asset_rehydrator.prioritize(uid)
+
+    return await _enrich_assets(db_assets)
+
+
+@router.get("/search", response_model=List[AssetResponse])
+async def search_history(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in prompts, lyrics, voice names"),
+    asset_type: Optional[str] = Query(None, description="Filter by asset type: image, video, audio"),
+    limit: int = Query(50, ge=1, le=200, description="Number of results to return"),
+    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    current_user: CurrentUser = Depends(get_current_user_optional),
+    db: Session = Depends(get_db),
+):
+    """Ranked full-text search over the user's assets (best match first)."""
+    user_ids = [current_user.uid]
+    if current_user.uid != "default":
+        user_ids.append("default")
+    db_assets = asset_search.search(db, user_ids, q, asset_type=asset_type, limit=limit, offset=offset)
+    return await _enrich_assets(db_assets)
+
 
-    enriched.sort(key=lambda a: str(a.get("created_at") or ""), reverse=True)
-    return enriched[:limit]
+@router.get("/rehydration")
+async def get_rehydration_status():
+    return asset_rehydrator.get_status()
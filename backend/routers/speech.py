@@ -5,6 +5,9 @@ from typing import List, Optional, Dict, Any
 import base64
 from services.vertex_service import vertex_service
 from services.storage_service import storage_service
+from services.audio_transcoder import audio_transcoder
+from services.tts_chunking import tts_chunker
+from services.synthesis_cache import synthesis_cache
 from config import model_config
 import asyncio
 
@@ -46,32 +49,37 @@ async def synthesize_single(req: SingleSpeakerRequest):
         }
     }
     
-    try:
-        b64_audio = await vertex_service.synthesize_raw(payload)
-        
+    synthesis_key = synthesis_cache.tts_key(
+        text=req.text, voice=req.voice_name, model=req.model_id, language=req.language_code,
+        system_instruction=req.prompt, output=audio_transcoder.output_format()
+    )
+
+    async def synthesize():
+        # Long text is split at sentence boundaries and synthesized concurrently
+        b64_audio = await tts_chunker.synthesize(payload)
+        # LINEAR16 comes back as a WAV; store and return the compressed clip
+        audio_content, mime_type = await audio_transcoder.transcode(base64.b64decode(b64_audio))
+
         # Save asset
         asset = await asyncio.to_thread(
             storage_service.save_asset,
             user_id=req.user_id,
-            content=b64_audio,
+            content=audio_content,
             asset_type="audio",
-            mime_type="audio/wav", # LINEAR16 usually wrapped in wav or just raw pcm? Vertex usually allows WAV request. 
-            # Wait, Vertex 'audioEncoding': 'LINEAR16' returns raw PCM or WAV? 
-            # Usually it returns WAV if you ask for it, or just raw. 
-            # Let's assume it's playable as is or we wrap it. 
-            # Actually, `WaveformPlayer` handles it.
-            # "audioContent" from Vertex is usually valid audio file content (WAV) if configured?
-            # Actually LINEAR16 is raw PCM. MP3 is MP3.
-            # Let's check what we receive. 
-            # If it works in frontend, it's likely WAV or MP3.
-            # Default to audio/wav for now.
+            mime_type=mime_type,
             prompt=req.text[:100],
             model_id=req.model_id,
-            meta_data={"voice_name": req.voice_name}
+            meta_data={"voice_name": req.voice_name},
+            cache_key=synthesis_key
         )
-        
+        return asset, audio_content
+
+    try:
+        asset, audio_content = await synthesis_cache.get_or_create(req.user_id, synthesis_key, synthesize)
+
         return {
-            "audioContent": b64_audio,
+            "audioContent": base64.b64encode(audio_content).decode("utf-8"),
+            "mime_type": asset.mime_type,
             "storage_path": asset.storage_path
         }
     except Exception as e:
@@ -107,23 +115,52 @@ async def synthesize_multi(req: MultiSpeakerRequest):
         }
     }
 
-    try:
-        b64_audio = await vertex_service.synthesize_raw(payload)
-        
+    synthesis_key = synthesis_cache.tts_key(
+        text=payload["input"]["multiSpeakerMarkup"]["turns"], voice=req.speaker_map, model=req.model_id,
+        language=payload["voice"]["languageCode"], system_instruction=req.prompt, output=audio_transcoder.output_format()
+    )
+
+    turns = [(t.speaker, t.text) for t in req.turns]
+
+    def turn_payload(speaker: str, text: str) -> Dict[str, Any]:
+        return {
+            "input": {"text": text, "prompt": req.prompt},
+            "voice": {
+                "languageCode": payload["voice"]["languageCode"],
+                "name": req.speaker_map.get(speaker, model_config.DEFAULT_TTS_VOICE),
+                "model_name": req.model_id
+            },
+            "audioConfig": payload["audioConfig"]
+        }
+
+    async def synthesize():
+        if tts_chunker.use_dialogue_mode(turns):
+            # Long dialogues: each speaker's turns as concurrent single-speaker requests, joined in order
+            b64_audio = await tts_chunker.synthesize_dialogue(turns, turn_payload)
+        else:
+            b64_audio = await vertex_service.synthesize_raw(payload)
+        audio_content, mime_type = await audio_transcoder.transcode(base64.b64decode(b64_audio))
+
         # Save asset
         asset = await asyncio.to_thread(
             storage_service.save_asset,
             user_id=req.user_id,
-            content=b64_audio,
+            content=audio_content,
             asset_type="audio",
-            mime_type="audio/wav",
+            mime_type=mime_type,
             prompt=req.prompt or "Multi-speaker conversation",
             model_id=req.model_id,
-            meta_data={"speaker_map": req.speaker_map}
+            meta_data={"speaker_map": req.speaker_map},
+            cache_key=synthesis_key
         )
+        return asset, audio_content
+
+    try:
+        asset, audio_content = await synthesis_cache.get_or_create(req.user_id, synthesis_key, synthesize)
 
         return {
-            "audioContent": b64_audio,
+            "audioContent": base64.b64encode(audio_content).decode("utf-8"),
+            "mime_type": asset.mime_type,
             "storage_path": asset.storage_path
         }
     except Exception as e:
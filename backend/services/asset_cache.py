@@ -0,0 +1,242 @@
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Set
+
+from services.gcs_client import gcs_client
+from services.gcs_uploader import gcs_uploader
+
+logger = logging.getLogger(__name__)
+
+
+class AssetCache:
+    """
+    Size-bounded LRU manager for the local assets directory.
+
+    Files are evicted least-recently-accessed first once the directory exceeds
+    its byte budget, but only files confirmed to have a GCS copy: ones the
+    uploader finished, ones downloaded from GCS, or ones `is_persisted` finds
+    in the bucket (e.g. files found by scan() after a restart). Anything
+    unconfirmed, such as a file whose upload could not be queued, stays pinned;
+    a negative check is repeated at most every `recheck_seconds`. Very recently
+    written files also get a grace period so an in-progress render or
+    registration is never pulled out from under its writer. Eviction runs on a
+    background thread since confirming a file may need a GCS request.
+    """
+
+    SKIP_SUFFIXES = (".part", ".tmp")
+
+    def __init__(self, root: str, max_bytes: int, is_persisted: Callable[[str], bool] = None,
+                 min_age_seconds: float = 300.0, recheck_seconds: float = 600.0):
+        self.root = os.path.realpath(root)
+        self.max_bytes = max_bytes
+        self.is_persisted = is_persisted or (lambda path: False)
+        self.min_age_seconds = min_age_seconds
+        self.recheck_seconds = recheck_seconds
+
+        self._lock = threading.Lock()
+        # One eviction pass at a time
+        self._evict_lock = threading.Lock()
+        # realpath -> size, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._scanned = False
+        # Files known to have a GCS copy, and when unconfirmed ones were last checked
+        self._persisted: Set[str] = set()
+        self._unconfirmed: Dict[str, float] = {}
+        self._evicting = False
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "evicted_bytes": 0, "pinned": 0}
+
+    def scan(self):
+        """Index the existing files on disk, ordered by last access time."""
+        found = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(self.SKIP_SUFFIXES):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found.append((max(st.st_atime, st.st_mtime), path, st.st_size))
+        found.sort()
+        with self._lock:
+            self._entries = OrderedDict((path, size) for _, path, size in found)
+            self._total = sum(size for _, _, size in found)
+            self._scanned = True
+        logger.info(f"Asset cache indexed {len(found)} files ({self._total} bytes, budget {self.max_bytes})")
+        self._schedule_eviction()
+
+    def _ensure_scanned(self):
+        if not self._scanned:
+            self.scan()
+
+    def _key(self, path: str) -> Optional[str]:
+        real = os.path.realpath(path)
+        return real if real.startswith(self.root + os.sep) else None
+
+    def record_hit(self, path: str):
+        """Mark a local file as just used (cache hit)."""
+        key = self._key(path)
+        if not key:
+            return
+        self._ensure_scanned()
+        try:
+            st = os.stat(key)
+            # Bump atime explicitly (many mounts are noatime); mtime is left alone for ETags
+            os.utime(key, (time.time(), st.st_mtime))
+        except OSError:
+            return
+        with self._lock:
+            self.stats["hits"] += 1
+            if key not in self._entries:
+                self._entries[key] = st.st_size
+                self._total += st.st_size
+            self._entries.move_to_end(key)
+
+    def record_miss(self):
+        with self._lock:
+            self.stats["misses"] += 1
+
+    def add(self, path: str, persisted: bool = False):
+        """
+        Register a newly written file and evict older ones if over budget.
+        `persisted` marks a file that already has a GCS copy.
+        """
+        key = self._key(path)
+        if not key:
+            return
+        self._ensure_scanned()
+        try:
+            size = os.path.getsize(key)
+        except OSError:
+            return
+        with self._lock:
+            self._total -= self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._total += size
+            if persisted:
+                self._persisted.add(key)
+        self._schedule_eviction()
+
+    def add_from_gcs(self, path: str):
+        """on_complete hook for files downloaded from GCS, which can always be fetched again."""
+        self.add(path, persisted=True)
+
+    def mark_persisted(self, path: str):
+        """Record that a local file's upload to GCS has finished, making it evictable."""
+        key = self._key(path)
+        if key:
+            with self._lock:
+                self._persisted.add(key)
+                self._unconfirmed.pop(key, None)
+
+    def _confirmed(self, path: str) -> bool:
+        with self._lock:
+            if path in self._persisted:
+                return True
+            checked = self._unconfirmed.get(path)
+        if checked is not None and time.time() - checked < self.recheck_seconds:
+            return False
+        try:
+            persisted = self.is_persisted(path)
+        except Exception as e:
+            logger.warning(f"Asset cache could not confirm GCS copy of {path}: {e}")
+            persisted = False
+        with self._lock:
+            if persisted:
+                self._persisted.add(path)
+                self._unconfirmed.pop(path, None)
+            else:
+                self._unconfirmed[path] = time.time()
+        return persisted
+
+    def _schedule_eviction(self):
+        with self._lock:
+            if self._evicting or self._total <= self.max_bytes:
+                return
+            self._evicting = True
+
+        def run():
+            try:
+                self.evict_if_needed()
+            finally:
+                with self._lock:
+                    self._evicting = False
+
+        threading.Thread(target=run, name="asset-cache-evict", daemon=True).start()
+
+    def evict_if_needed(self):
+        with self._evict_lock:
+            self._evict()
+
+    def _evict(self):
+        with self._lock:
+            if self._total <= self.max_bytes:
+                return
+            candidates = list(self._entries.items())
+
+        now = time.time()
+        pinned = 0
+        for path, size in candidates:
+            with self._lock:
+                if self._total <= self.max_bytes:
+                    break
+            try:
+                if now - os.path.getmtime(path) < self.min_age_seconds:
+                    continue
+                if not self._confirmed(path):
+                    # No confirmed GCS copy; deleting it could lose the asset
+                    pinned += 1
+                    continue
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Asset cache failed to evict {path}: {e}")
+                continue
+            with self._lock:
+                self._persisted.discard(path)
+                if self._entries.pop(path, None) is not None:
+                    self._total -= size
+                    self.stats["evictions"] += 1
+                    self.stats["evicted_bytes"] += size
+            logger.info(f"Evicted cached asset {path} ({size} bytes)")
+        with self._lock:
+            self.stats["pinned"] = pinned
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else None,
+                "files": len(self._entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_assets_root = os.path.join(_base_dir, "data", "assets")
+
+
+def _has_gcs_copy(path: str) -> bool:
+    """True if the object StorageService persists a local asset to exists and no upload of it is pending."""
+    if gcs_uploader.is_pending(path):
+        return False
+    from config import model_config
+    bucket_name = os.getenv("ASSETS_BUCKET", model_config.VEO_BUCKET)
+    relative = os.path.relpath(path, os.path.realpath(_assets_root)).replace(os.sep, "/")
+    return gcs_client.exists(bucket_name, f"user_assets/{relative}")
+
+
+asset_cache = AssetCache(
+    root=_assets_root,
+    max_bytes=int(os.getenv("ASSET_CACHE_MAX_BYTES", str(2 * 1024 ** 3))),
+    is_persisted=_has_gcs_copy,
+)
+gcs_uploader.on_uploaded = asset_cache.mark_persisted
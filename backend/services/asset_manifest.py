@@ -0,0 +1,142 @@
+import os
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from google.api_core.exceptions import NotFound
+from services.gcs_client import gcs_client
+from services.gcs_uploader import gcs_uploader
+
+logger = logging.getLogger(__name__)
+
+
+class AssetManifest:
+    """
+    Per-user JSONL index of asset metadata in GCS.
+
+    Each saved asset appends one line to `user_asset_manifests/{user}.jsonl`
+    (via the write-behind uploader), so loading a user's assets is a single
+    read instead of one read per metadata sidecar. Lines are deduplicated by
+    storage_path on read, which makes replayed appends harmless. A missing
+    manifest is built from the sidecars by the first append to it (see
+    create_missing) or when the startup rehydrator loads it, whichever is first.
+    """
+
+    MANIFEST_PREFIX = "user_asset_manifests"
+    SIDECAR_PREFIX = "user_asset_metadata"
+
+    def __init__(self, rebuild_workers: int = 16):
+        self.rebuild_workers = rebuild_workers
+
+    def _bucket_name(self) -> str:
+        from config import model_config
+        return os.getenv("ASSETS_BUCKET", model_config.VEO_BUCKET)
+
+    def manifest_path(self, user_id: str) -> str:
+        return f"{self.MANIFEST_PREFIX}/{user_id}.jsonl"
+
+    def sidecar_prefix(self, user_id: str) -> str:
+        return f"{self.SIDECAR_PREFIX}/{user_id}/"
+
+    @staticmethod
+    def to_line(meta: dict) -> str:
+        return json.dumps(meta, separators=(",", ":")) + "\n"
+
+    @staticmethod
+    def parse(text: str) -> List[dict]:
+        """Parse manifest JSONL, keeping the last entry per storage_path."""
+        by_path = {}
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            by_path[entry.get("storage_path") or entry.get("id")] = entry
+        return list(by_path.values())
+
+    def load(self, user_id: str) -> Optional[List[dict]]:
+        """Return the user's manifest entries, or None if the manifest does not exist yet."""
+        try:
+            text = gcs_client.download_text(self._bucket_name(), self.manifest_path(user_id))
+        except NotFound:
+            return None
+        return self.parse(text)
+
+    def list_users(self) -> List[str]:
+        """All user ids that have a manifest or metadata sidecars in the bucket."""
+        bucket_name = self._bucket_name()
+        users = {
+            os.path.splitext(os.path.basename(b.name))[0]
+            for b in gcs_client.list_blobs(bucket_name, f"{self.MANIFEST_PREFIX}/")
+            if b.name.endswith(".jsonl")
+        }
+        for prefix in gcs_client.list_prefixes(bucket_name, f"{self.SIDECAR_PREFIX}/"):
+            users.add(prefix.rstrip("/").split("/")[-1])
+        return sorted(users)
+
+    def load_or_rebuild(self, user_id: str) -> List[dict]:
+        """Like load(), but rebuilds a missing manifest synchronously first."""
+        entries = self.load(user_id)
+        if entries is not None:
+            return entries
+        try:
+            self._rebuild(user_id)
+        except Exception as e:
+            logger.warning(f"Asset manifest rebuild for {user_id} failed: {e}")
+        return self.load(user_id) or []
+
+    def create_missing(self, bucket_name: str, blob_path: str, data: str):
+        """
+        Uploader hook for an append to a manifest that does not exist yet (e.g. a
+        new user's first asset). Builds it from the sidecars, which include the
+        new asset's (uploaded earlier in the same job), then appends `data` in
+        case the listing missed it. Raises on failure so the job is retried.
+        """
+        prefix = f"{self.MANIFEST_PREFIX}/"
+        if not (blob_path.startswith(prefix) and blob_path.endswith(".jsonl")):
+            raise ValueError(f"Not an asset manifest: {blob_path}")
+        self._rebuild(blob_path[len(prefix):-len(".jsonl")], bucket_name)
+        gcs_client.append_string(bucket_name, blob_path, data, content_type="application/x-ndjson")
+
+    def _fetch_sidecars(self, bucket_name: str, blob_names: List[str]) -> List[dict]:
+        def fetch(name):
+            try:
+                meta = json.loads(gcs_client.download_text(bucket_name, name))
+                meta.setdefault("id", int(os.path.splitext(os.path.basename(name))[0]))
+                return meta
+            except Exception:
+                return None
+
+        if not blob_names:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.rebuild_workers, len(blob_names))) as pool:
+            return [m for m in pool.map(fetch, blob_names) if m]
+
+    def _list_sidecars(self, bucket_name: str, user_id: str) -> List[str]:
+        return [
+            b.name for b in gcs_client.list_blobs(bucket_name, self.sidecar_prefix(user_id))
+            if b.name.endswith(".json")
+        ]
+
+    def _rebuild(self, user_id: str, bucket_name: Optional[str] = None):
+        bucket_name = bucket_name or self._bucket_name()
+        manifest_path = self.manifest_path(user_id)
+        names = self._list_sidecars(bucket_name, user_id)
+        entries = self._fetch_sidecars(bucket_name, names)
+        entries.sort(key=lambda a: a.get("created_at") or "")
+        data = "".join(self.to_line(e) for e in entries)
+        gcs_client.append_string(bucket_name, manifest_path, data, content_type="application/x-ndjson")
+        # Pick up sidecars written while we were listing (their appends may have found no manifest)
+        late = sorted(set(self._list_sidecars(bucket_name, user_id)) - set(names))
+        if late:
+            late_data = "".join(self.to_line(e) for e in self._fetch_sidecars(bucket_name, late))
+            gcs_client.append_string(bucket_name, manifest_path, late_data, content_type="application/x-ndjson")
+        logger.info(f"Rebuilt asset manifest for {user_id} from {len(names) + len(late)} sidecars")
+
+
+asset_manifest = AssetManifest(rebuild_workers=int(os.getenv("MANIFEST_REBUILD_WORKERS", "16")))
+gcs_uploader.on_append_missing = asset_manifest.create_missing
@@ -0,0 +1,170 @@
+import os
+import time
+import threading
+import logging
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+
+from database import SessionLocal
+from models import Asset
+from services.asset_manifest import asset_manifest
+from services.asset_search import asset_search
+
+logger = logging.getLogger(__name__)
+
+
+class AssetRehydrator:
+    """
+    Rebuilds the local Asset table from the GCS manifests on startup.
+
+    A fresh Cloud Run instance starts with an empty history.db. Instead of every
+    history request scanning GCS, this runs once in the background with bounded
+    concurrency; requests served before it finishes see whatever has been loaded
+    so far. Users who hit the history endpoint are moved to the front of the queue.
+    """
+
+    def __init__(self, concurrency: int = 4):
+        self.concurrency = max(1, concurrency)
+        self._lock = threading.Lock()
+        self._queue: "deque[str]" = deque()
+        self._done_users = set()
+        self._started = False
+        self.state = {
+            "status": "idle",
+            "users_total": 0,
+            "users_done": 0,
+            "assets_inserted": 0,
+            "errors": 0,
+            "started_at": None,
+            "finished_at": None,
+        }
+
+    @property
+    def is_complete(self) -> bool:
+        return self.state["status"] == "completed"
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self.state["status"] = "running"
+            self.state["started_at"] = time.time()
+        threading.Thread(target=self._run, name="asset-rehydrator", daemon=True).start()
+
+    def prioritize(self, user_id: str):
+        """Move a user to the front of the queue if they have not been loaded yet."""
+        with self._lock:
+            if user_id in self._done_users or user_id not in self._queue:
+                return
+            self._queue.remove(user_id)
+            self._queue.appendleft(user_id)
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return dict(self.state)
+
+    def _run(self):
+        try:
+            users = asset_manifest.list_users()
+        except Exception as e:
+            logger.warning(f"Asset rehydration could not list users: {e}")
+            with self._lock:
+                self.state["status"] = "failed"
+                self.state["finished_at"] = time.time()
+            return
+
+        with self._lock:
+            # Priority requests may have arrived while listing
+            self._queue.extend(u for u in users if u not in self._queue)
+            self.state["users_total"] = len(self._queue)
+
+        workers = [
+            threading.Thread(target=self._worker, name=f"asset-rehydrator-{i}", daemon=True)
+            for i in range(min(self.concurrency, max(1, len(users))))
+        ]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        with self._lock:
+            self.state["status"] = "completed"
+            self.state["finished_at"] = time.time()
+        logger.info(
+            f"Asset rehydration completed: {self.state['assets_inserted']} assets for "
+            f"{self.state['users_done']} users in {self.state['finished_at'] - self.state['started_at']:.1f}s"
+        )
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                if not self._queue:
+                    return
+                user_id = self._queue.popleft()
+            try:
+                inserted = self._rehydrate_user(user_id)
+                with self._lock:
+                    self.state["assets_inserted"] += inserted
+            except Exception as e:
+                logger.warning(f"Asset rehydration failed for {user_id}: {e}")
+                with self._lock:
+                    self.state["errors"] += 1
+            finally:
+                with self._lock:
+                    self._done_users.add(user_id)
+                    self.state["users_done"] += 1
+
+    @staticmethod
+    def _parse_created_at(value: Optional[str]) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+
+    def _rehydrate_user(self, user_id: str) -> int:
+        entries: List[dict] = asset_manifest.load_or_rebuild(user_id)
+        if not entries:
+            return 0
+
+        db = SessionLocal()
+        try:
+            existing = {
+                row[0] for row in db.query(Asset.storage_path).filter(Asset.user_id == user_id).all()
+            }
+            new_assets = []
+            for entry in entries:
+                storage_path = entry.get("storage_path")
+                if not storage_path or storage_path in existing:
+                    continue
+                existing.add(storage_path)
+                asset = Asset(
+                    user_id=user_id,
+                    asset_type=entry.get("asset_type") or "",
+                    storage_path=storage_path,
+                    filename=entry.get("filename") or os.path.basename(storage_path),
+                    mime_type=entry.get("mime_type"),
+                    prompt=entry.get("prompt"),
+                    model_id=entry.get("model_id"),
+                    meta_data=entry.get("meta_data") or {},
+                )
+                created_at = self._parse_created_at(entry.get("created_at"))
+                if created_at:
+                    asset.created_at = created_at
+                new_assets.append(asset)
+            if new_assets:
+                db.add_all(new_assets)
+                db.commit()
+                asset_search.index_assets(new_assets)
+            return len(new_assets)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+asset_rehydrator = AssetRehydrator(concurrency=int(os.getenv("REHYDRATION_CONCURRENCY", "4")))
@@ -0,0 +1,195 @@
+import re
+import hashlib
+import threading
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from database import SessionLocal, engine
+from models import Asset
+
+logger = logging.getLogger(__name__)
+
+
+class AssetSearch:
+    """
+    Full-text prompt search over assets, backed by an SQLite FTS5 table.
+
+    `assets_fts` mirrors each asset's prompt plus its searchable meta_data
+    fields, keyed by the asset id (the FTS rowid). Every row also carries a
+    `scope` column of opaque per-user and per-type tokens. Tenant and type
+    filters are therefore part of the MATCH expression and are resolved by
+    the inverted index, not by filtering every hit for every tenant.
+    """
+
+    TABLE = "assets_fts"
+    SEARCHABLE_META_FIELDS = ("lyrics", "voice_name", "negative_prompt", "speaker_map")
+    BACKFILL_BATCH = 1000
+    # bm25 column weights: scope, prompt, meta
+    RANK = "bm25(assets_fts, 0.0, 10.0, 4.0)"
+
+    def __init__(self):
+        self.available = False
+        self._lock = threading.Lock()
+        self.state = {"indexed": 0, "backfilled": 0, "backfill_running": False}
+
+    def ensure_schema(self):
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.TABLE} USING fts5("
+                    "scope, prompt, meta, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                ))
+            self.available = True
+        except OperationalError as e:
+            logger.warning(f"SQLite FTS5 unavailable, prompt search falls back to LIKE: {e}")
+            self.available = False
+
+    @staticmethod
+    def user_token(user_id: str) -> str:
+        return "u" + hashlib.sha1(user_id.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def type_token(asset_type: str) -> str:
+        return "t" + re.sub(r"[^a-z0-9]", "", (asset_type or "").lower())
+
+    def _meta_text(self, asset: Asset) -> str:
+        meta = asset.meta_data or {}
+        parts = []
+        for field in self.SEARCHABLE_META_FIELDS:
+            value = meta.get(field)
+            if isinstance(value, dict):
+                parts.extend(str(v) for v in value.values() if v)
+            elif value:
+                parts.append(str(value))
+        if asset.model_id:
+            parts.append(asset.model_id)
+        return " ".join(parts)
+
+    def _row(self, asset: Asset) -> dict:
+        return {
+            "id": asset.id,
+            "scope": f"{self.user_token(asset.user_id)} {self.type_token(asset.asset_type)}",
+            "prompt": asset.prompt or "",
+            "meta": self._meta_text(asset),
+        }
+
+    def _write(self, rows: List[dict]) -> int:
+        if not rows:
+            return 0
+        with engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {self.TABLE} WHERE rowid = :id"), [{"id": r["id"]} for r in rows])
+            conn.execute(
+                text(f"INSERT INTO {self.TABLE}(rowid, scope, prompt, meta) VALUES (:id, :scope, :prompt, :meta)"),
+                rows,
+            )
+        return len(rows)
+
+    def index_assets(self, assets: Iterable[Asset]):
+        """Add or refresh assets in the search index. Failures are logged, never raised."""
+        if not self.available:
+            return
+        try:
+            # Build rows before opening the write transaction so lazy attribute loads don't contend with it
+            count = self._write([self._row(a) for a in assets if a.id is not None])
+            with self._lock:
+                self.state["indexed"] += count
+        except Exception as e:
+            logger.warning(f"Asset search indexing failed (non-fatal): {e}")
+
+    def index_asset(self, asset: Asset):
+        self.index_assets([asset])
+
+    def start_backfill(self):
+        """Index assets created before the FTS table existed, in a background thread."""
+        self.ensure_schema()
+        if not self.available:
+            return
+        with self._lock:
+            if self.state["backfill_running"]:
+                return
+            self.state["backfill_running"] = True
+        threading.Thread(target=self._backfill, name="asset-search-backfill", daemon=True).start()
+
+    def _backfill(self):
+        last_id = 0
+        try:
+            while True:
+                db = SessionLocal()
+                try:
+                    assets = (
+                        db.query(Asset)
+                        .filter(Asset.id > last_id)
+                        .filter(text(f"NOT EXISTS (SELECT 1 FROM {self.TABLE} f WHERE f.rowid = assets.id)"))
+                        .order_by(Asset.id)
+                        .limit(self.BACKFILL_BATCH)
+                        .all()
+                    )
+                    rows = [self._row(a) for a in assets]
+                finally:
+                    db.close()
+                if not rows:
+                    break
+                last_id = rows[-1]["id"]
+                count = self._write(rows)
+                with self._lock:
+                    self.state["backfilled"] += count
+            if self.state["backfilled"]:
+                logger.info(f"Asset search backfilled {self.state['backfilled']} assets")
+        except Exception as e:
+            logger.warning(f"Asset search backfill failed: {e}")
+        finally:
+            with self._lock:
+                self.state["backfill_running"] = False
+
+    @staticmethod
+    def _terms(query: str) -> List[str]:
+        return [t for t in re.findall(r"\w+", query.lower()) if t][:16]
+
+    def _match_expression(self, terms: List[str], user_ids: List[str], asset_type: Optional[str]) -> str:
+        # Each term is quoted (so FTS syntax in user input is inert) and prefix-matched
+        text_part = " ".join(f'"{t}"*' for t in terms)
+        users = " OR ".join(self.user_token(u) for u in user_ids)
+        expr = f"scope:({users}) AND {{prompt meta}}:({text_part})"
+        if asset_type:
+            expr += f" AND scope:{self.type_token(asset_type)}"
+        return expr
+
+    def search(self, db, user_ids: List[str], query: str, asset_type: Optional[str] = None,
+               limit: int = 50, offset: int = 0) -> List[Asset]:
+        """Assets of the given users matching every term of `query`, best match first."""
+        terms = self._terms(query)
+        if not terms or not user_ids:
+            return []
+        if not self.available:
+            return self._search_like(db, user_ids, terms, asset_type, limit, offset)
+
+        rows: List[Tuple[int]] = db.execute(
+            text(
+                f"SELECT rowid FROM {self.TABLE} WHERE {self.TABLE} MATCH :expr "
+                f"ORDER BY {self.RANK} LIMIT :limit OFFSET :offset"
+            ),
+            {"expr": self._match_expression(terms, user_ids, asset_type), "limit": limit, "offset": offset},
+        ).fetchall()
+        ids = [r[0] for r in rows]
+        if not ids:
+            return []
+        by_id = {a.id: a for a in db.query(Asset).filter(Asset.id.in_(ids)).all()}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def _search_like(self, db, user_ids, terms, asset_type, limit, offset) -> List[Asset]:
+        query = db.query(Asset).filter(Asset.user_id.in_(user_ids))
+        if asset_type:
+            query = query.filter(Asset.asset_type == asset_type)
+        for term in terms:
+            query = query.filter(Asset.prompt.ilike(f"%{term}%"))
+        return query.order_by(Asset.created_at.desc()).offset(offset).limit(limit).all()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.state, "available": self.available}
+
+
+asset_search = AssetSearch()
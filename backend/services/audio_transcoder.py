@@ -0,0 +1,101 @@
+import os
+import asyncio
+import logging
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AudioTranscoder:
+    """
+    Compresses synthesized speech before it is stored, returned and uploaded.
+
+    TTS is requested as LINEAR16 (a WAV), roughly 10x the size of the same clip
+    as MP3 or Opus. Each clip is piped through ffmpeg (stdin to stdout, no temp
+    files) with at most `max_workers` encodes running at once. The output codec
+    is `TTS_OUTPUT_CODEC`; "wav" disables transcoding. A failed encode falls
+    back to the original WAV rather than failing the synthesis.
+    """
+
+    WAV_MIME = "audio/wav"
+    CODECS = {
+        "mp3": {"args": ["-c:a", "libmp3lame"], "format": "mp3", "mime_type": "audio/mpeg", "bitrate": "128k"},
+        "opus": {"args": ["-c:a", "libopus", "-application", "voip"], "format": "ogg", "mime_type": "audio/ogg", "bitrate": "48k"},
+    }
+
+    def __init__(self, codec: str, max_workers: int, bitrate: Optional[str] = None):
+        codec = (codec or "wav").lower()
+        if codec != "wav" and codec not in self.CODECS:
+            logger.warning(f"Unknown TTS_OUTPUT_CODEC '{codec}', keeping WAV output")
+            codec = "wav"
+        self.codec = codec
+        self.bitrate = bitrate or self.CODECS.get(codec, {}).get("bitrate")
+        self.max_workers = max(1, max_workers)
+        self._semaphore = asyncio.Semaphore(self.max_workers)
+        self.stats = {"transcoded": 0, "kept_lossless": 0, "failed": 0, "bytes_in": 0, "bytes_out": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.codec != "wav"
+
+    @property
+    def mime_type(self) -> str:
+        """Mime type of the clips this transcoder produces."""
+        return self.CODECS[self.codec]["mime_type"] if self.enabled else self.WAV_MIME
+
+    def output_format(self, keep_lossless: bool = False) -> str:
+        """What transcode() stores for these arguments, e.g. "mp3@128k" (part of synthesis cache keys)."""
+        return "wav" if keep_lossless or not self.enabled else f"{self.codec}@{self.bitrate}"
+
+    async def _run(self, wav_bytes: bytes) -> bytes:
+        spec = self.CODECS[self.codec]
+        cmd = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+            *spec["args"], "-b:a", self.bitrate, "-f", spec["format"], "pipe:1",
+        ]
+        async with self._semaphore:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                stdout, stderr = await proc.communicate(wav_bytes)
+            except asyncio.CancelledError:
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+                raise
+        if proc.returncode != 0 or not stdout:
+            raise RuntimeError(stderr.decode(errors="replace").strip() or f"ffmpeg exited with {proc.returncode}")
+        return stdout
+
+    async def transcode(self, wav_bytes: bytes, keep_lossless: bool = False) -> Tuple[bytes, str]:
+        """
+        Return (audio_bytes, mime_type) for a synthesized WAV clip. With `keep_lossless`
+        (e.g. the clip feeds an Editor render) or transcoding disabled, the WAV is returned as is.
+        """
+        if keep_lossless or not self.enabled:
+            self.stats["kept_lossless"] += 1
+            return wav_bytes, self.WAV_MIME
+        try:
+            encoded = await self._run(wav_bytes)
+        except (OSError, RuntimeError) as e:
+            self.stats["failed"] += 1
+            logger.warning(f"TTS transcode to {self.codec} failed, storing WAV: {e}")
+            return wav_bytes, self.WAV_MIME
+        self.stats["transcoded"] += 1
+        self.stats["bytes_in"] += len(wav_bytes)
+        self.stats["bytes_out"] += len(encoded)
+        return encoded, self.mime_type
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "codec": self.codec, "bitrate": self.bitrate, "max_workers": self.max_workers}
+
+
+audio_transcoder = AudioTranscoder(
+    codec=os.getenv("TTS_OUTPUT_CODEC", "mp3"),
+    max_workers=int(os.getenv("TTS_TRANSCODE_WORKERS", str(os.cpu_count() or 2))),
+    bitrate=os.getenv("TTS_OUTPUT_BITRATE") or None,
+)
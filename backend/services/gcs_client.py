@@ -0,0 +1,265 @@
+import os
+import uuid
+import threading
+import logging
+from typing import List, Optional, Tuple
+
+import requests
+import google.auth
+from google.auth.credentials import AnonymousCredentials
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import storage
+from google.cloud.storage import transfer_manager
+from google.cloud.storage.retry import DEFAULT_RETRY
+from google.api_core.exceptions import NotFound, PreconditionFailed
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class GCSClient:
+    """
+    Shared, lazily built Google Cloud Storage client.
+
+    Credential discovery and the HTTP connection pool are paid once per process
+    instead of once per call site. All GCS access in the backend should go
+    through this facade so request and byte counters stay accurate.
+    """
+
+    SCOPES = ["https://www.googleapis.com/auth/devstorage.full_control"]
+
+    # Resumable chunk sizes must be multiples of 256 KiB
+    RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024
+    PARALLEL_CHUNK_SIZE = 32 * 1024 * 1024
+
+    def __init__(self, pool_size: int = 32, resumable_threshold: int = 8 * 1024 * 1024,
+                 parallel_threshold: int = 128 * 1024 * 1024, parallel_workers: int = 8):
+        self.pool_size = pool_size
+        self.resumable_threshold = resumable_threshold
+        self.parallel_threshold = parallel_threshold
+        self.parallel_workers = parallel_workers
+        # Local stand-in (e.g. fake-gcs-server); the client library reads this env var itself
+        self.emulator_host = os.getenv("STORAGE_EMULATOR_HOST")
+        # XML multipart uploads are not supported by most emulators
+        self.parallel_enabled = os.getenv("GCS_PARALLEL_UPLOADS", "0" if self.emulator_host else "1") == "1"
+        self._client: Optional[storage.Client] = None
+        self._lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "http_requests": 0,
+            "http_errors": 0,
+            "bytes_sent": 0,
+            "bytes_received": 0,
+            "uploads": 0,
+            "downloads": 0,
+            "bytes_uploaded": 0,
+            "bytes_downloaded": 0,
+        }
+
+    @property
+    def client(self) -> storage.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._build_client()
+        return self._client
+
+    def _build_client(self) -> storage.Client:
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+        )
+        if self.emulator_host:
+            creds, project = AnonymousCredentials(), settings.PROJECT_ID or "local-emulator"
+            session = requests.Session()
+        else:
+            creds, project = google.auth.default(scopes=self.SCOPES)
+            session = AuthorizedSession(creds)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.hooks["response"].append(self._on_response)
+        logger.info(f"Initialized shared GCS client (pool_size={self.pool_size}, emulator={self.emulator_host or 'no'})")
+        return storage.Client(project=settings.PROJECT_ID or project, credentials=creds, _http=session)
+
+    def _on_response(self, response, *args, **kwargs):
+        sent = response.request.headers.get("Content-Length") if response.request is not None else None
+        received = response.headers.get("Content-Length")
+        with self._metrics_lock:
+            self._metrics["http_requests"] += 1
+            if response.status_code >= 400:
+                self._metrics["http_errors"] += 1
+            if sent and sent.isdigit():
+                self._metrics["bytes_sent"] += int(sent)
+            if received and received.isdigit():
+                self._metrics["bytes_received"] += int(received)
+
+    def _count(self, key: str, nbytes: int = 0):
+        with self._metrics_lock:
+            self._metrics[f"{key}s"] += 1
+            self._metrics[f"bytes_{key}ed"] += nbytes
+
+    def get_metrics(self) -> dict:
+        with self._metrics_lock:
+            return dict(self._metrics)
+
+    # ------------------------------------------------------------------
+    # Object helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def parse_uri(gcs_uri: str) -> Tuple[str, str]:
+        """Split gs://bucket/path/to/blob into (bucket, path/to/blob)."""
+        parts = gcs_uri.replace("gs://", "", 1).split("/", 1)
+        return parts[0], parts[1] if len(parts) > 1 else ""
+
+    def bucket(self, bucket_name: str) -> storage.Bucket:
+        return self.client.bucket(bucket_name)
+
+    def blob(self, bucket_name: str, blob_name: str) -> storage.Blob:
+        return self.bucket(bucket_name).blob(blob_name)
+
+    def exists(self, bucket_name: str, blob_name: str) -> bool:
+        return self.blob(bucket_name, blob_name).exists()
+
+    def get_blob(self, bucket_name: str, blob_name: str) -> Optional[storage.Blob]:
+        """Fetch blob metadata (size, generation, ...); None if it does not exist."""
+        return self.bucket(bucket_name).get_blob(blob_name)
+
+    def list_blobs(self, bucket_name: str, prefix: str) -> List[storage.Blob]:
+        return list(self.client.list_blobs(bucket_name, prefix=prefix))
+
+    def list_prefixes(self, bucket_name: str, prefix: str, delimiter: str = "/") -> List[str]:
+        """List the immediate "sub-directories" under a prefix."""
+        iterator = self.client.list_blobs(bucket_name, prefix=prefix, delimiter=delimiter)
+        for _ in iterator.pages:
+            pass
+        return sorted(iterator.prefixes)
+
+    def upload_file(self, bucket_name: str, blob_name: str, local_path: str, content_type: str = None):
+        """
+        Upload a file from disk without reading it into memory.
+
+        Small files go up in a single request. Large files use a resumable
+        session in fixed-size chunks, so a transient failure retries the
+        current chunk instead of restarting from zero. Very large files are
+        split into parallel XML multipart chunks and composed server-side,
+        falling back to the resumable path if that fails.
+        """
+        size = os.path.getsize(local_path)
+        blob = self.blob(bucket_name, blob_name)
+
+        if size >= self.parallel_threshold and self.parallel_enabled:
+            try:
+                transfer_manager.upload_chunks_concurrently(
+                    local_path,
+                    blob,
+                    content_type=content_type,
+                    chunk_size=self.PARALLEL_CHUNK_SIZE,
+                    max_workers=self.parallel_workers,
+                    worker_type=transfer_manager.THREAD,
+                )
+                self._count("upload", size)
+                return
+            except Exception as e:
+                logger.warning(f"Parallel upload of {local_path} failed, falling back to resumable: {e}")
+                blob = self.blob(bucket_name, blob_name)
+
+        if size >= self.resumable_threshold:
+            blob.chunk_size = self.RESUMABLE_CHUNK_SIZE
+        blob.upload_from_filename(local_path, content_type=content_type, retry=DEFAULT_RETRY)
+        self._count("upload", size)
+
+    def upload_string(self, bucket_name: str, blob_name: str, data, content_type: str = None,
+                      if_generation_match: Optional[int] = None):
+        blob = self.blob(bucket_name, blob_name)
+        if len(data) >= self.resumable_threshold:
+            blob.chunk_size = self.RESUMABLE_CHUNK_SIZE
+        blob.upload_from_string(data, content_type=content_type, retry=DEFAULT_RETRY,
+                                if_generation_match=if_generation_match)
+        self._count("upload", len(data))
+
+    # GCS composite objects may have at most 1024 components
+    MAX_COMPONENTS = 1024
+
+    def append_string(self, bucket_name: str, blob_name: str, data: str, content_type: str = None,
+                      create: bool = True, max_attempts: int = 8) -> bool:
+        """
+        Append `data` to an object using compose with generation preconditions,
+        so concurrent appenders never overwrite each other. Once the object nears
+        the compose component limit it is rewritten as a single object.
+        Returns False if the object is missing and `create` is False.
+        """
+        bucket = self.bucket(bucket_name)
+        for _ in range(max_attempts):
+            existing = bucket.get_blob(blob_name)
+            if existing is None:
+                if not create:
+                    return False
+                try:
+                    self.upload_string(bucket_name, blob_name, data, content_type=content_type, if_generation_match=0)
+                    return True
+                except PreconditionFailed:
+                    continue
+
+            if (existing.component_count or 1) >= self.MAX_COMPONENTS - 1:
+                self._flatten(existing)
+                continue
+
+            part = bucket.blob(f"{blob_name}.append-{uuid.uuid4().hex}")
+            part.upload_from_string(data, content_type=content_type)
+            self._count("upload", len(data))
+            try:
+                target = bucket.blob(blob_name)
+                target.content_type = content_type or existing.content_type
+                target.compose([existing, part], if_generation_match=existing.generation)
+                return True
+            except PreconditionFailed:
+                continue
+            finally:
+                try:
+                    part.delete()
+                except NotFound:
+                    pass
+        raise RuntimeError(f"Append to gs://{bucket_name}/{blob_name} lost the race {max_attempts} times")
+
+    def _flatten(self, blob: storage.Blob):
+        """Rewrite a composite object as a single object (resets its component count)."""
+        try:
+            data = blob.download_as_bytes(if_generation_match=blob.generation)
+            self._count("download", len(data))
+            self.upload_string(blob.bucket.name, blob.name, data, content_type=blob.content_type,
+                               if_generation_match=blob.generation)
+        except PreconditionFailed:
+            pass
+
+    def download_to_filename(self, bucket_name: str, blob_name: str, local_path: str):
+        self.blob(bucket_name, blob_name).download_to_filename(local_path)
+        self._count("download", os.path.getsize(local_path))
+
+    def download_to_file(self, blob: storage.Blob, file_obj):
+        """Stream a blob into an open file object as chunks arrive."""
+        start = file_obj.tell()
+        blob.download_to_file(file_obj)
+        self._count("download", file_obj.tell() - start)
+
+    def download_text(self, bucket_name: str, blob_name: str) -> str:
+        text = self.blob(bucket_name, blob_name).download_as_text()
+        self._count("download", len(text))
+        return text
+
+    def generate_signed_url(self, bucket_name: str, blob_name: str, expiration, credentials=None) -> str:
+        return self.blob(bucket_name, blob_name).generate_signed_url(
+            version="v4",
+            expiration=expiration,
+            method="GET",
+            credentials=credentials,
+        )
+
+
+gcs_client = GCSClient(
+    pool_size=int(os.getenv("GCS_HTTP_POOL_SIZE", "32")),
+    resumable_threshold=int(os.getenv("GCS_RESUMABLE_THRESHOLD", str(8 * 1024 * 1024))),
+    parallel_threshold=int(os.getenv("GCS_PARALLEL_THRESHOLD", str(128 * 1024 * 1024))),
+    parallel_workers=int(os.getenv("GCS_PARALLEL_WORKERS", "8")),
+)
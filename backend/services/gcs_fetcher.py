@@ -0,0 +1,162 @@
+import os
+import uuid
+import base64
+import asyncio
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, BinaryIO, Callable, Dict, Optional
+
+from core.media_response import content_digests
+from services.gcs_client import gcs_client
+
+logger = logging.getLogger(__name__)
+
+
+class BlobFetch:
+    """State of one in-flight download of a GCS blob to a local path."""
+
+    def __init__(self, bucket_name: str, blob_name: str, dest_path: str, on_complete: Callable[[str], None] = None):
+        self.bucket_name = bucket_name
+        self.blob_name = blob_name
+        self.dest_path = dest_path
+        self.on_complete = on_complete
+        self.part_path = f"{dest_path}.{uuid.uuid4().hex[:8]}.part"
+        self.found: Optional[bool] = None
+        self.size: Optional[int] = None
+        # Hex MD5 of the object, when GCS has one (composed objects don't)
+        self.md5: Optional[str] = None
+        self.error: Optional[Exception] = None
+        # Set once existence is known and, if found, the .part file has been created
+        self.ready = threading.Event()
+        # Set once the download has finished, successfully or not
+        self.done = threading.Event()
+
+    @property
+    def succeeded(self) -> bool:
+        return self.done.is_set() and self.found is True and self.error is None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the download finishes. Returns True if the file is now on disk."""
+        self.done.wait(timeout)
+        return self.succeeded
+
+
+class GCSFetcher:
+    """
+    Single-flight downloader for GCS-backed media.
+
+    Concurrent requests for the same blob share one download. Downloads run on a
+    worker thread and write to a `.part` file that is renamed into place when
+    complete, so readers can stream the file while it is still being written.
+    A failed download removes its .part file; readers that opened it first keep
+    their handle (see open_reader), later ones see the failure before responding.
+    """
+
+    CHUNK_SIZE = 256 * 1024
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, max_workers: int = 8):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gcs-fetch")
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, BlobFetch] = {}
+        self.stats = {"fetches": 0, "joined": 0, "not_found": 0, "errors": 0}
+
+    def fetch(self, bucket_name: str, blob_name: str, dest_path: str, on_complete: Callable[[str], None] = None) -> BlobFetch:
+        """
+        Start (or join) a download of gs://bucket/blob to dest_path.
+        `on_complete(dest_path)` is called once the file has been moved into place.
+        """
+        key = f"{bucket_name}/{blob_name}"
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing:
+                self.stats["joined"] += 1
+                return existing
+            fetch = BlobFetch(bucket_name, blob_name, dest_path, on_complete)
+            self._inflight[key] = fetch
+            self.stats["fetches"] += 1
+        self._executor.submit(self._run, key, fetch)
+        return fetch
+
+    def _run(self, key: str, fetch: BlobFetch):
+        try:
+            blob = gcs_client.get_blob(fetch.bucket_name, fetch.blob_name)
+            if blob is None:
+                fetch.found = False
+                self.stats["not_found"] += 1
+                return
+            fetch.found = True
+            fetch.size = blob.size
+            if blob.md5_hash:
+                fetch.md5 = base64.b64decode(blob.md5_hash).hex()
+            os.makedirs(os.path.dirname(fetch.dest_path), exist_ok=True)
+            # Unbuffered so readers tailing the .part file see bytes as soon as they land
+            with open(fetch.part_path, "wb", buffering=0) as out:
+                fetch.ready.set()
+                gcs_client.download_to_file(blob, out)
+            os.replace(fetch.part_path, fetch.dest_path)
+            content_digests.seed(fetch.dest_path, blob.md5_hash)
+        except Exception as e:
+            fetch.error = e
+            self.stats["errors"] += 1
+            logger.warning(f"GCS fetch of gs://{key} failed: {e}")
+            try:
+                os.remove(fetch.part_path)
+            except OSError:
+                pass
+        finally:
+            fetch.ready.set()
+            fetch.done.set()
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        if fetch.succeeded and fetch.on_complete:
+            try:
+                fetch.on_complete(fetch.dest_path)
+            except Exception as e:
+                logger.warning(f"on_complete hook for gs://{key} failed: {e}")
+
+    def open_reader(self, fetch: BlobFetch) -> Optional[BinaryIO]:
+        """
+        Open the file a response will stream from; call it before sending headers.
+        Returns None if the download has already failed. A handle that is open
+        keeps working even if a failed download removes the .part file.
+        """
+        for path in (fetch.part_path, fetch.dest_path):
+            try:
+                return open(path, "rb")
+            except FileNotFoundError:
+                # The .part is renamed on success and removed on failure
+                continue
+        return None
+
+    async def stream(self, fetch: BlobFetch, f: BinaryIO) -> AsyncIterator[bytes]:
+        """
+        Yield the blob's bytes from a handle returned by open_reader() while the
+        download is still writing them. If the download fails midway the headers
+        are already sent, so the body just ends short (and the failure is logged).
+        """
+        with f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, self.CHUNK_SIZE)
+                if chunk:
+                    yield chunk
+                    continue
+                if fetch.done.is_set():
+                    if fetch.error is not None:
+                        logger.warning(f"Ending stream of gs://{fetch.bucket_name}/{fetch.blob_name} early: {fetch.error}")
+                        return
+                    rest = await asyncio.to_thread(f.read)
+                    if rest:
+                        yield rest
+                        continue
+                    return
+                await asyncio.sleep(self.POLL_INTERVAL)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "inflight": len(self._inflight)}
+
+
+gcs_fetcher = GCSFetcher(max_workers=int(os.getenv("GCS_FETCH_WORKERS", "8")))
@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import uuid
+import queue
+import threading
+import logging
+from typing import Callable, Dict, List, Optional
+
+from services.gcs_client import gcs_client
+
+logger = logging.getLogger(__name__)
+
+
+class GCSUploader:
+    """
+    Write-behind uploader for GCS persistence.
+
+    Jobs are journaled to local disk before they are queued, so a restart
+    replays anything that had not finished uploading. A fixed pool of worker
+    threads drains the queue; failed jobs are retried with exponential backoff.
+    A job that exhausts its attempts moves to a dead-letter state (reported by
+    get_stats, its files stay pinned) and is re-attempted every
+    `dead_letter_retry` seconds until it succeeds. On shutdown, drain() waits
+    for queued and in-flight jobs up to a deadline; jobs sleeping in backoff
+    and anything unfinished stay in the journal for the next start.
+    """
+
+    def __init__(self, journal_dir: str, workers: int = 4, max_attempts: int = 5,
+                 base_backoff: float = 1.0, max_backoff: float = 60.0, dead_letter_retry: float = 600.0):
+        self.journal_dir = journal_dir
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.dead_letter_retry = dead_letter_retry
+
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        self._started = False
+        self._closed = False
+        # Called with the local path of every file whose upload finished (see AssetCache)
+        self.on_uploaded: Optional[Callable[[str], None]] = None
+        # Called with (bucket, blob_path, data) when an append finds no object to extend (see AssetManifest)
+        self.on_append_missing: Optional[Callable[[str, str, str], None]] = None
+
+        # job_id -> job, for everything that is queued, in flight or waiting on a retry timer
+        self._pending: Dict[str, dict] = {}
+        self._pending_paths: Dict[str, int] = {}
+        self._failed: Dict[str, dict] = {}
+        # ids of pending jobs that are sleeping on a retry timer rather than queued or in flight
+        self._backoff: set = set()
+
+        self.stats = {"enqueued": 0, "uploaded": 0, "retried": 0, "failed": 0, "dead_letter_retries": 0}
+
+        os.makedirs(self.journal_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start worker threads and replay any journaled jobs from a previous run."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"gcs-uploader-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+        replayed = 0
+        for name in sorted(os.listdir(self.journal_dir)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.journal_dir, name)) as f:
+                    job = json.load(f)
+                job["attempts"] = 0
+                # enqueue() may already be live and tracking this job; don't run it twice
+                if not self._track(job):
+                    continue
+                if not os.path.exists(self._journal_path(job["id"])):
+                    # It finished between the read and the _track above
+                    self._untrack(job)
+                    continue
+                self._queue.put(job)
+                replayed += 1
+            except Exception as e:
+                logger.warning(f"Skipping unreadable upload journal entry {name}: {e}")
+        if replayed:
+            logger.info(f"Replayed {replayed} pending GCS uploads from journal")
+
+    def enqueue(self, bucket_name: str, items: List[dict]) -> Optional[str]:
+        """
+        Queue a set of objects for upload. Each item is a dict with `blob_path`,
+        `content_type` and either `local_path` (file on disk) or `data` (string).
+        Items with `append: True` append `data` to an existing object instead.
+        Returns the job id once the job is durable in the journal.
+        """
+        items = [i for i in items if i.get("data") is not None or i.get("local_path")]
+        if not items:
+            return None
+
+        if not self._started:
+            self.start()
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "bucket": bucket_name,
+            "items": items,
+            "done": [],
+            "attempts": 0,
+            "created_at": time.time(),
+        }
+        # Track before journaling so a concurrent start() replay sees the job as already pending
+        self._track(job)
+        try:
+            self._write_journal(job)
+        except Exception:
+            self._untrack(job)
+            raise
+        with self._lock:
+            self.stats["enqueued"] += 1
+        self._queue.put(job)
+        return job["id"]
+
+    def is_pending(self, local_path: str) -> bool:
+        """True if a local file has not yet been uploaded (queued, in flight or failed)."""
+        with self._lock:
+            return self._pending_paths.get(os.path.realpath(local_path), 0) > 0
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def drain(self, timeout: float = 10.0) -> bool:
+        """
+        Block until queued and in-flight jobs have finished or `timeout` seconds elapse,
+        then stop re-queueing retries. Jobs sleeping in backoff are not waited for; they
+        and anything still unfinished remain in the journal and are replayed on next start.
+        """
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            try:
+                while len(self._pending) > len(self._backoff):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        logger.warning(f"GCS uploader drain timed out with {len(self._pending)} jobs pending")
+                        return False
+                    self._idle.wait(remaining)
+            finally:
+                self._closed = True
+            if self._backoff:
+                logger.info(f"Leaving {len(self._backoff)} GCS upload jobs in backoff to the journal")
+        return not self._pending
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "pending": len(self._pending), "dead_letter": len(self._failed)}
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _journal_path(self, job_id: str) -> str:
+        return os.path.join(self.journal_dir, f"{job_id}.json")
+
+    def _write_journal(self, job: dict):
+        path = self._journal_path(job["id"])
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(job, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _remove_journal(self, job_id: str):
+        try:
+            os.remove(self._journal_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def _track(self, job: dict) -> bool:
+        """Register a job as pending; False if a job with the same id already is."""
+        with self._lock:
+            if job["id"] in self._pending or job["id"] in self._failed:
+                return False
+            self._pending[job["id"]] = job
+            for item in job["items"]:
+                if item.get("local_path"):
+                    key = os.path.realpath(item["local_path"])
+                    self._pending_paths[key] = self._pending_paths.get(key, 0) + 1
+            return True
+
+    def _untrack(self, job: dict):
+        with self._idle:
+            self._pending.pop(job["id"], None)
+            self._backoff.discard(job["id"])
+            for item in job["items"]:
+                if item.get("local_path"):
+                    key = os.path.realpath(item["local_path"])
+                    count = self._pending_paths.get(key, 0) - 1
+                    if count > 0:
+                        self._pending_paths[key] = count
+                    else:
+                        self._pending_paths.pop(key, None)
+            self._idle.notify_all()
+
+    def _upload_item(self, bucket_name: str, item: dict):
+        if item.get("local_path"):
+            if not os.path.exists(item["local_path"]):
+                logger.warning(f"Skipping upload of missing file {item['local_path']}")
+                return
+            gcs_client.upload_file(bucket_name, item["blob_path"], item["local_path"], content_type=item.get("content_type"))
+            if self.on_uploaded:
+                self.on_uploaded(item["local_path"])
+        elif item.get("append"):
+            # Appends only extend an existing object; a missing one is created by its owner
+            if not gcs_client.append_string(bucket_name, item["blob_path"], item["data"],
+                                            content_type=item.get("content_type"), create=False):
+                if self.on_append_missing is None:
+                    logger.warning(f"Skipping append to missing gs://{bucket_name}/{item['blob_path']}")
+                    return
+                self.on_append_missing(bucket_name, item["blob_path"], item["data"])
+        else:
+            gcs_client.upload_string(bucket_name, item["blob_path"], item["data"], content_type=item.get("content_type"))
+
+    def _process(self, job: dict):
+        for idx, item in enumerate(job["items"]):
+            if idx in job["done"]:
+                continue
+            self._upload_item(job["bucket"], item)
+            job["done"].append(idx)
+            if idx < len(job["items"]) - 1:
+                # Record partial progress so a replay doesn't re-upload finished items
+                self._write_journal(job)
+
+    def _schedule(self, delay: float, fn, *args):
+        timer = threading.Timer(delay, fn, args=args)
+        timer.daemon = True
+        timer.start()
+
+    def _requeue(self, job: dict):
+        """Retry timer callback; after drain() the job is left to the journal instead."""
+        with self._idle:
+            self._backoff.discard(job["id"])
+            if self._closed:
+                return
+            self._idle.notify_all()
+        self._queue.put(job)
+
+    def _retry_dead_letter(self, job: dict):
+        """Give a dead-lettered job a fresh set of attempts (its files are still pinned)."""
+        with self._lock:
+            if self._closed or self._failed.pop(job["id"], None) is None:
+                return
+            job["attempts"] = 0
+            self._pending[job["id"]] = job
+            self.stats["dead_letter_retries"] += 1
+        logger.info(f"Re-attempting dead-lettered GCS upload job {job['id']}")
+        self._queue.put(job)
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            try:
+                self._process(job)
+                self._remove_journal(job["id"])
+                with self._lock:
+                    self.stats["uploaded"] += 1
+                    self._failed.pop(job["id"], None)
+                self._untrack(job)
+            except Exception as e:
+                job["attempts"] += 1
+                if job["attempts"] >= self.max_attempts:
+                    # Dead-letter: keep the journal entry and the pin on its files, and try again later.
+                    logger.error(
+                        f"GCS upload job {job['id']} failed after {job['attempts']} attempts, "
+                        f"re-attempting in {self.dead_letter_retry:.0f}s: {e}"
+                    )
+                    self._write_journal(job)
+                    with self._idle:
+                        self.stats["failed"] += 1
+                        self._failed[job["id"]] = job
+                        self._pending.pop(job["id"], None)
+                        self._idle.notify_all()
+                    self._schedule(self.dead_letter_retry, self._retry_dead_letter, job)
+                else:
+                    delay = min(self.base_backoff * (2 ** (job["attempts"] - 1)), self.max_backoff)
+                    logger.warning(f"GCS upload job {job['id']} failed (attempt {job['attempts']}), retrying in {delay:.1f}s: {e}")
+                    self._write_journal(job)
+                    with self._idle:
+                        self.stats["retried"] += 1
+                        self._backoff.add(job["id"])
+                        self._idle.notify_all()
+                    self._schedule(delay, self._requeue, job)
+            finally:
+                self._queue.task_done()
+
+
+_base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+gcs_uploader = GCSUploader(
+    journal_dir=os.path.join(_base_dir, "data", "upload_journal"),
+    workers=int(os.getenv("GCS_UPLOAD_WORKERS", "4")),
+    max_attempts=int(os.getenv("GCS_UPLOAD_MAX_ATTEMPTS", "5")),
+    dead_letter_retry=float(os.getenv("GCS_UPLOAD_DEAD_LETTER_RETRY", "600")),
+)
@@ -4,17 +4,32 @@ import shutil
 import uuid
 import base64
 from datetime import datetime
-from typing import Optional, List, Union
+from typing import Optional, List, Tuple, Union
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
 from database import SessionLocal, engine, Base
 from models import Asset
-from google.cloud import storage
+from core.pagination import paginate_assets
+from services.gcs_client import gcs_client
+from services.gcs_uploader import gcs_uploader
+from services.gcs_fetcher import gcs_fetcher
+from services.asset_cache import asset_cache
+from services.asset_manifest import asset_manifest
+from services.asset_search import asset_search
+from services.waveform_peaks import waveform_peaks
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Ensure tables exist
 Base.metadata.create_all(bind=engine)
+# create_all skips existing tables, so add columns and indexes introduced after a database was created
+if "cache_key" not in {c["name"] for c in inspect(engine).get_columns(Asset.__tablename__)}:
+    with engine.begin() as _conn:
+        _conn.execute(text(f"ALTER TABLE {Asset.__tablename__} ADD COLUMN cache_key VARCHAR"))
+for _index in Asset.__table__.indexes:
+    _index.create(bind=engine, checkfirst=True)
+asset_search.ensure_schema()
 
 class StorageService:
     def __init__(self):
@@ -35,7 +50,8 @@ class StorageService:
                    mime_type: str,
                    prompt: str,
                    model_id: str,
-                   meta_data: dict = None) -> Asset:
+                   meta_data: dict = None,
+                   cache_key: Optional[str] = None) -> Asset:
         db = SessionLocal()
         try:
             user_id = self._sanitize_path_component(user_id)
@@ -88,36 +104,46 @@ class StorageService:
                 mime_type=mime_type,
                 prompt=prompt,
                 model_id=model_id,
-                meta_data=meta_data or {}
+                meta_data=meta_data or {},
+                cache_key=cache_key
             )
             db.add(asset)
             db.commit()
             db.refresh(asset)
+            asset_search.index_asset(asset)
 
             # Also persist to GCS for cross-instance durability on Cloud Run
             self._persist_asset_to_gcs(asset, file_path)
+            asset_cache.add(file_path)
+            if asset_type == "audio" and os.path.exists(file_path):
+                waveform_peaks.schedule(asset.storage_path, file_path)
 
             return asset
         finally:
             db.close()
 
     def _persist_asset_to_gcs(self, asset, local_file_path: str):
-        """Upload asset file + metadata JSON to GCS so it survives Cloud Run instance restarts."""
+        """
+        Queue the asset file + metadata JSON for upload to GCS so it survives Cloud Run instance restarts.
+        The upload happens in the background; the job is journaled locally so it is not lost on restart.
+        """
         try:
             from config import model_config
             import json
             bucket_name = os.getenv("ASSETS_BUCKET", model_config.VEO_BUCKET)
-            client = storage.Client()
-            bucket = client.bucket(bucket_name)
 
+            items = []
             # Upload the asset file
             if local_file_path and os.path.exists(local_file_path):
-                blob_path = f"user_assets/{asset.storage_path}"
-                blob = bucket.blob(blob_path)
-                blob.upload_from_filename(local_file_path, content_type=asset.mime_type)
+                items.append({
+                    "blob_path": f"user_assets/{asset.storage_path}",
+                    "local_path": local_file_path,
+                    "content_type": asset.mime_type,
+                })
 
             # Upload metadata sidecar JSON
             meta = {
+                "id": asset.id,
                 "user_id": asset.user_id,
                 "asset_type": asset.asset_type,
                 "storage_path": asset.storage_path,
@@ -128,42 +154,48 @@ class StorageService:
                 "created_at": asset.created_at.isoformat() if asset.created_at else None,
                 "meta_data": asset.meta_data or {},
             }
-            meta_blob = bucket.blob(f"user_asset_metadata/{asset.user_id}/{asset.id}.json")
-            meta_blob.upload_from_string(json.dumps(meta), content_type="application/json")
+            items.append({
+                "blob_path": f"user_asset_metadata/{asset.user_id}/{asset.id}.json",
+                "data": json.dumps(meta),
+                "content_type": "application/json",
+            })
+            # Append to the per-user manifest so history loads are a single read
+            items.append({
+                "blob_path": asset_manifest.manifest_path(asset.user_id),
+                "data": asset_manifest.to_line(meta),
+                "content_type": "application/x-ndjson",
+                "append": True,
+            })
+            gcs_uploader.enqueue(bucket_name, items)
         except Exception as e:
             logger.warning(f"GCS persistence failed (non-fatal): {e}")
 
-    def list_assets_from_gcs(self, user_id: str) -> List[dict]:
-        """List asset metadata from GCS for a given user. Used to recover after instance restart."""
+    def get_history(self, user_id: str, limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[Asset], Optional[str]]:
+        """Newest-first page of a user's assets and the cursor for the next page."""
+        user_id = self._sanitize_path_component(user_id)
+        db = SessionLocal()
         try:
-            from config import model_config
-            import json
-            user_id = self._sanitize_path_component(user_id)
-            bucket_name = os.getenv("ASSETS_BUCKET", model_config.VEO_BUCKET)
-            client = storage.Client()
-            bucket = client.bucket(bucket_name)
-            prefix = f"user_asset_metadata/{user_id}/"
-            blobs = list(bucket.list_blobs(prefix=prefix))
-            assets = []
-            for blob in blobs:
-                try:
-                    data = json.loads(blob.download_as_text())
-                    assets.append(data)
-                except Exception:
-                    pass
-            assets.sort(key=lambda a: a.get("created_at", ""), reverse=True)
-            return assets
-        except Exception as e:
-            logger.warning(f"GCS list_assets failed: {e}")
-            return []
+            return paginate_assets(db.query(Asset).filter(Asset.user_id == user_id), limit, cursor)
+        finally:
+            db.close()
 
-    def get_history(self, user_id: str, limit: int = 50, offset: int = 0) -> List[Asset]:
-        user_id = self._sanitize_path_component(user_id)
+    def find_by_cache_key(self, user_id: str, cache_key: str) -> Optional[Asset]:
+        """Newest asset of a user saved with `cache_key` whose file is still available (locally or in GCS)."""
         db = SessionLocal()
         try:
-            return db.query(Asset).filter(Asset.user_id == user_id).order_by(Asset.created_at.desc()).offset(offset).limit(limit).all()
+            candidates = (
+                db.query(Asset)
+                .filter(Asset.user_id == self._sanitize_path_component(user_id), Asset.cache_key == cache_key)
+                .order_by(Asset.created_at.desc(), Asset.id.desc())
+                .limit(3)
+                .all()
+            )
         finally:
             db.close()
+        for asset in candidates:
+            if self.ensure_local(asset.storage_path):
+                return asset
+        return None
 
     def download_gcs_blob(self, gcs_uri: str, user_id: str) -> Optional[str]:
         try:
@@ -171,12 +203,7 @@ class StorageService:
                 return None
 
             user_id = self._sanitize_path_component(user_id)
-            bucket_name = gcs_uri.split("/")[2]
-            blob_name = "/".join(gcs_uri.split("/")[3:])
-
-            client = storage.Client()
-            bucket = client.bucket(bucket_name)
-            blob = bucket.blob(blob_name)
+            bucket_name, blob_name = gcs_client.parse_uri(gcs_uri)
 
             user_video_dir = os.path.join(self.assets_dir, user_id, "video")
             os.makedirs(user_video_dir, exist_ok=True)
@@ -189,15 +216,72 @@ class StorageService:
             local_path = os.path.join(user_video_dir, safe_name)
             relative_path = os.path.join(user_id, "video", safe_name)
             
-            if not os.path.exists(local_path):
+            if os.path.exists(local_path):
+                asset_cache.record_hit(local_path)
+            else:
+                asset_cache.record_miss()
                 logger.info(f"Downloading GCS blob {gcs_uri} to {local_path}")
-                blob.download_to_filename(local_path)
+                fetch = gcs_fetcher.fetch(bucket_name, blob_name, local_path, on_complete=asset_cache.add_from_gcs)
+                if not fetch.wait():
+                    if fetch.error is not None:
+                        raise fetch.error
+                    logger.error(f"GCS blob {gcs_uri} not found")
+                    return None
             
             return relative_path
         except Exception as e:
             logger.error(f"Error downloading GCS blob {gcs_uri}: {e}")
             return None
 
+    def ensure_local(self, storage_path: str) -> Optional[str]:
+        """
+        Return the absolute local path for a relative storage_path, re-fetching it
+        from the GCS backup if the local copy was evicted or never existed here.
+        """
+        if not storage_path or storage_path.startswith("gs://"):
+            return None
+        local_path = os.path.realpath(os.path.join(self.assets_dir, storage_path))
+        if not local_path.startswith(os.path.realpath(self.assets_dir) + os.sep):
+            return None
+        if os.path.isfile(local_path):
+            asset_cache.record_hit(local_path)
+            return local_path
+
+        asset_cache.record_miss()
+        try:
+            from config import model_config
+            bucket_name = os.getenv("ASSETS_BUCKET", model_config.VEO_BUCKET)
+            fetch = gcs_fetcher.fetch(bucket_name, f"user_assets/{storage_path}", local_path, on_complete=asset_cache.add_from_gcs)
+            return local_path if fetch.wait() else None
+        except Exception as e:
+            logger.warning(f"Could not restore {storage_path} from GCS: {e}")
+            return None
+
+    def is_available(self, storage_path: str) -> bool:
+        """True if the asset's file is on local disk or in its GCS backup; never downloads it."""
+        if not storage_path or storage_path.startswith("gs://"):
+            return False
+        local_path = os.path.realpath(os.path.join(self.assets_dir, storage_path))
+        if not local_path.startswith(os.path.realpath(self.assets_dir) + os.sep):
+            return False
+        return os.path.isfile(local_path) or self.persisted_gcs_uri(storage_path) is not None
+
+    def persisted_gcs_uri(self, storage_path: str) -> Optional[str]:
+        """gs:// URI of an asset's GCS backup under user_assets/, once its upload has finished."""
+        if not storage_path or storage_path.startswith("gs://"):
+            return None
+        if gcs_uploader.is_pending(os.path.join(self.assets_dir, storage_path)):
+            return None
+        from config import model_config
+        bucket_name = os.getenv("ASSETS_BUCKET", model_config.VEO_BUCKET)
+        blob_path = f"user_assets/{storage_path}"
+        try:
+            if gcs_client.exists(bucket_name, blob_path):
+                return f"gs://{bucket_name}/{blob_path}"
+        except Exception as e:
+            logger.warning(f"Could not check GCS backup of {storage_path}: {e}")
+        return None
+
     def register_asset(
         self,
         user_id: str,
@@ -235,10 +319,14 @@ class StorageService:
             db.commit()
             db.refresh(asset)
             logger.info(f"Registered asset {asset.id}: {storage_path} ({asset_type}) for user={user_id}")
+            asset_search.index_asset(asset)
 
             # Persist to GCS for cross-instance durability
             full_local_path = os.path.join(self.assets_dir, storage_path)
             self._persist_asset_to_gcs(asset, full_local_path)
+            asset_cache.add(full_local_path)
+            if asset_type == "audio" and os.path.exists(full_local_path):
+                waveform_peaks.schedule(storage_path, full_local_path)
 
             return asset
         except Exception as e:
@@ -252,10 +340,7 @@ class StorageService:
         import uuid as _uuid
         blob_path = f"uploads/{_uuid.uuid4()}.mp4"
         try:
-            client = storage.Client()
-            bucket = client.bucket(bucket_name)
-            blob = bucket.blob(blob_path)
-            blob.upload_from_string(data, content_type=mime_type)
+            gcs_client.upload_string(bucket_name, blob_path, data, content_type=mime_type)
             gcs_uri = f"gs://{bucket_name}/{blob_path}"
             logger.info(f"Uploaded {len(data)} bytes to {gcs_uri}")
             return gcs_uri
@@ -263,6 +348,20 @@ class StorageService:
             logger.error(f"GCS upload failed: {e}")
             raise
 
+    def upload_file_to_gcs(self, local_path: str, bucket_name: str, mime_type: str = "video/mp4") -> str:
+        """Upload a file on disk to GCS, streaming it rather than loading it into memory."""
+        import uuid as _uuid
+        ext = os.path.splitext(local_path)[1] or ".mp4"
+        blob_path = f"uploads/{_uuid.uuid4()}{ext}"
+        try:
+            gcs_client.upload_file(bucket_name, blob_path, local_path, content_type=mime_type)
+            gcs_uri = f"gs://{bucket_name}/{blob_path}"
+            logger.info(f"Uploaded {os.path.getsize(local_path)} bytes from {local_path} to {gcs_uri}")
+            return gcs_uri
+        except Exception as e:
+            logger.error(f"GCS upload failed: {e}")
+            raise
+
     def _get_ext_from_mime(self, mime_type: str) -> str:
         if not mime_type:
             return ""
@@ -0,0 +1,95 @@
+import json
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from core.single_flight import SingleFlight
+from models import Asset
+from services.storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+
+class SynthesisCache:
+    """
+    Reuses earlier speech and seeded music results instead of calling the provider again.
+
+    The key is a digest of every parameter that determines the audio (text, voice,
+    model, language, system instruction, encoding; for music the prompt, model,
+    seed and conditioning image). Results are found through the asset store: each
+    synthesized asset is saved with its key (`Asset.cache_key`, indexed per user),
+    so the cache survives restarts and needs no separate eviction. An entry is
+    only reused while its file is still available. This is independent of the
+    workflow `use_cache` flag, and concurrent identical requests share one call.
+    """
+
+    def __init__(self):
+        self._flights = SingleFlight()
+        self.stats = {"hits": 0, "misses": 0, "joined": 0, "errors": 0}
+
+    @staticmethod
+    def key(kind: str, params: Dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps({"kind": kind, **params}, sort_keys=True).encode()).hexdigest()
+
+    def tts_key(self, text: str, voice: Any, model: str, language: str, system_instruction: str = "",
+                encoding: str = "LINEAR16", output: str = "wav") -> str:
+        """`output` identifies what is stored (see AudioTranscoder.output_format)."""
+        return self.key("tts", {
+            "text": text, "voice": voice, "model": model, "language": language,
+            "system_instruction": system_instruction or "", "encoding": encoding, "output": output,
+        })
+
+    def music_key(self, prompt: str, model: str, seed: int, image_data: Optional[bytes] = None,
+                  negative_prompt: str = "") -> str:
+        return self.key("music", {
+            "prompt": prompt, "model": model, "seed": seed, "negative_prompt": negative_prompt or "",
+            "image": hashlib.sha256(image_data).hexdigest() if image_data else None,
+        })
+
+    def _read(self, asset: Asset) -> Optional[bytes]:
+        path = storage_service.ensure_local(asset.storage_path)
+        if not path:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _lookup(self, user_id: str, key: str) -> Optional[Tuple[Asset, bytes]]:
+        asset = storage_service.find_by_cache_key(user_id, key)
+        if asset is None:
+            return None
+        content = self._read(asset)
+        return (asset, content) if content is not None else None
+
+    async def get_or_create(self, user_id: str, key: str,
+                            create: Callable[[], Awaitable[Tuple[Asset, bytes]]]) -> Tuple[Asset, bytes]:
+        """
+        Return (asset, content) for `key`, calling `create()` on a miss. `create` must
+        synthesize, save the asset with `cache_key=key` and return (asset, content).
+        """
+        found = await asyncio.to_thread(self._lookup, user_id, key)
+        if found is not None:
+            self.stats["hits"] += 1
+            logger.info(f"[SYNTHESIS CACHE] Reusing {found[0].storage_path}")
+            return found
+
+        async def run() -> Tuple[Asset, bytes]:
+            try:
+                return await create()
+            except BaseException:
+                self.stats["errors"] += 1
+                raise
+
+        # One requester being cancelled does not fail the others waiting on the same synthesis
+        flight_key = f"{user_id}:{key}"
+        self.stats["joined" if flight_key in self._flights else "misses"] += 1
+        return await self._flights.run(flight_key, run)
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "inflight": len(self._flights)}
+
+
+synthesis_cache = SynthesisCache()
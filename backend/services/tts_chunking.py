@@ -0,0 +1,270 @@
+import io
+import os
+import re
+import copy
+import json
+import uuid
+import wave
+import base64
+import asyncio
+import hashlib
+import logging
+import textwrap
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.asset_cache import AssetCache
+from services.vertex_service import vertex_service
+
+logger = logging.getLogger(__name__)
+
+# (sample_rate, channels, sample_width) plus int16 samples, shape (frames, channels)
+PCM = Tuple[Tuple[int, int, int], np.ndarray]
+
+
+def decode_wav(content: bytes) -> PCM:
+    with wave.open(io.BytesIO(content), "rb") as w:
+        params = (w.getframerate(), w.getnchannels(), w.getsampwidth())
+        frames = w.readframes(w.getnframes())
+    if params[2] != 2:
+        raise ValueError(f"Expected 16-bit PCM, got {8 * params[2]}-bit")
+    return params, np.frombuffer(frames, dtype="<i2").reshape(-1, params[1])
+
+
+def encode_wav(params: Tuple[int, int, int], samples: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setframerate(params[0])
+        w.setnchannels(params[1])
+        w.setsampwidth(params[2])
+        w.writeframes(samples.astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+def crossfade_join(parts: List[np.ndarray], fade_frames: int) -> np.ndarray:
+    """Join int16 PCM parts in order, overlapping each boundary with a linear crossfade."""
+    out = parts[0].astype(np.float32)
+    for part in parts[1:]:
+        part = part.astype(np.float32)
+        n = min(fade_frames, len(out), len(part))
+        if n:
+            ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)[:, None]
+            overlap = out[-n:] * (1.0 - ramp) + part[:n] * ramp
+            out = np.concatenate((out[:-n], overlap, part[n:]))
+        else:
+            out = np.concatenate((out, part))
+    return np.clip(np.round(out), -32768, 32767).astype(np.int16)
+
+
+def join_with_gaps(parts: List[np.ndarray], gap_frames: int) -> np.ndarray:
+    """Join int16 PCM parts in order with `gap_frames` of silence between them."""
+    gap = np.zeros((gap_frames, parts[0].shape[1]), dtype=np.int16)
+    out = [parts[0]]
+    for part in parts[1:]:
+        out.extend((gap, part))
+    return np.concatenate(out)
+
+
+class TTSChunker:
+    """
+    Sentence-chunked, concurrent speech synthesis.
+
+    Text longer than `max_chars` is split at sentence boundaries into chunks of
+    at most `max_chars`. The chunks are synthesized concurrently (bounded by
+    vertex_service's TTS governor), so long narration takes roughly as long as
+    its slowest chunk rather than one long request. Each chunk is retried on
+    its own, and the PCM is stitched with short crossfades. Every chunk's WAV
+    is cached on disk by its exact request payload, so re-running text with a
+    few edited sentences only synthesizes the changed chunks.
+
+    Long dialogues (more than `dialogue_max_turns` turns or `dialogue_max_chars`
+    characters) are synthesized the same way: consecutive turns of a speaker
+    are grouped, each group is a single-speaker request with that speaker's
+    voice, and the groups are joined in order with `dialogue_gap_ms` of silence.
+    """
+
+    # Sentence ends: Latin punctuation followed by whitespace, CJK punctuation, or line breaks
+    SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])|\n+")
+
+    def __init__(self, root: str, max_bytes: int, max_chars: int, crossfade_ms: int, retries: int,
+                 dialogue_max_turns: int, dialogue_max_chars: int, dialogue_gap_ms: int):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.store = AssetCache(root=root, max_bytes=max_bytes)
+        self.max_chars = max(50, max_chars)
+        self.crossfade_ms = crossfade_ms
+        self.retries = retries
+        self.dialogue_max_turns = dialogue_max_turns
+        self.dialogue_max_chars = dialogue_max_chars
+        self.dialogue_gap_ms = dialogue_gap_ms
+        self.stats = {"requests": 0, "chunked": 0, "chunks": 0, "chunk_hits": 0, "retries": 0, "dialogues": 0}
+
+    def split(self, text: str) -> List[str]:
+        """Split text into chunks of whole sentences, each at most max_chars (long sentences are wrapped)."""
+        chunks: List[str] = []
+        current = ""
+        for sentence in self.SENTENCE_BREAK.split(text.strip()):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            pieces = [sentence] if len(sentence) <= self.max_chars else textwrap.wrap(sentence, self.max_chars)
+            for piece in pieces:
+                # CJK text is written without spaces between sentences
+                sep = "" if current.endswith(("。", "！", "？")) else " "
+                if current and len(current) + len(sep) + len(piece) > self.max_chars:
+                    chunks.append(current)
+                    current = piece
+                else:
+                    current = f"{current}{sep}{piece}" if current else piece
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @staticmethod
+    def _chunk_key(payload: Dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _read_cached(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+        except OSError:
+            return None
+        self.store.record_hit(path)
+        return content
+
+    def _write_cached(self, path: str, content: bytes):
+        part_path = f"{path}.{uuid.uuid4().hex[:8]}.part"
+        with open(part_path, "wb") as f:
+            f.write(content)
+        os.replace(part_path, path)
+        self.store.add(path)
+
+    async def _synthesize_chunk(self, payload: Dict[str, Any]) -> bytes:
+        path = os.path.join(self.root, f"{self._chunk_key(payload)}.wav")
+        cached = await asyncio.to_thread(self._read_cached, path)
+        if cached is not None:
+            self.stats["chunk_hits"] += 1
+            return cached
+
+        for attempt in range(self.retries + 1):
+            try:
+                content = base64.b64decode(await vertex_service.synthesize_raw(payload))
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                self.stats["retries"] += 1
+                logger.warning(f"TTS chunk failed (attempt {attempt + 1}), retrying: {e}")
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        try:
+            await asyncio.to_thread(self._write_cached, path, content)
+        except OSError as e:
+            logger.warning(f"Could not cache TTS chunk: {e}")
+        return content
+
+    async def synthesize(self, payload: Dict[str, Any], text_prefix: str = "") -> str:
+        """
+        Drop-in for vertex_service.synthesize_raw (returns base64 audio). `payload["input"]["text"]`
+        is the text to speak; `text_prefix` (e.g. a system instruction) is prepended to every chunk.
+        Short text is sent as a single request.
+        """
+        self.stats["requests"] += 1
+        text = payload.get("input", {}).get("text") or ""
+        chunks = self.split(text) if len(text) > self.max_chars else [text]
+
+        def chunk_payload(chunk: str) -> Dict[str, Any]:
+            p = copy.deepcopy(payload)
+            p["input"]["text"] = f"{text_prefix}{chunk}"
+            return p
+
+        if len(chunks) <= 1:
+            return await vertex_service.synthesize_raw(chunk_payload(text))
+
+        self.stats["chunked"] += 1
+        self.stats["chunks"] += len(chunks)
+        logger.info(f"[TTS] Synthesizing {len(text)} chars as {len(chunks)} concurrent chunks")
+        tasks = [asyncio.ensure_future(self._synthesize_chunk(chunk_payload(c))) for c in chunks]
+        try:
+            contents = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        decoded = [decode_wav(c) for c in contents]
+        params = decoded[0][0]
+        if any(p != params for p, _ in decoded):
+            raise ValueError("TTS chunks came back with different audio formats")
+        fade_frames = int(params[0] * self.crossfade_ms / 1000)
+        stitched = crossfade_join([samples for _, samples in decoded], fade_frames)
+        return base64.b64encode(encode_wav(params, stitched)).decode("utf-8")
+
+    def use_dialogue_mode(self, turns: List[Tuple[str, str]]) -> bool:
+        """Whether (speaker, text) turns are too long for a single multi-speaker request."""
+        return len(turns) > self.dialogue_max_turns or sum(len(text) for _, text in turns) > self.dialogue_max_chars
+
+    def group_turns(self, turns: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Merge consecutive turns of the same speaker while the group stays within max_chars."""
+        groups: List[Tuple[str, str]] = []
+        for speaker, text in turns:
+            text = text.strip()
+            if not text:
+                continue
+            if groups and groups[-1][0] == speaker and len(groups[-1][1]) + 1 + len(text) <= self.max_chars:
+                groups[-1] = (speaker, f"{groups[-1][1]} {text}")
+            else:
+                groups.append((speaker, text))
+        return groups
+
+    async def _synthesize_part(self, payload: Dict[str, Any]) -> bytes:
+        # Short parts go through the retried, cached chunk path; longer ones are chunked as usual
+        if len(payload["input"]["text"]) <= self.max_chars:
+            return await self._synthesize_chunk(payload)
+        return base64.b64decode(await self.synthesize(payload))
+
+    async def synthesize_dialogue(self, turns: List[Tuple[str, str]],
+                                  payload_for: Callable[[str, str], Dict[str, Any]]) -> str:
+        """
+        Synthesize (speaker, text) turns as concurrent single-speaker requests and join them
+        in order; `payload_for(speaker, text)` builds the request for one group of turns.
+        Returns base64 WAV, like synthesize().
+        """
+        groups = self.group_turns(turns)
+        if not groups:
+            raise ValueError("Dialogue has no text to synthesize")
+        self.stats["dialogues"] += 1
+        logger.info(f"[TTS] Synthesizing {len(turns)} turns as {len(groups)} concurrent single-speaker requests")
+        tasks = [asyncio.ensure_future(self._synthesize_part(payload_for(speaker, text))) for speaker, text in groups]
+        try:
+            contents = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        decoded = [decode_wav(c) for c in contents]
+        params = decoded[0][0]
+        if any(p != params for p, _ in decoded):
+            raise ValueError("Dialogue turns came back with different audio formats")
+        gap_frames = int(params[0] * self.dialogue_gap_ms / 1000)
+        joined = join_with_gaps([samples for _, samples in decoded], gap_frames)
+        return base64.b64encode(encode_wav(params, joined)).decode("utf-8")
+
+    def get_stats(self) -> dict:
+        return {**self.stats, **{f"disk_{k}": v for k, v in self.store.get_stats().items() if k in ("files", "bytes", "max_bytes", "evictions")}}
+
+
+_base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+tts_chunker = TTSChunker(
+    root=os.path.join(_base_dir, "data", "cache", "tts_chunks"),
+    max_bytes=int(os.getenv("TTS_CHUNK_CACHE_MAX_BYTES", str(512 * 1024 ** 2))),
+    max_chars=int(os.getenv("TTS_CHUNK_MAX_CHARS", "400")),
+    crossfade_ms=int(os.getenv("TTS_CHUNK_CROSSFADE_MS", "30")),
+    retries=int(os.getenv("TTS_CHUNK_RETRIES", "2")),
+    dialogue_max_turns=int(os.getenv("TTS_DIALOGUE_MAX_TURNS", "12")),
+    dialogue_max_chars=int(os.getenv("TTS_DIALOGUE_MAX_CHARS", "2000")),
+    dialogue_gap_ms=int(os.getenv("TTS_DIALOGUE_GAP_MS", "250")),
+)
@@ -401,12 +401,9 @@ class VeoService:
         # Fallback: list GCS blobs if SDK didn't return URIs
         if not videos:
             try:
-                from google.cloud import storage as gcs_storage
-                bucket_name = output_uri.replace("gs://", "").split("/")[0]
-                prefix = "/".join(output_uri.replace("gs://", "").split("/")[1:])
-                gcs_client = gcs_storage.Client()
-                bucket = gcs_client.bucket(bucket_name)
-                blobs = list(bucket.list_blobs(prefix=prefix))
+                from services.gcs_client import gcs_client
+                bucket_name, prefix = gcs_client.parse_uri(output_uri)
+                blobs = gcs_client.list_blobs(bucket_name, prefix)
                 for blob in blobs:
                     if blob.name.endswith(('.mp4', '.webm')):
                         videos.append({"uri": f"gs://{bucket_name}/{blob.name}", "mime_type": "video/mp4"})
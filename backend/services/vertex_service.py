@@ -1,18 +1,64 @@
 
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import httpx
 import google.auth
 import google.auth.transport.requests
 from core.config import get_settings
 from config import model_config
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 settings = get_settings()
 
+class SignedUrlCache:
+    """Bounded LRU of signed URLs keyed by (gcs_uri, expiration_mins, expiry bucket)."""
+
+    def __init__(self, bucket_seconds: int = 900, max_entries: int = 20000):
+        self.bucket_seconds = bucket_seconds
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            url = self._cache.get(key)
+            if url is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return url
+
+    def set(self, key: tuple, url: str):
+        with self._lock:
+            self._cache[key] = url
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
 class VertexService:
+    SIGNING_WORKERS = 16
+
     def __init__(self):
         self._creds = None
         self._project = None
         self._auth_req = None
+        self.signed_url_cache = SignedUrlCache(
+            bucket_seconds=int(os.getenv("SIGNED_URL_BUCKET_SECONDS", "900"))
+        )
+        # Governs concurrent TTS requests across the process (chunked and per-turn synthesis fan out)
+        self.tts_max_concurrency = max(1, int(os.getenv("TTS_MAX_CONCURRENCY", "8")))
+        self._tts_semaphore = asyncio.Semaphore(self.tts_max_concurrency)
 
     @property
     def creds(self):
@@ -47,6 +93,10 @@ class VertexService:
         return self.creds.token
 
     async def synthesize_raw(self, payload: Dict[str, Any]) -> bytes:
+        async with self._tts_semaphore:
+            return await self._synthesize_request(payload)
+
+    async def _synthesize_request(self, payload: Dict[str, Any]) -> bytes:
         token = self._get_token()
         headers = {
             "Authorization": f"Bearer {token}",
@@ -139,13 +189,18 @@ class VertexService:
             print(f"[ERROR] Failed to extract upscaled image. Prediction structure: {json.dumps(prediction, indent=2)}")
             raise Exception("Failed to extract upscaled image from Vertex AI response. Check logs for details.")
 
-    async def generate_music(self, prompt: str, negative_prompt: str = "", seed: int = 12345, model_id: str = "lyria-3-clip-preview", image_data: bytes = None) -> Dict[str, Any]:
+    @staticmethod
+    def music_model_uses_seed(model_id: str) -> bool:
+        """Lyria 2 takes a seed; the Lyria 3 interactions API has none."""
+        return not model_id.startswith("lyria-3")
+
+    async def generate_music(self, prompt: str, negative_prompt: str = "", seed: Optional[int] = None, model_id: str = "lyria-3-clip-preview", image_data: bytes = None) -> Dict[str, Any]:
         import base64 as b64mod
 
         if model_id.startswith("lyria-3"):
             return await self._generate_music_v3(prompt, model_id, image_data)
         else:
-            return await self._generate_music_v2(prompt, negative_prompt)
+            return await self._generate_music_v2(prompt, negative_prompt, seed)
 
     async def _generate_music_v3(self, prompt: str, model_id: str, image_data: bytes = None) -> Dict[str, Any]:
         import base64 as b64mod
@@ -200,7 +255,7 @@ class VertexService:
 
         return {"audioContent": audio_data, "lyrics": lyrics}
 
-    async def _generate_music_v2(self, prompt: str, negative_prompt: str = "") -> Dict[str, Any]:
+    async def _generate_music_v2(self, prompt: str, negative_prompt: str = "", seed: Optional[int] = None) -> Dict[str, Any]:
         token = self._get_token()
         headers = {
             "Authorization": f"Bearer {token}",
@@ -221,6 +276,10 @@ class VertexService:
                 "audioConfig": {"audioEncoding": "MP3"}
             }
         }
+        if seed is not None:
+            # A seed makes the result reproducible; the API rejects it together with sampleCount
+            payload["instances"][0]["seed"] = seed
+            del payload["parameters"]["sampleCount"]
 
         async with httpx.AsyncClient() as client:
             response = await client.post(endpoint, json=payload, headers=headers, timeout=120.0)
@@ -238,29 +297,58 @@ class VertexService:
             return prediction
 
     def get_signed_url(self, gcs_uri: str, expiration_mins: int = 60) -> str:
-        """Generates a signed URL for a GCS URI."""
+        """
+        Generates a signed URL for a GCS URI.
+
+        URLs are cached per (gcs_uri, expiry bucket). Each URL is signed to expire
+        `expiration_mins` after the end of its bucket, so a cached URL always has
+        at least that much validity left and is re-signed once the bucket rolls over.
+        """
         try:
-            from google.cloud import storage
-            from datetime import timedelta
+            from services.gcs_client import gcs_client
+            from datetime import datetime, timezone
             
             if not gcs_uri.startswith("gs://"):
                 return None
+
+            bucket_seconds = self.signed_url_cache.bucket_seconds
+            expiry_bucket = int(time.time() // bucket_seconds)
+            cache_key = (gcs_uri, expiration_mins, expiry_bucket)
+            cached = self.signed_url_cache.get(cache_key)
+            if cached:
+                return cached
                 
-            bucket_name = gcs_uri.split("/")[2]
-            blob_name = "/".join(gcs_uri.split("/")[3:])
-            
-            client = storage.Client(credentials=self.creds, project=settings.PROJECT_ID)
-            bucket = client.bucket(bucket_name)
-            blob = bucket.blob(blob_name)
+            bucket_name, blob_name = gcs_client.parse_uri(gcs_uri)
+            expires_at = (expiry_bucket + 1) * bucket_seconds + expiration_mins * 60
             
-            url = blob.generate_signed_url(
-                version="v4",
-                expiration=timedelta(minutes=expiration_mins),
-                method="GET"
+            url = gcs_client.generate_signed_url(
+                bucket_name,
+                blob_name,
+                expiration=datetime.fromtimestamp(expires_at, tz=timezone.utc),
+                credentials=self.creds
             )
+            self.signed_url_cache.set(cache_key, url)
             return url
         except Exception as e:
             print(f"Error generating signed URL for {gcs_uri}: {e}")
             return None
 
+    def get_signed_urls(self, gcs_uris: List[str], expiration_mins: int = 60) -> Dict[str, str]:
+        """Signs a batch of GCS URIs concurrently. Cached URIs are returned without re-signing."""
+        unique = list(dict.fromkeys(u for u in gcs_uris if u and u.startswith("gs://")))
+        if not unique:
+            return {}
+        try:
+            _ = self.creds  # Load credentials once before fanning out
+        except Exception as e:
+            print(f"Error loading credentials for URL signing: {e}")
+            return {u: None for u in unique}
+        with ThreadPoolExecutor(max_workers=min(self.SIGNING_WORKERS, len(unique))) as pool:
+            urls = pool.map(lambda u: self.get_signed_url(u, expiration_mins), unique)
+            return dict(zip(unique, urls))
+
+    async def aget_signed_urls(self, gcs_uris: List[str], expiration_mins: int = 60) -> Dict[str, str]:
+        """Async wrapper around get_signed_urls that keeps signing off the event loop."""
+        return await asyncio.to_thread(self.get_signed_urls, gcs_uris, expiration_mins)
+
 vertex_service = VertexService()
@@ -0,0 +1,191 @@
+import os
+import uuid
+import struct
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+from services.asset_cache import asset_cache
+from services.gcs_fetcher import gcs_fetcher
+from services.gcs_uploader import gcs_uploader
+
+logger = logging.getLogger(__name__)
+
+
+class WaveformPeaks:
+    """
+    Precomputed min/max waveform peaks for audio assets.
+
+    Audio is decoded once to mono 16-bit PCM, reduced to (min, max) pairs over
+    fixed windows with a vectorized NumPy reduction, then halved repeatedly to
+    build coarser levels. The result is stored as a small binary sidecar so a
+    player can draw a waveform without downloading and decoding the audio.
+
+    Sidecars live next to their asset (`{storage_path}.peaks`), locally under
+    the asset cache (which counts and evicts them like any asset) and in GCS
+    through the write-behind uploader. A cold instance fetches the sidecar
+    from GCS; the audio is only decoded for assets that never had one.
+
+    Sidecar layout (little-endian):
+        header  "PKS1", sample_rate uint32, level_count uint16
+        levels  level_count x (samples_per_peak uint32, peak_count uint32), finest first
+        data    for each level, peak_count x (min int8, max int8)
+    """
+
+    MAGIC = b"PKS1"
+    SAMPLE_RATE = 16000
+    # Finest level: ~62 peaks per second at SAMPLE_RATE
+    BASE_SAMPLES_PER_PEAK = 256
+    # Stop halving once a level would have fewer peaks than this
+    MIN_LEVEL_PEAKS = 64
+
+    def __init__(self, root: str, max_workers: int):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="waveform-peaks")
+        self._lock = threading.Lock()
+        self.stats = {"generated": 0, "served": 0, "fetched": 0, "on_demand": 0, "errors": 0}
+
+    def _bucket_name(self) -> str:
+        from config import model_config
+        return os.getenv("ASSETS_BUCKET", model_config.VEO_BUCKET)
+
+    def path_for(self, storage_path: str) -> str:
+        return os.path.join(self.root, f"{storage_path}.peaks")
+
+    def blob_path_for(self, storage_path: str) -> str:
+        return f"user_assets/{storage_path}.peaks"
+
+    def _decode(self, file_path: str) -> np.ndarray:
+        cmd = [
+            "ffmpeg", "-v", "error", "-i", file_path,
+            "-ac", "1", "-ar", str(self.SAMPLE_RATE), "-f", "s16le", "pipe:1",
+        ]
+        result = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.decode(errors="replace").strip() or f"ffmpeg exited with {result.returncode}")
+        return np.frombuffer(result.stdout, dtype="<i2")
+
+    def compute(self, file_path: str) -> bytes:
+        """Decode an audio file and return its peaks sidecar bytes."""
+        samples = self._decode(file_path)
+        if samples.size == 0:
+            samples = np.zeros(1, dtype="<i2")
+
+        spp = self.BASE_SAMPLES_PER_PEAK
+        count = -(-samples.size // spp)
+        frames = np.pad(samples, (0, count * spp - samples.size)).reshape(count, spp)
+        mins, maxs = frames.min(axis=1), frames.max(axis=1)
+
+        levels = [(spp, mins, maxs)]
+        while mins.size >= 2 * self.MIN_LEVEL_PEAKS:
+            if mins.size % 2:
+                mins, maxs = np.append(mins, mins[-1]), np.append(maxs, maxs[-1])
+            mins = mins.reshape(-1, 2).min(axis=1)
+            maxs = maxs.reshape(-1, 2).max(axis=1)
+            spp *= 2
+            levels.append((spp, mins, maxs))
+
+        header = struct.pack("<4sIH", self.MAGIC, self.SAMPLE_RATE, len(levels))
+        header += b"".join(struct.pack("<II", level_spp, level_mins.size) for level_spp, level_mins, _ in levels)
+        # int16 -> int8 keeps the top byte; interleave as (min, max) pairs
+        data = b"".join(
+            np.column_stack((level_mins >> 8, level_maxs >> 8)).astype(np.int8).tobytes()
+            for _, level_mins, level_maxs in levels
+        )
+        return header + data
+
+    def _write(self, storage_path: str, peaks: bytes):
+        path = self.path_for(storage_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        part_path = f"{path}.{uuid.uuid4().hex[:8]}.part"
+        with open(part_path, "wb") as f:
+            f.write(peaks)
+        os.replace(part_path, path)
+        asset_cache.add(path)
+        gcs_uploader.enqueue(self._bucket_name(), [{
+            "blob_path": self.blob_path_for(storage_path),
+            "local_path": path,
+            "content_type": "application/octet-stream",
+        }])
+
+    def _read(self, storage_path: str) -> Optional[bytes]:
+        path = self.path_for(storage_path)
+        try:
+            with open(path, "rb") as f:
+                peaks = f.read()
+        except OSError:
+            return None
+        asset_cache.record_hit(path)
+        return peaks
+
+    def _fetch(self, storage_path: str) -> Optional[bytes]:
+        """Restore a sidecar from GCS (written by another instance, or evicted here)."""
+        try:
+            fetch = gcs_fetcher.fetch(self._bucket_name(), self.blob_path_for(storage_path),
+                                      self.path_for(storage_path), on_complete=asset_cache.add_from_gcs)
+            if not fetch.wait():
+                return None
+        except Exception as e:
+            logger.warning(f"Could not fetch waveform peaks for {storage_path}: {e}")
+            return None
+        with self._lock:
+            self.stats["fetched"] += 1
+        return self._read(storage_path)
+
+    def generate(self, storage_path: str, file_path: str) -> Optional[bytes]:
+        """Compute and store the sidecar for an asset. Failures are logged, never raised."""
+        try:
+            peaks = self.compute(file_path)
+            self._write(storage_path, peaks)
+            with self._lock:
+                self.stats["generated"] += 1
+            return peaks
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+            logger.warning(f"Waveform peaks failed for {storage_path}: {e}")
+            return None
+
+    def schedule(self, storage_path: str, file_path: str):
+        """Generate the sidecar in the background (called when an audio asset is saved)."""
+        self._executor.submit(self.generate, storage_path, file_path)
+
+    def get(self, storage_path: str, resolve_audio: Optional[Callable[[], Optional[str]]] = None) -> Optional[bytes]:
+        """
+        Sidecar bytes for an asset, from local disk or GCS. If it has none (an asset
+        saved before peaks existed), `resolve_audio()` provides the audio file's local
+        path and the sidecar is generated and persisted now.
+        """
+        peaks = self._read(storage_path)
+        if peaks is None:
+            asset_cache.record_miss()
+            peaks = self._fetch(storage_path)
+        if peaks is None:
+            file_path = resolve_audio() if resolve_audio else None
+            if not file_path:
+                return None
+            with self._lock:
+                self.stats["on_demand"] += 1
+            peaks = self.generate(storage_path, file_path)
+            if peaks is None:
+                return None
+        with self._lock:
+            self.stats["served"] += 1
+        return peaks
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+
+_base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+waveform_peaks = WaveformPeaks(
+    root=os.path.join(_base_dir, "data", "assets"),
+    max_workers=int(os.getenv("WAVEFORM_PEAKS_WORKERS", "2")),
+)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests import backend modules the same way main.py does (e.g. `from services...`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "test-project")
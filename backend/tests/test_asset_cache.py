@@ -0,0 +1,72 @@
+import os
+import time
+
+from services.asset_cache import AssetCache
+
+OLD = time.time() - 3600
+
+
+def _file(root, rel: str, size: int = 1000) -> str:
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    os.utime(path, (OLD, OLD))
+    return os.path.realpath(path)
+
+
+def test_evicts_only_files_with_a_confirmed_gcs_copy(tmp_path):
+    root = str(tmp_path)
+    in_bucket = set()
+    checked = []
+
+    def is_persisted(path):
+        checked.append(path)
+        return path in in_bucket
+
+    # Left on disk by an earlier run with no GCS copy (picked up by scan)
+    legacy = _file(root, "u/image/legacy.png")
+    # Also found by scan, but its GCS copy exists
+    backed_up = _file(root, "u/image/backed_up.png")
+    in_bucket.add(backed_up)
+
+    cache = AssetCache(root, max_bytes=1500, is_persisted=is_persisted, min_age_seconds=0)
+    cache.scan()
+    cache.evict_if_needed()
+    assert not os.path.exists(backed_up)
+    assert os.path.exists(legacy)
+
+    # Saved, but its upload never got queued (nothing ever marks it persisted)
+    enqueue_failed = _file(root, "u/audio/enqueue_failed.mp3")
+    cache.add(enqueue_failed)
+    # Saved and uploaded by the write-behind uploader
+    uploaded = _file(root, "u/audio/uploaded.mp3")
+    cache.add(uploaded)
+    cache.mark_persisted(uploaded)
+    # Re-fetched from GCS after an earlier eviction
+    refetched = _file(root, "u/video/refetched.mp4")
+    cache.add_from_gcs(refetched)
+
+    cache.evict_if_needed()
+    assert os.path.exists(legacy) and os.path.exists(enqueue_failed)
+    assert not os.path.exists(uploaded) and not os.path.exists(refetched)
+    stats = cache.get_stats()
+    assert stats["evictions"] == 3 and stats["pinned"] == 2
+
+    # Unconfirmed files are not re-checked on every pass
+    checked.clear()
+    cache.evict_if_needed()
+    assert checked == []
+
+
+def test_failed_confirmation_pins_the_file(tmp_path):
+    root = str(tmp_path)
+    path = _file(root, "u/image/a.png")
+
+    def is_persisted(path):
+        raise ConnectionError("GCS unreachable")
+
+    cache = AssetCache(root, max_bytes=0, is_persisted=is_persisted, min_age_seconds=0)
+    cache.scan()
+    cache.evict_if_needed()
+    assert os.path.exists(path)
@@ -0,0 +1,87 @@
+import json
+from types import SimpleNamespace
+
+from google.api_core.exceptions import NotFound
+
+from services import asset_manifest as manifest_module
+from services import gcs_uploader as uploader_module
+from services.asset_manifest import AssetManifest
+from services.gcs_uploader import GCSUploader
+
+
+class FakeGCS:
+    """In-process stand-in for the gcs_client calls the uploader and manifest make."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_string(self, bucket_name, blob_name, data, content_type=None, if_generation_match=None):
+        self.objects[(bucket_name, blob_name)] = data
+
+    def append_string(self, bucket_name, blob_name, data, content_type=None, create=True):
+        key = (bucket_name, blob_name)
+        if key not in self.objects:
+            if not create:
+                return False
+            self.objects[key] = ""
+        self.objects[key] += data
+        return True
+
+    def download_text(self, bucket_name, blob_name):
+        try:
+            return self.objects[(bucket_name, blob_name)]
+        except KeyError:
+            raise NotFound(blob_name)
+
+    def list_blobs(self, bucket_name, prefix):
+        return [SimpleNamespace(name=name) for (b, name) in sorted(self.objects) if b == bucket_name and name.startswith(prefix)]
+
+
+def _persist_items(manifest, meta):
+    """The metadata part of the job StorageService._persist_asset_to_gcs queues for a saved asset."""
+    return [
+        {"blob_path": f"user_asset_metadata/{meta['user_id']}/{meta['id']}.json",
+         "data": json.dumps(meta), "content_type": "application/json"},
+        {"blob_path": manifest.manifest_path(meta["user_id"]), "data": manifest.to_line(meta),
+         "content_type": "application/x-ndjson", "append": True},
+    ]
+
+
+def test_first_asset_of_a_new_user_creates_the_manifest(tmp_path, monkeypatch):
+    gcs = FakeGCS()
+    monkeypatch.setattr(uploader_module, "gcs_client", gcs)
+    monkeypatch.setattr(manifest_module, "gcs_client", gcs)
+    monkeypatch.setenv("ASSETS_BUCKET", "bucket")
+    manifest = AssetManifest(rebuild_workers=2)
+    uploader = GCSUploader(str(tmp_path), workers=1)
+    uploader.on_append_missing = manifest.create_missing
+
+    first = {"id": 1, "user_id": "newbie", "storage_path": "newbie/image/a.png", "created_at": "2026-01-01T00:00:00"}
+    uploader.enqueue("bucket", _persist_items(manifest, first))
+    assert uploader.drain(timeout=5)
+    assert [e["storage_path"] for e in manifest.load("newbie")] == ["newbie/image/a.png"]
+
+    # Later assets append to the manifest the first one created
+    second = {"id": 2, "user_id": "newbie", "storage_path": "newbie/image/b.png", "created_at": "2026-01-02T00:00:00"}
+    uploader.enqueue("bucket", _persist_items(manifest, second))
+    assert uploader.drain(timeout=5)
+    assert [e["storage_path"] for e in manifest.load("newbie")] == ["newbie/image/a.png", "newbie/image/b.png"]
+    assert uploader.get_stats()["uploaded"] == 2
+
+
+def test_missing_manifest_of_an_existing_user_includes_older_sidecars(tmp_path, monkeypatch):
+    gcs = FakeGCS()
+    monkeypatch.setattr(uploader_module, "gcs_client", gcs)
+    monkeypatch.setattr(manifest_module, "gcs_client", gcs)
+    monkeypatch.setenv("ASSETS_BUCKET", "bucket")
+    manifest = AssetManifest(rebuild_workers=2)
+    uploader = GCSUploader(str(tmp_path), workers=1)
+    uploader.on_append_missing = manifest.create_missing
+
+    older = {"id": 7, "user_id": "veteran", "storage_path": "veteran/audio/old.mp3", "created_at": "2025-01-01T00:00:00"}
+    gcs.upload_string("bucket", "user_asset_metadata/veteran/7.json", json.dumps(older))
+
+    newer = {"id": 8, "user_id": "veteran", "storage_path": "veteran/audio/new.mp3", "created_at": "2026-01-01T00:00:00"}
+    uploader.enqueue("bucket", _persist_items(manifest, newer))
+    assert uploader.drain(timeout=5)
+    assert [e["storage_path"] for e in manifest.load("veteran")] == ["veteran/audio/old.mp3", "veteran/audio/new.mp3"]
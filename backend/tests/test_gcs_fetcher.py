@@ -0,0 +1,55 @@
+import asyncio
+import os
+import threading
+
+from services import gcs_fetcher as fetcher_module
+from services.gcs_fetcher import GCSFetcher
+
+HALF = b"x" * 1000
+
+
+class FakeBlob:
+    size = 2 * len(HALF)
+    md5_hash = None
+
+
+class FailingClient:
+    """Writes half the object, then fails the download once `fail` is set."""
+
+    def __init__(self):
+        self.fail = threading.Event()
+
+    def get_blob(self, bucket_name, blob_name):
+        return FakeBlob()
+
+    def download_to_file(self, blob, out):
+        out.write(HALF)
+        self.fail.wait(5)
+        raise ConnectionError("connection reset mid-download")
+
+
+async def _collect(fetcher, fetch, reader):
+    return b"".join([chunk async for chunk in fetcher.stream(fetch, reader)])
+
+
+def test_mid_download_failure(tmp_path, monkeypatch):
+    client = FailingClient()
+    monkeypatch.setattr(fetcher_module, "gcs_client", client)
+    fetcher = GCSFetcher(max_workers=1)
+    dest = str(tmp_path / "user" / "video" / "clip.mp4")
+
+    fetch = fetcher.fetch("bucket", "user_assets/user/video/clip.mp4", dest)
+    assert fetch.ready.wait(5) and fetch.found
+
+    # A reader that opened the .part before the failure
+    early = fetcher.open_reader(fetch)
+    assert early is not None
+    client.fail.set()
+    assert fetch.wait(5) is False
+    assert not os.path.exists(fetch.part_path) and not os.path.exists(dest)
+
+    # ...keeps its handle and its stream ends short instead of raising
+    assert asyncio.run(_collect(fetcher, fetch, early)) == HALF
+    # A reader arriving after the failure learns of it before any headers are sent
+    assert fetcher.open_reader(fetch) is None
+    assert fetcher.get_stats()["errors"] == 1
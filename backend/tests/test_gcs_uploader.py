@@ -0,0 +1,59 @@
+import json
+import os
+import threading
+import time
+
+from services import gcs_uploader as uploader_module
+from services.gcs_uploader import GCSUploader
+
+
+class FlakyClient:
+    """Stands in for gcs_client; fails the first `failures` uploads."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.uploads = []
+        self._lock = threading.Lock()
+
+    def upload_string(self, bucket_name, blob_path, data, content_type=None):
+        with self._lock:
+            if self.failures > 0:
+                self.failures -= 1
+                raise RuntimeError("transient")
+            self.uploads.append(blob_path)
+
+
+def test_drain_does_not_wait_for_jobs_in_backoff(tmp_path, monkeypatch):
+    client = FlakyClient(failures=1)
+    monkeypatch.setattr(uploader_module, "gcs_client", client)
+    uploader = GCSUploader(str(tmp_path), workers=1, base_backoff=30.0)
+
+    job_id = uploader.enqueue("bucket", [{"blob_path": "a.txt", "data": "a"}])
+    deadline = time.monotonic() + 5
+    while uploader.get_stats()["retried"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    started = time.monotonic()
+    assert uploader.drain(timeout=5) is False
+    assert time.monotonic() - started < 1
+    # The job is left to the journal for the next start
+    assert os.path.exists(os.path.join(str(tmp_path), f"{job_id}.json"))
+    assert client.uploads == []
+
+
+def test_replay_skips_jobs_enqueue_is_already_running(tmp_path, monkeypatch):
+    client = FlakyClient()
+    monkeypatch.setattr(uploader_module, "gcs_client", client)
+    uploader = GCSUploader(str(tmp_path), workers=2)
+
+    job = {"id": "job1", "bucket": "bucket", "items": [{"blob_path": "b.txt", "data": "b"}],
+           "done": [], "attempts": 0, "created_at": 0}
+    with open(os.path.join(str(tmp_path), "job1.json"), "w") as f:
+        json.dump(job, f)
+    # enqueue() tracked the job before start() replays the journal
+    assert uploader._track(dict(job))
+    uploader._queue.put(uploader._pending["job1"])
+    uploader.start()
+
+    assert uploader.drain(timeout=5)
+    assert client.uploads == ["b.txt"]
@@ -0,0 +1,59 @@
+import base64
+import hashlib
+import os
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from core.media_response import ContentDigests, build_media_response
+
+DATA = os.urandom(4000)
+
+
+def _client(path: str) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/media")
+    def media(request: Request):
+        return build_media_response(request, path, "audio/mpeg", immutable=True)
+
+    return TestClient(app)
+
+
+def _copy(tmp_path, name: str, mtime: int) -> str:
+    path = tmp_path / name
+    path.write_bytes(DATA)
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_etag_survives_a_refetch_with_a_new_mtime(tmp_path):
+    # The same asset as written by two instances (or before and after an eviction)
+    first = _client(_copy(tmp_path, "a.mp3", 1_700_000_000))
+    second = _client(_copy(tmp_path, "b.mp3", 1_700_050_000))
+
+    etag = first.get("/media").headers["etag"]
+    assert etag == f'"{hashlib.md5(DATA).hexdigest()}"'
+
+    assert second.get("/media", headers={"If-None-Match": etag}).status_code == 304
+    resumed = second.get("/media", headers={"Range": "bytes=1000-", "If-Range": etag})
+    assert resumed.status_code == 206
+    assert resumed.content == DATA[1000:]
+
+
+def test_changed_content_changes_etag(tmp_path):
+    path = _copy(tmp_path, "a.mp3", 1_700_000_000)
+    etag = _client(path).get("/media").headers["etag"]
+    with open(path, "wb") as f:
+        f.write(DATA[::-1])
+    response = _client(path).get("/media", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_seeded_gcs_md5_is_used_without_hashing(tmp_path, monkeypatch):
+    path = _copy(tmp_path, "a.mp3", 1_700_000_000)
+    digests = ContentDigests()
+    digests.seed(path, base64.b64encode(hashlib.md5(DATA).digest()).decode())
+    monkeypatch.setattr("builtins.open", None)
+    assert digests.get(path) == hashlib.md5(DATA).hexdigest()
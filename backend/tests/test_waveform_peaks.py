@@ -0,0 +1,81 @@
+import os
+from types import SimpleNamespace
+
+from services import waveform_peaks as peaks_module
+from services.waveform_peaks import WaveformPeaks
+
+PEAKS = b"PKS1" + b"\x01" * 32
+
+
+class FakeBucket:
+    """Stands in for the uploader, fetcher and asset cache around one GCS bucket."""
+
+    def __init__(self):
+        self.objects = {}
+        self.cached = []
+
+    # gcs_uploader
+    def enqueue(self, bucket_name, items):
+        for item in items:
+            with open(item["local_path"], "rb") as f:
+                self.objects[item["blob_path"]] = f.read()
+        return "job"
+
+    # gcs_fetcher
+    def fetch(self, bucket_name, blob_name, dest_path, on_complete=None):
+        data = self.objects.get(blob_name)
+        if data is not None:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            with open(dest_path, "wb") as f:
+                f.write(data)
+            on_complete(dest_path)
+        return SimpleNamespace(wait=lambda: data is not None)
+
+    # asset_cache
+    def add(self, path):
+        self.cached.append(path)
+
+    add_from_gcs = add
+
+    def record_hit(self, path):
+        pass
+
+    def record_miss(self):
+        pass
+
+
+def test_cold_instance_fetches_the_sidecar_instead_of_the_audio(tmp_path, monkeypatch):
+    bucket = FakeBucket()
+    for name in ("gcs_uploader", "gcs_fetcher", "asset_cache"):
+        monkeypatch.setattr(peaks_module, name, bucket)
+    monkeypatch.setattr(WaveformPeaks, "compute", lambda self, file_path: PEAKS)
+
+    # The instance that saved the asset writes the sidecar beside it and persists it
+    first = WaveformPeaks(str(tmp_path / "a"), max_workers=1)
+    assert first.generate("u/audio/clip.mp3", "/unused/clip.mp3") == PEAKS
+    sidecar = str(tmp_path / "a" / "u" / "audio" / "clip.mp3.peaks")
+    assert bucket.cached == [sidecar]
+    assert bucket.objects == {"user_assets/u/audio/clip.mp3.peaks": PEAKS}
+
+    # A fresh instance gets it from GCS without touching the audio
+    def resolve_audio():
+        raise AssertionError("the audio should not be downloaded")
+
+    cold = WaveformPeaks(str(tmp_path / "b"), max_workers=1)
+    assert cold.get("u/audio/clip.mp3", resolve_audio) == PEAKS
+    assert os.path.exists(str(tmp_path / "b" / "u" / "audio" / "clip.mp3.peaks"))
+    assert cold.get_stats()["fetched"] == 1 and cold.get_stats()["on_demand"] == 0
+
+
+def test_asset_without_a_sidecar_is_generated_once(tmp_path, monkeypatch):
+    bucket = FakeBucket()
+    for name in ("gcs_uploader", "gcs_fetcher", "asset_cache"):
+        monkeypatch.setattr(peaks_module, name, bucket)
+    monkeypatch.setattr(WaveformPeaks, "compute", lambda self, file_path: PEAKS)
+
+    resolved = []
+    peaks = WaveformPeaks(str(tmp_path), max_workers=1)
+    assert peaks.get("u/audio/old.mp3", lambda: resolved.append(1) or "/local/old.mp3") == PEAKS
+    assert peaks.get("u/audio/old.mp3", lambda: resolved.append(1) or "/local/old.mp3") == PEAKS
+    assert resolved == [1]
+    assert "user_assets/u/audio/old.mp3.peaks" in bucket.objects
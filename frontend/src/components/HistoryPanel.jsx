@@ -30,22 +30,50 @@ const HistoryPanel = ({ userId }) => {
   const [searchQuery, setSearchQuery] = useState('');
   const [viewMode, setViewMode] = useState('grid');
   const [expandedPrompts, setExpandedPrompts] = useState(new Set());
+  const [nextCursor, setNextCursor] = useState(null);
+  const [searchResults, setSearchResults] = useState(null);
 
   useEffect(() => {
     fetchHistory();
   }, [userId, assetFilter]);
 
-  const fetchHistory = async () => {
+  // Server-side ranked search covers assets beyond the loaded pages
+  useEffect(() => {
+    const q = searchQuery.trim();
+    if (!q) {
+      setSearchResults(null);
+      return undefined;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ q, limit: '100' });
+        if (assetFilter !== 'all') params.set('asset_type', assetFilter);
+        const res = await apiFetch(`/api/history/search?${params.toString()}`);
+        if (res.ok && !cancelled) {
+          setSearchResults(await res.json());
+        }
+      } catch (err) {
+        console.error('History search failed', err);
+      }
+    }, 250);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery, assetFilter, userId]);
+
+  const fetchHistory = async (cursor = null) => {
     setLoading(true);
     try {
-      const url =
-        assetFilter === 'all'
-          ? '/api/history?limit=100'
-          : `/api/history?limit=100&asset_type=${assetFilter}`;
-      const res = await apiFetch(url);
+      const params = new URLSearchParams({ limit: '100' });
+      if (assetFilter !== 'all') params.set('asset_type', assetFilter);
+      if (cursor) params.set('cursor', cursor);
+      const res = await apiFetch(`/api/history?${params.toString()}`);
       if (res.ok) {
         const data = await res.json();
-        setAssets(data);
+        setAssets((prev) => (cursor ? [...prev, ...data] : data));
+        setNextCursor(res.headers.get('X-Next-Cursor'));
       }
     } catch (err) {
       console.error('Failed to fetch history', err);
@@ -56,6 +84,7 @@ const HistoryPanel = ({ userId }) => {
 
   const filteredAssets = useMemo(() => {
     if (!searchQuery) return assets;
+    if (searchResults) return searchResults;
     const q = searchQuery.toLowerCase();
     return assets.filter(
       (a) =>
@@ -63,7 +92,7 @@ const HistoryPanel = ({ userId }) => {
         (a.model_id && a.model_id.toLowerCase().includes(q)) ||
         (a.filename && a.filename.toLowerCase().includes(q))
     );
-  }, [assets, searchQuery]);
+  }, [assets, searchQuery, searchResults]);
 
   const togglePromptExpand = useCallback((id) => {
     setExpandedPrompts((prev) => {
@@ -454,6 +483,14 @@ const HistoryPanel = ({ userId }) => {
             </div>
           )}
 
+          {nextCursor && !searchQuery && (
+            <div style={{ display: 'flex', justifyContent: 'center', padding: '1.5rem 0' }}>
+              <button className="btn" onClick={() => fetchHistory(nextCursor)} disabled={loading}>
+                {loading ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
+
           {filteredAssets.length === 0 && !loading && (
             <div
               style={{
@@ -30,6 +30,7 @@ const MultiSpeakerPanel = () => {
   const [prompt, setPrompt] = useState("Say the following as a conversation between friends.");
   const [loading, setLoading] = useState(false);
   const [audioSrc, setAudioSrc] = useState(null);
+  const [audioMimeType, setAudioMimeType] = useState('audio/wav');
   const [error, setError] = useState(null);
 
   const addTurn = () => {
@@ -78,7 +79,9 @@ const MultiSpeakerPanel = () => {
         const len = binaryString.length;
         const bytes = new Uint8Array(len);
         for (let i = 0; i < len; i++) bytes[i] = binaryString.charCodeAt(i);
-        const blob = new Blob([bytes], { type: 'audio/wav' });
+        const mimeType = data.mime_type || 'audio/wav';
+        const blob = new Blob([bytes], { type: mimeType });
+        setAudioMimeType(mimeType);
         setAudioSrc(window.URL.createObjectURL(blob));
       } else {
         throw new Error("No audio content received");
@@ -178,7 +181,7 @@ const MultiSpeakerPanel = () => {
 
         {error && <div style={{ color: '#ef4444', marginTop: '1rem' }}>{error}</div>}
 
-        <WaveformPlayer src={audioSrc} />
+        <WaveformPlayer src={audioSrc} mimeType={audioMimeType} />
       </div>
     </div>
   );
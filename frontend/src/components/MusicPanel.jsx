@@ -3,11 +3,18 @@ import React, { useState } from 'react';
 import { Music, Send, Download, RefreshCw, Sparkles, Zap } from 'lucide-react';
 import WaveformPlayer from './WaveformPlayer';
 import { apiFetch } from '../utils/api';
+import { useConfig } from '../contexts/ConfigContext';
 
 const MusicPanel = ({ userId }) => {
+  const { config } = useConfig();
+  const [selectedModel, setSelectedModel] = useState(null);
+  const modelId = selectedModel || config?.DEFAULT_MUSIC_MODEL || 'lyria-3-clip-preview';
+  // Only Lyria 2 takes a seed; Lyria 3 produces a new take on every request
+  const usesSeed = !modelId.startsWith('lyria-3');
   const [prompt, setPrompt] = useState('An uplifting and hopeful orchestral piece with a soaring string melody and triumphant brass.');
   const [negativePrompt, setNegativePrompt] = useState('dissonant, minor key');
-  const [seed, setSeed] = useState(12345);
+  // Empty means a new take on every request; a seed makes the result reproducible
+  const [seed, setSeed] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
   const [audioSrc, setAudioSrc] = useState(null);
   const [error, setError] = useState(null);
@@ -20,7 +27,8 @@ const MusicPanel = ({ userId }) => {
     const formData = new FormData();
     formData.append('prompt', prompt);
     formData.append('negative_prompt', negativePrompt);
-    formData.append('seed', seed);
+    formData.append('model_id', modelId);
+    if (usesSeed && seed !== null) formData.append('seed', seed);
     formData.append('user_id', userId);
 
     try {
@@ -65,7 +73,7 @@ const MusicPanel = ({ userId }) => {
           <Music className="text-secondary" size={24} />
           Music Studio
         </h2>
-        <p>High-fidelity music generation with Lyria-002</p>
+        <p>High-fidelity music generation with Lyria</p>
       </div>
 
       <div className="panel-content">
@@ -93,21 +101,40 @@ const MusicPanel = ({ userId }) => {
           </div>
 
           <div className="config-group">
-            <label className="label">Seed</label>
-            <div style={{ display: 'flex', gap: '0.5rem' }}>
-              <input
-                type="number"
-                value={seed}
-                onChange={(e) => setSeed(parseInt(e.target.value))}
-                className="input-field"
-                style={{ flex: 1 }}
-              />
-              <button onClick={randomizeSeed} className="btn-secondary" style={{ padding: '0.75rem' }} title="Randomize Seed">
-                <RefreshCw size={18} />
-              </button>
-            </div>
+            <label className="label">Model</label>
+            <select
+              className="modern-select"
+              value={modelId}
+              onChange={(e) => setSelectedModel(e.target.value)}
+            >
+              {(config?.MUSIC_MODELS || [modelId]).map(m => (
+                <option key={m} value={m}>{m}</option>
+              ))}
+            </select>
           </div>
 
+          {usesSeed && (
+            <div className="config-group">
+              <label className="label">Seed</label>
+              <div style={{ display: 'flex', gap: '0.5rem' }}>
+                <input
+                  type="number"
+                  value={seed ?? ''}
+                  placeholder="Random"
+                  onChange={(e) => {
+                    const value = parseInt(e.target.value, 10);
+                    setSeed(Number.isNaN(value) ? null : value);
+                  }}
+                  className="input-field"
+                  style={{ flex: 1 }}
+                />
+                <button onClick={randomizeSeed} className="btn-secondary" style={{ padding: '0.75rem' }} title="Randomize Seed">
+                  <RefreshCw size={18} />
+                </button>
+              </div>
+            </div>
+          )}
+
           <button
             className="btn"
             onClick={handleGenerate}
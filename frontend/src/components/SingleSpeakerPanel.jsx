@@ -18,6 +18,7 @@ const SingleSpeakerPanel = () => {
   }, [config]);
   const [loading, setLoading] = useState(false);
   const [audioSrc, setAudioSrc] = useState(null);
+  const [audioMimeType, setAudioMimeType] = useState('audio/wav');
   const [error, setError] = useState(null);
 
   const handleSynthesize = async () => {
@@ -52,7 +53,9 @@ const SingleSpeakerPanel = () => {
         for (let i = 0; i < len; i++) {
           bytes[i] = binaryString.charCodeAt(i);
         }
-        const blob = new Blob([bytes], { type: 'audio/wav' });
+        const mimeType = data.mime_type || 'audio/wav';
+        const blob = new Blob([bytes], { type: mimeType });
+        setAudioMimeType(mimeType);
         setAudioSrc(window.URL.createObjectURL(blob));
       } else {
         throw new Error("No audio content received");
@@ -115,7 +118,7 @@ const SingleSpeakerPanel = () => {
 
       {error && <div style={{ color: '#ef4444', marginTop: '1rem' }}>{error}</div>}
 
-      <WaveformPlayer src={audioSrc} />
+      <WaveformPlayer src={audioSrc} mimeType={audioMimeType} />
     </div>
   );
 };
@@ -1,13 +1,17 @@
 import React, { useRef, useEffect, useState } from 'react';
 import { Play, Pause, Download, Volume2, VolumeX } from 'lucide-react';
+import { useWaveformPeaks, hasPeaks } from '../hooks/useWaveformPeaks';
 
 const WaveformPlayer = ({ src, mimeType = 'audio/wav' }) => {
+  const fileExtension = /mpeg|mp3/.test(mimeType) ? 'mp3' : mimeType.includes('ogg') ? 'ogg' : 'wav';
   const audioRef = useRef(null);
   const [isPlaying, setIsPlaying] = useState(false);
   const [currentTime, setCurrentTime] = useState(0);
   const [duration, setDuration] = useState(0);
   const [isMuted, setIsMuted] = useState(false);
   const [bars, setBars] = useState([]);
+  // Real waveform from the precomputed peaks when the source is a stored asset
+  const waveform = useWaveformPeaks(src, 40);
 
   // Generate random bars for visualization
   useEffect(() => {
@@ -54,6 +58,9 @@ const WaveformPlayer = ({ src, mimeType = 'audio/wav' }) => {
 
   const onEnded = () => setIsPlaying(false);
 
+  // Until the (lazily loaded) audio reports its metadata, the peaks give the duration
+  const totalDuration = duration || waveform?.duration || 0;
+
   const formatTime = (time) => {
     const min = Math.floor(time / 60);
     const sec = Math.floor(time % 60);
@@ -70,10 +77,12 @@ const WaveformPlayer = ({ src, mimeType = 'audio/wav' }) => {
       border: '1px solid var(--glass-border)',
       borderRadius: '1.25rem'
     }}>
+      {/* Stored assets draw from their peaks, so the audio itself is only fetched on play */}
       <audio
         ref={audioRef}
         src={src}
         type={mimeType}
+        preload={hasPeaks(src) ? 'none' : 'auto'}
         onTimeUpdate={handleTimeUpdate}
         onLoadedMetadata={handleLoadedMetadata}
         onEnded={onEnded}
@@ -108,7 +117,21 @@ const WaveformPlayer = ({ src, mimeType = 'audio/wav' }) => {
             height: '2rem',
             maskImage: 'linear-gradient(to right, transparent, black 10%, black 90%, transparent)'
           }}>
-            {bars.map((height, i) => (
+            {waveform ? waveform.bars.map((height, i) => (
+              <div
+                key={i}
+                style={{
+                  flex: 1,
+                  background: totalDuration && (i + 0.5) / waveform.bars.length <= currentTime / totalDuration
+                    ? 'var(--accent-primary)'
+                    : 'var(--text-secondary)',
+                  height: `${Math.max(8, height * 100)}%`,
+                  borderRadius: '999px',
+                  opacity: 0.8,
+                  transition: 'background 0.2s ease'
+                }}
+              />
+            )) : bars.map((height, i) => (
               <div
                 key={i}
                 style={{
@@ -139,13 +162,13 @@ const WaveformPlayer = ({ src, mimeType = 'audio/wav' }) => {
               overflow: 'hidden'
             }}>
               <div style={{
-                width: `${(currentTime / duration) * 100}%`,
+                width: `${totalDuration ? (currentTime / totalDuration) * 100 : 0}%`,
                 height: '100%',
                 background: 'var(--accent-primary)',
                 borderRadius: '2px'
               }} />
             </div>
-            <span>{formatTime(duration)}</span>
+            <span>{formatTime(totalDuration)}</span>
           </div>
         </div>
 
@@ -160,7 +183,7 @@ const WaveformPlayer = ({ src, mimeType = 'audio/wav' }) => {
 
           <a
             href={src}
-            download="generated_audio.wav"
+            download={`generated_audio.${fileExtension}`}
             className="btn-secondary"
             style={{ padding: '0.6rem', background: 'rgba(255,255,255,0.05)', border: 'none', display: 'flex', alignItems: 'center', justifyContent: 'center' }}
           >
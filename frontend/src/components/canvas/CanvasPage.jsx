@@ -441,7 +441,15 @@ const CanvasPage = ({ userId = 'default_user', initialData, onStateChange }) =>
               setNodes((nds) =>
                 nds.map((n) =>
                   n.id === data.node_id
-                    ? { ...n, data: { ...n.data, status: 'running' } }
+                    ? { ...n, data: { ...n.data, status: 'running', progress: null } }
+                    : n
+                )
+              );
+            } else if (data.type === 'node_progress') {
+              setNodes((nds) =>
+                nds.map((n) =>
+                  n.id === data.node_id
+                    ? { ...n, data: { ...n.data, progress: { percent: data.percent, eta: data.eta_seconds, stage: data.stage } } }
                     : n
                 )
               );
@@ -1,6 +1,6 @@
 import React, { memo, useState, useEffect } from 'react';
 import { Handle, Position, NodeResizer, useEdges, useNodes } from '@xyflow/react';
-import { Film, Mic, Music, X, ChevronUp, ChevronDown, Volume2, Play } from 'lucide-react';
+import { Film, Mic, Music, X, ChevronUp, ChevronDown, Volume2, Play, Scissors } from 'lucide-react';
 
 const EditorNode = ({ id, data, isConnectable, selected }) => {
   const edges = useEdges();
@@ -89,6 +89,15 @@ const EditorNode = ({ id, data, isConnectable, selected }) => {
     }
   };
 
+  // Interactive runs render drafts; switch to Final for the export render
+  const renderQuality = config.render_quality || 'draft';
+
+  const setRenderQuality = (quality) => {
+    if (data.onUpdate) {
+      data.onUpdate({ config: { ...config, render_quality: quality } });
+    }
+  };
+
   const moveElement = (type, index, direction) => {
     const items = [...sequence[type]];
     const newIndex = index + direction;
@@ -105,6 +114,14 @@ const EditorNode = ({ id, data, isConnectable, selected }) => {
     updateSequence(type, items);
   };
 
+  // In/out points in seconds of the source clip; empty means start/end of the clip
+  const updateTrim = (type, index, field, value) => {
+    const items = [...sequence[type]];
+    const seconds = parseFloat(value);
+    items[index] = { ...items[index], [field]: Number.isFinite(seconds) && seconds >= 0 ? seconds : undefined };
+    updateSequence(type, items);
+  };
+
   const renderSequencer = (type, title, icon, colorClass) => {
     const items = sequence[type] || [];
     return (
@@ -148,6 +165,34 @@ const EditorNode = ({ id, data, isConnectable, selected }) => {
                 />
                 <span className="text-[9px] text-gray-500 w-6 text-right font-mono">{item.volume}%</span>
               </div>
+              <div className="flex items-center gap-2 px-1">
+                <Scissors size={10} className="text-gray-500" />
+                <label className="flex items-center gap-1 text-[9px] text-gray-500 font-mono">
+                  In
+                  <input
+                    type="number"
+                    min="0"
+                    step="0.1"
+                    placeholder="0"
+                    value={item.trimStart ?? ''}
+                    onChange={(e) => updateTrim(type, idx, 'trimStart', e.target.value)}
+                    className="nodrag w-12 bg-black/40 border border-white/10 rounded px-1 py-0.5 text-[9px] text-gray-300"
+                  />
+                </label>
+                <label className="flex items-center gap-1 text-[9px] text-gray-500 font-mono">
+                  Out
+                  <input
+                    type="number"
+                    min="0"
+                    step="0.1"
+                    placeholder="end"
+                    value={item.trimEnd ?? ''}
+                    onChange={(e) => updateTrim(type, idx, 'trimEnd', e.target.value)}
+                    className="nodrag w-12 bg-black/40 border border-white/10 rounded px-1 py-0.5 text-[9px] text-gray-300"
+                  />
+                </label>
+                <span className="text-[9px] text-gray-600">sec</span>
+              </div>
             </div>
           ))}
           {items.length === 0 && (
@@ -172,7 +217,20 @@ const EditorNode = ({ id, data, isConnectable, selected }) => {
       
       {data.status && data.status !== 'idle' && (
         <div className={`status-badge ${data.status}`}>
-          {data.status}
+          {data.status === 'running' && data.progress?.percent != null
+            ? `${Math.round(data.progress.percent)}%${data.progress.eta != null ? ` · ${Math.ceil(data.progress.eta)}s left` : ''}`
+            : data.status}
+        </div>
+      )}
+
+      {data.status === 'running' && data.progress?.stage && (
+        <div className="px-3 pt-2 text-[10px] text-gray-400 truncate" title={data.progress.stage}>
+          {data.progress.stage}
+          {data.progress.percent != null && (
+            <div className="mt-1 h-1 w-full rounded bg-gray-800">
+              <div className="h-1 rounded bg-indigo-500" style={{ width: `${data.progress.percent}%` }} />
+            </div>
+          )}
         </div>
       )}
 
@@ -192,6 +250,25 @@ const EditorNode = ({ id, data, isConnectable, selected }) => {
       </div>
 
       <div className="node-content overflow-y-auto flex-1 p-3">
+        <div className="flex items-center justify-between mb-3">
+          <span className="text-[10px] font-bold uppercase tracking-wider text-gray-400">Render</span>
+          <div className="flex rounded-md border border-gray-700 overflow-hidden nodrag">
+            {[
+              { id: 'draft', label: 'Draft', title: '640x360, 15 fps - fast previews while editing' },
+              { id: 'final', label: 'Final', title: "1280x720 at the clips' own frame rate - for export" },
+            ].map((tier) => (
+              <button
+                key={tier.id}
+                title={tier.title}
+                onClick={(e) => { e.stopPropagation(); setRenderQuality(tier.id); }}
+                className={`px-2 py-0.5 text-[10px] ${renderQuality === tier.id ? 'bg-indigo-500 text-white' : 'text-gray-400 hover:text-white'}`}
+              >
+                {tier.label}
+              </button>
+            ))}
+          </div>
+        </div>
+
         {renderSequencer('videos', 'Video Sequence', <Film size={12} className="text-indigo-400" />, 'indigo')}
         {renderSequencer('speech', 'Speech Track', <Mic size={12} className="text-rose-400" />, 'rose')}
         {renderSequencer('background', 'Background Score', <Music size={12} className="text-emerald-400" />, 'emerald')}
@@ -12,6 +12,10 @@ const MusicNode = ({ data, type, isConnectable, selected }) => {
     ? musicModels.filter(m => m.includes('pro') || m === 'lyria-002')
     : musicModels.filter(m => m.includes('clip') || m === 'lyria-002');
 
+  const modelId = data.config?.model_id || (isPro ? 'lyria-3-pro-preview' : 'lyria-3-clip-preview');
+  // Only Lyria 2 takes a seed; Lyria 3 produces a new take on every run
+  const usesSeed = !modelId.startsWith('lyria-3');
+
   const handleConfigChange = (key, value) => {
     if (data.onUpdate) {
       data.onUpdate({ config: { ...data.config, [key]: value } });
@@ -57,7 +61,7 @@ const MusicNode = ({ data, type, isConnectable, selected }) => {
             <label className="text-[10px] text-gray-500 font-medium">Model</label>
             <select
               className="bg-gray-900 border border-gray-700 text-[10px] text-gray-300 rounded p-1 w-full focus:outline-none focus:border-blue-500"
-              value={data.config?.model_id || (isPro ? 'lyria-3-pro-preview' : 'lyria-3-clip-preview')}
+              value={modelId}
               onChange={(e) => handleConfigChange('model_id', e.target.value)}
             >
               {relevantModels.map(m => (
@@ -65,6 +69,22 @@ const MusicNode = ({ data, type, isConnectable, selected }) => {
               ))}
             </select>
           </div>
+          {usesSeed && (
+            <div className="flex flex-col gap-1">
+              <label className="text-[10px] text-gray-500 font-medium">Seed</label>
+              {/* Empty: a new take on every run. Set: re-runs with the same prompt reuse the generated track */}
+              <input
+                type="number"
+                className="nodrag bg-gray-900 border border-gray-700 text-[10px] text-gray-300 rounded p-1 w-full focus:outline-none focus:border-blue-500"
+                placeholder="Random"
+                value={data.config?.seed ?? ''}
+                onChange={(e) => {
+                  const seed = parseInt(e.target.value, 10);
+                  handleConfigChange('seed', Number.isNaN(seed) ? null : seed);
+                }}
+              />
+            </div>
+          )}
         </div>
 
         {data.value && (
@@ -1,6 +1,20 @@
 import React, { memo, useState } from 'react';
 import { Handle, Position, NodeResizer } from '@xyflow/react';
 import { Eye, Image as ImageIcon, X, Play, Download } from 'lucide-react';
+import { useWaveformPeaks, hasPeaks } from '../../../hooks/useWaveformPeaks';
+
+// Compact waveform drawn from a stored audio asset's precomputed peaks
+const AudioPeaks = ({ src }) => {
+  const waveform = useWaveformPeaks(src, 48);
+  if (!waveform) return null;
+  return (
+    <div className="flex items-center gap-[2px] h-6 px-1">
+      {waveform.bars.map((height, i) => (
+        <div key={i} className="flex-1 bg-blue-400/70 rounded-full" style={{ height: `${Math.max(8, height * 100)}%` }} />
+      ))}
+    </div>
+  );
+};
 
 const OutputNode = ({ data, isConnectable, selected }) => {
   const [videoErrors, setVideoErrors] = useState({});
@@ -106,17 +120,25 @@ const OutputNode = ({ data, isConnectable, selected }) => {
                   ) : null;
                 })()}
               </div>
-              <audio
-                controls
-                className="w-full h-8"
-                src={(() => {
-                  const a = hasStandardAudio ? processedRes.audio : processedRes;
-                  if (a.url) return a.url;
-                  if (typeof a.data === 'string' && a.data.startsWith('data:')) return a.data;
-                  if (a.data) return `data:${a.mime_type};base64,${a.data}`;
-                  return '';
-                })()}
-              />
+              {(() => {
+                const a = hasStandardAudio ? processedRes.audio : processedRes;
+                let playbackSrc = '';
+                if (a.url) playbackSrc = a.url;
+                else if (typeof a.data === 'string' && a.data.startsWith('data:')) playbackSrc = a.data;
+                else if (a.data) playbackSrc = `data:${a.mime_type};base64,${a.data}`;
+                return (
+                  <>
+                    <AudioPeaks src={playbackSrc} />
+                    {/* With peaks drawn, the audio is only fetched once played */}
+                    <audio
+                      controls
+                      className="w-full h-8"
+                      preload={hasPeaks(playbackSrc) ? 'none' : 'auto'}
+                      src={playbackSrc}
+                    />
+                  </>
+                );
+              })()}
             </div>
           )}
 
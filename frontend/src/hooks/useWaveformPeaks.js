@@ -0,0 +1,77 @@
+import { useState, useEffect } from 'react';
+import { apiFetch } from '../utils/api';
+
+const MEDIA_PREFIX = '/api/media/';
+// Parsed sidecars by media URL; assets are immutable, so these never go stale
+const peaksCache = new Map();
+
+// Parses the backend peaks sidecar (see backend/services/waveform_peaks.py):
+// "PKS1", sample rate, level count, per-level (samplesPerPeak, count), then int8 (min, max) pairs.
+const parsePeaks = (buffer) => {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== 'PKS1') return null;
+  const sampleRate = view.getUint32(4, true);
+  const levelCount = view.getUint16(8, true);
+  const levels = [];
+  let offset = 10 + levelCount * 8;
+  for (let i = 0; i < levelCount; i++) {
+    const samplesPerPeak = view.getUint32(10 + i * 8, true);
+    const count = view.getUint32(14 + i * 8, true);
+    levels.push({ samplesPerPeak, count, sampleRate, data: new Int8Array(buffer, offset, count * 2) });
+    offset += count * 2;
+  }
+  return levels;
+};
+
+// Reduces the coarsest level that still has at least `bars` peaks to `bars` amplitudes in 0..1
+const toBars = (levels, bars) => {
+  const level = [...levels].reverse().find((l) => l.count >= bars) || levels[0];
+  const result = new Array(bars).fill(0);
+  for (let i = 0; i < level.count; i++) {
+    const bar = Math.min(bars - 1, Math.floor((i * bars) / level.count));
+    const amplitude = Math.max(-level.data[i * 2], level.data[i * 2 + 1]) / 128;
+    if (amplitude > result[bar]) result[bar] = amplitude;
+  }
+  return result;
+};
+
+// Peaks exist for audio assets: /api/media/<user>/audio/<file>
+export const hasPeaks = (src) => Boolean(src && src.startsWith(MEDIA_PREFIX) && src.split('/')[4] === 'audio');
+
+/**
+ * Waveform for an audio asset served from /api/media/, from the precomputed peaks instead
+ * of downloading and decoding the audio: { bars: heights in 0..1, duration: seconds }.
+ * Null while loading and for sources without peaks (e.g. blob: or data: URLs).
+ */
+export const useWaveformPeaks = (src, bars = 40) => {
+  const [waveform, setWaveform] = useState(null);
+
+  useEffect(() => {
+    setWaveform(null);
+    if (!hasPeaks(src)) return;
+
+    let cancelled = false;
+    const load = async () => {
+      let levels = peaksCache.get(src);
+      if (!levels) {
+        const res = await apiFetch(`/api/peaks/${src.slice(MEDIA_PREFIX.length)}`);
+        if (!res.ok) return;
+        levels = parsePeaks(await res.arrayBuffer());
+        if (!levels || !levels.length) return;
+        peaksCache.set(src, levels);
+      }
+      const finest = levels[0];
+      if (!cancelled) {
+        setWaveform({
+          bars: toBars(levels, bars),
+          duration: (finest.count * finest.samplesPerPeak) / finest.sampleRate,
+        });
+      }
+    };
+    load().catch(() => {});
+    return () => { cancelled = true; };
+  }, [src, bars]);
+
+  return waveform;
+};